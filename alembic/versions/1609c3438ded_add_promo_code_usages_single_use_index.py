@@ -0,0 +1,43 @@
+"""add promo code usages single use index
+
+Revision ID: 1609c3438ded
+Revises: bcba398b757f
+Create Date: 2026-10-17 00:23:49.256245
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1609c3438ded'
+down_revision = 'bcba398b757f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('promo_code_usages') as batch_op:
+        batch_op.add_column(sa.Column('is_single_use', sa.Boolean(), nullable=False, server_default='0'))
+
+    # Помечаем только первое использование однократного промокода каждым
+    # пользователем: повторы, записанные до индекса, не нарушают уникальность
+    op.execute("""
+        UPDATE promo_code_usages SET is_single_use = TRUE
+        WHERE id IN (
+            SELECT MIN(u.id) FROM promo_code_usages u
+            JOIN promo_codes p ON p.id = u.promo_code_id
+            WHERE p.is_single_use
+            GROUP BY u.promo_code_id, u.user_id
+        )
+    """)
+    op.create_index(
+        'ix_promo_code_usages_single_use', 'promo_code_usages', ['promo_code_id', 'user_id'], unique=True,
+        sqlite_where=sa.text('is_single_use'), postgresql_where=sa.text('is_single_use')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_promo_code_usages_single_use', table_name='promo_code_usages')
+    with op.batch_alter_table('promo_code_usages') as batch_op:
+        batch_op.drop_column('is_single_use')
@@ -0,0 +1,33 @@
+"""normalize sqlite ratings timestamps
+
+Revision ID: 1b3d7cc99b0a
+Revises: 1609c3438ded
+Create Date: 2026-10-17 00:31:46.889152
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b3d7cc99b0a'
+down_revision = '1609c3438ded'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CURRENT_TIMESTAMP в SQLite хранится без микросекунд, а SQLAlchemy пишет и
+    # сравнивает даты в формате с микросекундами; приводим строки к нему,
+    # чтобы курсор сортировки newest корректно сравнивался со старыми отзывами
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for column in ('created_at', 'updated_at'):
+        op.execute(
+            f"UPDATE ratings SET {column} = {column} || '.000000' WHERE length({column}) = 19"
+        )
+
+
+def downgrade() -> None:
+    # Формат с микросекундами читается и старым кодом
+    pass
@@ -0,0 +1,26 @@
+"""add ratings manipulation factor
+
+Revision ID: 26a9a600c189
+Revises: 96be86917dd4
+Create Date: 2026-10-17 00:03:50.358015
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '26a9a600c189'
+down_revision = '96be86917dd4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('ratings') as batch_op:
+        batch_op.add_column(sa.Column('manipulation_factor', sa.Float(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('ratings') as batch_op:
+        batch_op.drop_column('manipulation_factor')
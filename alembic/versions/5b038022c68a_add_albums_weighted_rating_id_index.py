@@ -0,0 +1,28 @@
+"""add albums weighted_rating id index
+
+Revision ID: 5b038022c68a
+Revises: b7aa1b26063a
+Create Date: 2026-10-16 23:58:29.511338
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b038022c68a'
+down_revision = 'b7aa1b26063a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Составной индекс покрывает и сортировку по рейтингу, и курсорную пагинацию.
+    # Одиночный индекс создавался через create_all и может отсутствовать
+    op.execute('DROP INDEX IF EXISTS ix_albums_weighted_rating')
+    op.create_index('ix_albums_weighted_rating_id', 'albums', ['weighted_rating', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_albums_weighted_rating_id', table_name='albums')
+    op.create_index('ix_albums_weighted_rating', 'albums', ['weighted_rating'])
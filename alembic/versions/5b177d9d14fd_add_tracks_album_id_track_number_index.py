@@ -0,0 +1,24 @@
+"""Add tracks album_id track_number index
+
+Revision ID: 5b177d9d14fd
+Revises: 784b6c3fb6f9
+Create Date: 2026-10-16 23:44:57.345513
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b177d9d14fd'
+down_revision = '784b6c3fb6f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tracks_album_track_number', 'tracks', ['album_id', 'track_number'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tracks_album_track_number', table_name='tracks')
@@ -0,0 +1,28 @@
+"""Add version columns to albums and artists
+
+Revision ID: 784b6c3fb6f9
+Revises: c45a32bcb877
+Create Date: 2026-10-16 23:42:32.850521
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '784b6c3fb6f9'
+down_revision = 'c45a32bcb877'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('artists', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('albums', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('albums') as batch_op:
+        batch_op.drop_column('version')
+    with op.batch_alter_table('artists') as batch_op:
+        batch_op.drop_column('version')
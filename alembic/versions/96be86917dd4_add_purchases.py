@@ -0,0 +1,40 @@
+"""add purchases
+
+Revision ID: 96be86917dd4
+Revises: b32c5b3ee2b6
+Create Date: 2026-10-17 00:02:01.901058
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '96be86917dd4'
+down_revision = 'b32c5b3ee2b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'purchases',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('album_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['album_id'], ['albums.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'album_id')
+    )
+
+    # Индекс покупок из уже завершенных заказов; is_verified_purchase отзывов
+    # пересчитывает python backfill_purchases.py
+    op.execute("""
+        INSERT INTO purchases (user_id, album_id)
+        SELECT DISTINCT o.user_id, oi.album_id
+        FROM orders o JOIN order_items oi ON oi.order_id = o.id
+        WHERE o.status = 'completed' AND o.user_id IS NOT NULL AND oi.album_id IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('purchases')
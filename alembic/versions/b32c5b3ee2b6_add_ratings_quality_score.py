@@ -0,0 +1,61 @@
+"""add ratings quality score
+
+Revision ID: b32c5b3ee2b6
+Revises: 5b038022c68a
+Create Date: 2026-10-17 00:00:31.921689
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b32c5b3ee2b6'
+down_revision = '5b038022c68a'
+branch_labels = None
+depends_on = None
+
+
+# Границы длины отзыва из RatingService.calculate_review_quality
+REVIEW_MIN_LENGTH = 10
+REVIEW_MAX_LENGTH = 2000
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('ratings') as batch_op:
+        batch_op.add_column(sa.Column('quality_score', sa.Float(), nullable=False, server_default='0'))
+
+    # Та же формула, что в RatingService.calculate_review_quality; возможные
+    # расхождения округления исправляет POST /api/admin/ratings/recompute
+    op.execute(f"""
+        UPDATE ratings SET quality_score = ROUND(
+            0.7 * (CASE
+                WHEN COALESCE(helpful_votes, 0) + COALESCE(unhelpful_votes, 0) > 0
+                THEN COALESCE(helpful_votes, 0) * 1.0
+                    / (COALESCE(helpful_votes, 0) + COALESCE(unhelpful_votes, 0))
+                ELSE 0.5
+            END)
+            + 0.3 * (CASE
+                WHEN COALESCE(review_text_length, 0) <= 0 THEN 0.0
+                WHEN review_text_length < {REVIEW_MIN_LENGTH} THEN review_text_length * 1.0 / {REVIEW_MIN_LENGTH}
+                WHEN review_text_length <= {REVIEW_MAX_LENGTH} THEN 1.0
+                ELSE {REVIEW_MAX_LENGTH} * 1.0 / review_text_length
+            END),
+            2
+        )
+    """)
+
+    op.create_index('ix_ratings_album_quality_id', 'ratings', ['album_id', 'quality_score', 'id'])
+    op.create_index('ix_ratings_album_created_id', 'ratings', ['album_id', 'created_at', 'id'])
+    op.create_index(
+        'ix_ratings_album_verified_quality_id', 'ratings',
+        ['album_id', 'is_verified_purchase', 'quality_score', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ratings_album_verified_quality_id', table_name='ratings')
+    op.drop_index('ix_ratings_album_created_id', table_name='ratings')
+    op.drop_index('ix_ratings_album_quality_id', table_name='ratings')
+    with op.batch_alter_table('ratings') as batch_op:
+        batch_op.drop_column('quality_score')
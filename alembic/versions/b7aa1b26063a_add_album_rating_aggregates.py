@@ -0,0 +1,62 @@
+"""add album rating aggregates
+
+Revision ID: b7aa1b26063a
+Revises: ef53a581ed5d
+Create Date: 2026-10-16 23:50:47.686230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7aa1b26063a'
+down_revision = 'ef53a581ed5d'
+branch_labels = None
+depends_on = None
+
+
+SCORES = range(1, 6)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('ratings') as batch_op:
+        batch_op.add_column(sa.Column('weighted_score', sa.Float(), nullable=False, server_default='0'))
+
+    op.create_table(
+        'album_rating_aggregates',
+        sa.Column('album_id', sa.Integer(), nullable=False),
+        *[sa.Column(f'score_{score}', sa.Integer(), nullable=False, server_default='0') for score in SCORES],
+        *[sa.Column(f'verified_score_{score}', sa.Integer(), nullable=False, server_default='0') for score in SCORES],
+        sa.Column('weighted_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['album_id'], ['albums.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('album_id')
+    )
+
+    # Счетчики переносятся точно. Веса отдельных отзывов приближаются средним
+    # weighted_rating альбома, чтобы сумма совпала с текущим рейтингом; точные
+    # значения восстанавливает POST /api/admin/ratings/recompute
+    counts = ', '.join(
+        [f'SUM(CASE WHEN r.score = {score} THEN 1 ELSE 0 END)' for score in SCORES]
+        + [f'SUM(CASE WHEN r.score = {score} AND r.is_verified_purchase THEN 1 ELSE 0 END)' for score in SCORES]
+    )
+    columns = ', '.join(
+        [f'score_{score}' for score in SCORES] + [f'verified_score_{score}' for score in SCORES]
+    )
+    op.execute(f"""
+        INSERT INTO album_rating_aggregates (album_id, {columns}, weighted_sum)
+        SELECT r.album_id, {counts}, MAX(a.weighted_rating) * COUNT(*)
+        FROM ratings r JOIN albums a ON a.id = r.album_id
+        GROUP BY r.album_id
+    """)
+    op.execute("""
+        UPDATE ratings SET weighted_score = (
+            SELECT a.weighted_rating FROM albums a WHERE a.id = ratings.album_id
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('album_rating_aggregates')
+    with op.batch_alter_table('ratings') as batch_op:
+        batch_op.drop_column('weighted_score')
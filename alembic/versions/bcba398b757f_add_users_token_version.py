@@ -0,0 +1,26 @@
+"""add users token version
+
+Revision ID: bcba398b757f
+Revises: 26a9a600c189
+Create Date: 2026-10-17 00:08:15.923027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bcba398b757f'
+down_revision = '26a9a600c189'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
@@ -0,0 +1,28 @@
+"""Add keyset pagination indexes
+
+Revision ID: c45a32bcb877
+Revises: a122c654efe3
+Create Date: 2026-10-16 23:40:38.172503
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c45a32bcb877'
+down_revision = 'a122c654efe3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_albums_price_id', 'albums', ['price', 'id'])
+    op.create_index('ix_albums_title_id', 'albums', ['title', 'id'])
+    op.create_index('ix_albums_release_year_id', 'albums', ['release_year', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_albums_release_year_id', table_name='albums')
+    op.drop_index('ix_albums_title_id', table_name='albums')
+    op.drop_index('ix_albums_price_id', table_name='albums')
@@ -0,0 +1,31 @@
+"""add promo code usage counters
+
+Revision ID: ef53a581ed5d
+Revises: 5b177d9d14fd
+Create Date: 2026-10-16 23:48:10.974861
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ef53a581ed5d'
+down_revision = '5b177d9d14fd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'promo_code_usage_counters',
+        sa.Column('promo_code_id', sa.Integer(), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('uses_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['promo_code_id'], ['promo_codes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('promo_code_id', 'shard')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('promo_code_usage_counters')
@@ -1,18 +1,64 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./data/records_store.db"
+    DATABASE_BACKEND: str = "sync"  # "async" обслуживает читающие эндпоинты через AsyncSession
+    ASYNC_DATABASE_URL: Optional[str] = None  # По умолчанию DATABASE_URL с драйвером aiosqlite/asyncpg
+    READ_DATABASE_URL: Optional[str] = None  # Реплика для читающих эндпоинтов; по умолчанию чтение идет с основной БД
+    SQLITE_READ_ONLY_READS: bool = False  # Без READ_DATABASE_URL: отдельный пул к тому же файлу SQLite с mode=ro
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # После записи клиент читает с основной БД (предел отставания реплики)
+    DATABASE_POOL_SIZE: int = 5  # Постоянных соединений в пуле
+    DATABASE_MAX_OVERFLOW: int = 10  # Дополнительных соединений сверх пула при пиковой нагрузке
+    DATABASE_POOL_TIMEOUT_SECONDS: float = 30.0  # Ожидание свободного соединения
+    
+    # SQLite profile (PRAGMA на каждом новом соединении)
+    SQLITE_PROFILE: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"  # Читатели не блокируются записью
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # В режиме WAL fsync только на контрольных точках
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Ожидание блокировки записи вместо ошибки "database is locked"
+    SQLITE_CACHE_SIZE: int = -65536  # Отрицательное значение — в КиБ (64 МБ на соединение)
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 МБ файла читаются через mmap
+    SQLITE_TEMP_STORE: str = "MEMORY"  # Временные таблицы и индексы сортировки в памяти
     
     # JWT
     SECRET_KEY: str = "your-secret-key-keep-it-secret"  # В реальном проекте должен быть в .env
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_TOKEN_CLAIMS: bool = False  # id, права и версия пользователя в токене; проверка без запроса к users
+    
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # При изменении хеши пересчитываются при следующем входе
+    PASSWORD_HASH_WORKERS: int = 2  # Потоков bcrypt, отдельных от пула обработчиков запросов
+    PASSWORD_HASH_MAX_PENDING: int = 32  # Сверх этого register/login получают 503
     
     # API
     API_V1_STR: str = "/api"
     PROJECT_NAME: str = "Records Store API"
     
+    # Catalog cache (serialized album/artist detail responses)
+    CATALOG_CACHE_MAX_ENTRIES: int = 10000  # 0 отключает кеш
+    CATALOG_CACHE_TTL_SECONDS: float = 300.0
+    
+    # Authenticated user cache (principals keyed by token subject)
+    USER_CACHE_MAX_ENTRIES: int = 10000  # 0 отключает кеш
+    USER_CACHE_TTL_SECONDS: float = 60.0  # Предел устаревания прав при нескольких воркерах
+    
+    # Bulk catalog import
+    CATALOG_IMPORT_BATCH_SIZE: int = 1000  # Записей в одной транзакции
+    
+    # Write-behind buffer for rating helpfulness votes
+    VOTE_FLUSH_INTERVAL_SECONDS: float = 1.0  # 0 записывает каждый голос сразу
+    VOTE_FLUSH_MAX_BATCH: int = 1000  # Досрочная запись при таком числе голосов в буфере
+    VOTE_FLUSH_MAX_BACKOFF_SECONDS: float = 30.0  # Предел паузы между повторами после временной ошибки БД
+    
+    # Album leaderboards
+    LEADERBOARD_MIN_RATINGS: int = 10  # Минимум оценок для top-rated и сила байесовского приора
+    LEADERBOARD_SIZE: int = 100  # Позиций на каждой доске
+    LEADERBOARD_REFRESH_SECONDS: float = 300.0  # Полное перестроение досок
+    
     class Config:
         case_sensitive = True
 
@@ -1,46 +1,25 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import Optional
 
 from .models.database import get_db
-from .models.models import User
-from .schemas.schemas import TokenData
-from .core.config import settings
+from .schemas.schemas import UserPrincipal
+from .utils.security import resolve_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-async def get_current_user(
+def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> User:
-    """Get current user from JWT token"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-        
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
-        raise credentials_exception
-        
-    return user
+) -> UserPrincipal:
+    """Get current user from JWT token; runs on the threadpool as it may query the database"""
+    return resolve_token(db, token)
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """Check if current user is active"""
     if not current_user.is_active:
         raise HTTPException(
@@ -50,8 +29,8 @@ async def get_current_active_user(
     return current_user
 
 async def get_current_admin_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """Check if current user is admin"""
     if not current_user.is_admin:
         raise HTTPException(
@@ -1,12 +1,38 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 
-from .models.database import engine, Base
-from .routers import auth, artists, albums, promotions, ratings
+from .core.config import settings
+from .models.database import async_engine, async_read_engine, engine, read_engine, Base, log_database_settings
+from .routers import auth, artists, albums, tracks, orders, promotions, ratings, leaderboards, admin, catalog_async
+from .services.search_service import SearchService
+from .services.vote_buffer import vote_buffer
+from .utils.password_hasher import password_hasher
+from .utils.pagination import NEXT_CURSOR_HEADER
+from .utils.read_routing import LAST_WRITE_HEADER, read_your_writes_middleware
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+# Create full-text search index for the album catalog
+SearchService.ensure_search_index(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Отчет о фактических настройках БД; фоновая запись голосов за отзывы;
+    # при остановке буфер дописывается в БД, пул хеширования паролей останавливается
+    log_database_settings(engine)
+    if read_engine is not engine:
+        log_database_settings(read_engine)
+    vote_buffer.start()
+    yield
+    vote_buffer.stop()
+    password_hasher.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
 
 app = FastAPI(
     title="Records Store API",
@@ -18,8 +44,10 @@ app = FastAPI(
     * 👤 **Аутентификация** - Система на основе JWT
     * 🎨 **Артисты** - Управление артистами и их каталогами
     * 💿 **Альбомы** - Управление альбомами с расширенной фильтрацией
+    * 🎼 **Треки** - Треклисты альбомов
     * 🛒 **Заказы** - Обработка заказов клиентов
     * ⭐ **Рейтинги** - Система рейтингов и отзывов
+    * 🏆 **Чарты** - Лучшие и самые обсуждаемые альбомы
     * 🎁 **Акции** - Скидки, промокоды и программа лояльности
     
     ## Рейтинги и отзывы
@@ -54,7 +82,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -64,8 +93,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", LAST_WRITE_HEADER],
 )
 
+if read_engine is not engine:
+    # Отметка о записи клиента: следующие чтения в пределах READ_YOUR_WRITES_SECONDS
+    # идут в основную БД, а не в реплику
+    app.middleware("http")(read_your_writes_middleware)
+
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
@@ -95,6 +130,14 @@ def custom_openapi():
             "name": "albums",
             "description": "Управление альбомами",
         },
+        {
+            "name": "tracks",
+            "description": "Управление треками альбомов",
+        },
+        {
+            "name": "orders",
+            "description": "Оформление и просмотр заказов",
+        },
         {
             "name": "ratings",
             "description": """
@@ -112,9 +155,17 @@ def custom_openapi():
             * Верификация покупок
             """,
         },
+        {
+            "name": "leaderboards",
+            "description": "Чарты альбомов: лучшие по рейтингу и самые обсуждаемые",
+        },
         {
             "name": "promotions",
             "description": "Управление акциями и программой лояльности",
+        },
+        {
+            "name": "admin",
+            "description": "Служебные эндпоинты администратора",
         }
     ]
     
@@ -159,6 +210,18 @@ def custom_openapi():
 app.openapi = custom_openapi
 
 # Подключаем роутеры
+if settings.DATABASE_BACKEND == "async":
+    # Асинхронные версии читающих эндпоинтов регистрируются первыми и
+    # перекрывают одноименные синхронные маршруты
+    app.include_router(
+        catalog_async.router,
+        prefix="/api",
+        responses={
+            401: {"description": "Требуется аутентификация"},
+            404: {"description": "Ресурс не найден"}
+        }
+    )
+
 app.include_router(
     auth.router,
     prefix="/api/auth",
@@ -191,6 +254,28 @@ app.include_router(
     }
 )
 
+app.include_router(
+    tracks.router,
+    prefix="/api",
+    tags=["tracks"],
+    responses={
+        401: {"description": "Требуется аутентификация"},
+        403: {"description": "Требуются права администратора"},
+        404: {"description": "Трек не найден"}
+    }
+)
+
+app.include_router(
+    orders.router,
+    prefix="/api",
+    tags=["orders"],
+    responses={
+        401: {"description": "Требуется аутентификация"},
+        404: {"description": "Ресурс не найден"},
+        409: {"description": "Недостаточно товара на складе"}
+    }
+)
+
 app.include_router(
     ratings.router,
     prefix="/api",
@@ -203,6 +288,16 @@ app.include_router(
     }
 )
 
+app.include_router(
+    leaderboards.router,
+    prefix="/api",
+    tags=["leaderboards"],
+    responses={
+        401: {"description": "Требуется аутентификация"},
+        400: {"description": "Некорректный запрос"}
+    }
+)
+
 app.include_router(
     promotions.router,
     prefix="/api",
@@ -215,6 +310,16 @@ app.include_router(
     }
 )
 
+app.include_router(
+    admin.router,
+    prefix="/api",
+    tags=["admin"],
+    responses={
+        401: {"description": "Требуется аутентификация"},
+        403: {"description": "Требуются права администратора"}
+    }
+)
+
 @app.get("/", tags=["root"])
 async def root():
     """
@@ -1,16 +1,165 @@
-from sqlalchemy import create_engine
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from ..core.config import settings
+from ..utils.read_routing import wrote_recently
+
+logger = logging.getLogger(__name__)
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+# PRAGMA applied to every new SQLite connection when SQLITE_PROFILE is on
+SQLITE_PRAGMAS = (
+    ("journal_mode", settings.SQLITE_JOURNAL_MODE),
+    ("synchronous", settings.SQLITE_SYNCHRONOUS),
+    ("busy_timeout", settings.SQLITE_BUSY_TIMEOUT_MS),
+    ("cache_size", settings.SQLITE_CACHE_SIZE),
+    ("mmap_size", settings.SQLITE_MMAP_SIZE),
+    ("temp_store", settings.SQLITE_TEMP_STORE),
 )
+
+def is_memory_sqlite(url) -> bool:
+    """Whether `url` points to an in-memory SQLite database."""
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+def engine_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Return create_engine keyword arguments for `url` with explicit pool sizing.
+
+    In-memory SQLite databases keep the dialect's single-connection pool. The
+    async SQLite driver would otherwise open a new connection per session, so
+    it gets a queue pool like the sync engine.
+    """
+    url = make_url(url)
+    options: Dict[str, Any] = {}
+    if url.get_backend_name() == "sqlite":
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        if is_memory_sqlite(url):
+            return options
+        if is_async:
+            options["poolclass"] = AsyncAdaptedQueuePool
+    options.update(
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+    )
+    return options
+
+def apply_sqlite_profile(bind: Engine) -> None:
+    """Run SQLITE_PRAGMAS on every new DBAPI connection of a SQLite engine."""
+    if bind.dialect.name != "sqlite" or not settings.SQLITE_PROFILE:
+        return
+    # Режим журнала хранится в файле и задается соединениями на запись
+    read_only = bind.url.query.get("mode") == "ro"
+    pragmas = [(name, value) for name, value in SQLITE_PRAGMAS if not (read_only and name == "journal_mode")]
+
+    @event.listens_for(bind, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def database_settings(bind: Engine) -> Dict[str, Any]:
+    """Return the pool status and, for SQLite, the effective PRAGMA values of `bind`."""
+    report: Dict[str, Any] = {
+        "url": bind.url.render_as_string(hide_password=True),
+        "pool": bind.pool.status(),
+    }
+    if bind.dialect.name == "sqlite":
+        with bind.connect() as connection:
+            report["pragmas"] = {
+                name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name, _ in SQLITE_PRAGMAS
+            }
+    return report
+
+def log_database_settings(bind: Engine) -> Dict[str, Any]:
+    """Log the effective database settings, warning when SQLite ignored the configured journal mode."""
+    report = database_settings(bind)
+    logger.info("Database settings: %s", report)
+    journal_mode = report.get("pragmas", {}).get("journal_mode")
+    if settings.SQLITE_PROFILE and journal_mode and journal_mode.lower() != settings.SQLITE_JOURNAL_MODE.lower():
+        # Например, WAL недоступен для баз в памяти и на сетевых файловых системах
+        logger.warning(
+            "SQLite journal_mode is %s instead of %s", journal_mode, settings.SQLITE_JOURNAL_MODE
+        )
+    return report
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+apply_sqlite_profile(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_read_database_url() -> Optional[str]:
+    """Return the URL of the read engine, or None when reads go to the primary engine."""
+    if settings.READ_DATABASE_URL:
+        return settings.READ_DATABASE_URL
+    url = make_url(SQLALCHEMY_DATABASE_URL)
+    if settings.SQLITE_READ_ONLY_READS and url.get_backend_name() == "sqlite" and not is_memory_sqlite(url):
+        return url.set(
+            database=f"file:{url.database}", query={**url.query, "mode": "ro", "uri": "true"}
+        ).render_as_string(hide_password=False)
+    return None
+
+# Engine for read-only endpoints (replica or read-only SQLite connection); the primary if not configured
+READ_DATABASE_URL = get_read_database_url()
+if READ_DATABASE_URL:
+    read_engine = create_engine(READ_DATABASE_URL, **engine_options(READ_DATABASE_URL))
+    apply_sqlite_profile(read_engine)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+else:
+    read_engine = engine
+    ReadSessionLocal = SessionLocal
+
+# Async drivers for the sync URL schemes
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def to_async_url(url: str) -> str:
+    """Return `url` switched to the async driver of its backend."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}, set ASYNC_DATABASE_URL")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+def get_async_database_url() -> str:
+    """Return ASYNC_DATABASE_URL or DATABASE_URL switched to its async driver."""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return to_async_url(SQLALCHEMY_DATABASE_URL)
+
+def create_async_engine_for(url: str):
+    """Create an async engine for `url` with the pool options and SQLite profile of the sync engines."""
+    bind = create_async_engine(url, **engine_options(url, is_async=True))
+    apply_sqlite_profile(bind.sync_engine)
+    return bind
+
+# The async engines need aiosqlite/asyncpg, so they are only created for the async backend
+async_engine = create_async_engine_for(get_async_database_url()) if settings.DATABASE_BACKEND == "async" else None
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+) if async_engine is not None else None
+
+# Async counterpart of read_engine: the replica through its async driver, or the primary
+if async_engine is not None and READ_DATABASE_URL:
+    async_read_engine = create_async_engine_for(to_async_url(READ_DATABASE_URL))
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+else:
+    async_read_engine = async_engine
+    AsyncReadSessionLocal = AsyncSessionLocal
+
 Base = declarative_base()
 
 def get_db():
@@ -26,3 +175,58 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db(request: Request):
+    """
+    Dependency function to get a database session for read-only endpoints.
+    Reads go to the read engine, except for clients that wrote within
+    READ_YOUR_WRITES_SECONDS: they read from the primary and see their writes.
+    Usage:
+        @app.get("/items")
+        def read_items(db: Session = Depends(get_read_db)):
+            ...
+    """
+    db = SessionLocal() if wrote_recently(request) else ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def reads_primary(db) -> bool:
+    """
+    Whether a sync or async session reads from the primary database.
+
+    Shared caches are only filled from the primary: a lagging replica would
+    put a stale body under the epoch of a fresh invalidation.
+    """
+    bind = getattr(db, "sync_session", db).get_bind()
+    return bind is engine or (async_engine is not None and bind is async_engine.sync_engine)
+
+async def get_async_db():
+    """
+    Dependency function to get an async database session (DATABASE_BACKEND=async).
+    Usage:
+        @app.get("/items")
+        async def read_items(db: AsyncSession = Depends(get_async_db)):
+            ...
+    """
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database is disabled, set DATABASE_BACKEND=async")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db(request: Request):
+    """
+    Dependency function to get an async database session for read-only endpoints.
+    Routes reads like `get_read_db`: clients that wrote within
+    READ_YOUR_WRITES_SECONDS read from the primary.
+    Usage:
+        @app.get("/items")
+        async def read_items(db: AsyncSession = Depends(get_async_read_db)):
+            ...
+    """
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database is disabled, set DATABASE_BACKEND=async")
+    session_factory = AsyncSessionLocal if wrote_recently(request) else AsyncReadSessionLocal
+    async with session_factory() as db:
+        yield db
@@ -1,7 +1,7 @@
 from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import func, text
 
 from .database import Base
 
@@ -15,6 +15,7 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # Увеличивается при смене прав/статуса, отзывая выданные токены
     
     orders = relationship("Order", back_populates="user")
     reviews = relationship("Review", back_populates="user")
@@ -30,8 +31,11 @@ class Artist(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     description = Column(String)
+    version = Column(Integer, nullable=False, server_default="1")  # Версия строки для ETag
     
     albums = relationship("Album", back_populates="artist")
+    
+    __mapper_args__ = {"version_id_col": version}
 
 class Album(Base):
     __tablename__ = "albums"
@@ -46,16 +50,23 @@ class Album(Base):
     weighted_rating = Column(Float, default=0.0, nullable=False)
     rating_count = Column(Integer, default=0, nullable=False)
     verified_rating_count = Column(Integer, default=0, nullable=False)
+    version = Column(Integer, nullable=False, server_default="1")  # Версия строки для ETag
     
     __table_args__ = (
-        Index('ix_albums_weighted_rating', 'weighted_rating'),
         Index('ix_albums_rating_count', 'rating_count'),
+        # Индексы для курсорной пагинации: ключ сортировки + id
+        Index('ix_albums_weighted_rating_id', 'weighted_rating', 'id'),
+        Index('ix_albums_price_id', 'price', 'id'),
+        Index('ix_albums_title_id', 'title', 'id'),
+        Index('ix_albums_release_year_id', 'release_year', 'id'),
     )
     
     artist = relationship("Artist", back_populates="albums")
-    tracks = relationship("Track", back_populates="album")
+    tracks = relationship("Track", back_populates="album", order_by="Track.track_number", cascade="all, delete-orphan")
     reviews = relationship("Review", back_populates="album")
     ratings = relationship("Rating", back_populates="album", cascade="all, delete-orphan")
+    
+    __mapper_args__ = {"version_id_col": version}
 
 class Track(Base):
     __tablename__ = "tracks"
@@ -66,6 +77,10 @@ class Track(Base):
     duration = Column(Integer)  # duration in seconds
     track_number = Column(Integer)
     
+    __table_args__ = (
+        Index('ix_tracks_album_track_number', 'album_id', 'track_number'),  # Треклист альбома по порядку
+    )
+    
     album = relationship("Album", back_populates="tracks")
 
 class Order(Base):
@@ -102,6 +117,19 @@ class OrderItem(Base):
     
     order = relationship("Order", back_populates="items")
 
+class Purchase(Base):
+    """
+    Индекс покупок: пользователь купил альбом хотя бы в одном завершенном заказе.
+    
+    Заполняется при переводе заказа в статус completed и позволяет проверить
+    подтвержденную покупку одним поиском по первичному ключу вместо соединения
+    orders и order_items.
+    """
+    __tablename__ = "purchases"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    album_id = Column(Integer, ForeignKey("albums.id", ondelete="CASCADE"), primary_key=True)
+
 class Review(Base):
     __tablename__ = "reviews"
 
@@ -123,11 +151,21 @@ class PromoCodeUsage(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     order_id = Column(Integer, ForeignKey("orders.id"))
     used_at = Column(DateTime, default=func.now())
+    is_single_use = Column(Boolean, nullable=False, default=False, server_default="0")  # Использование однократного промокода
 
     promo_code = relationship("PromoCode", back_populates="usages")
     user = relationship("User", back_populates="promo_code_usages")
     order = relationship("Order", back_populates="promo_code_usages")
 
+    __table_args__ = (
+        # Однократный промокод пользователь погашает не больше одного раза,
+        # даже при параллельных заказах
+        Index(
+            'ix_promo_code_usages_single_use', 'promo_code_id', 'user_id', unique=True,
+            sqlite_where=text('is_single_use'), postgresql_where=text('is_single_use')
+        ),
+    )
+
 class GiftCardTransaction(Base):
     __tablename__ = "gift_card_transactions"
 
@@ -171,6 +209,19 @@ class PromoCode(Base):
 
     usages = relationship("PromoCodeUsage", back_populates="promo_code")
 
+class PromoCodeUsageCounter(Base):
+    """
+    Шардированный счетчик использований промокодов без лимита.
+    
+    Каждое использование увеличивает случайный шард, поэтому одновременные
+    заказы не выстраиваются в очередь за одной строкой promo_codes.
+    """
+    __tablename__ = "promo_code_usage_counters"
+
+    promo_code_id = Column(Integer, ForeignKey("promo_codes.id", ondelete="CASCADE"), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    uses_count = Column(Integer, nullable=False, default=0)
+
 class GiftCard(Base):
     __tablename__ = "gift_cards"
 
@@ -217,6 +268,9 @@ class Rating(Base):
         review_text_length: Длина текста отзыва
         helpful_votes: Количество голосов "полезно"
         unhelpful_votes: Количество голосов "бесполезно"
+        weighted_score: Вклад отзыва во взвешенный рейтинг альбома на момент последнего пересчета
+        quality_score: Качество отзыва (calculate_review_quality) для сортировки по полезности
+        manipulation_factor: Понижающий множитель веса для отзывов, помеченных как накрутка
     """
     __tablename__ = "ratings"
 
@@ -225,23 +279,60 @@ class Rating(Base):
     album_id = Column(Integer, ForeignKey("albums.id", ondelete="CASCADE"), nullable=False)
     score = Column(Integer, nullable=False)
     is_verified_purchase = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    # Время задается в Python: SQLite хранит CURRENT_TIMESTAMP без микросекунд,
+    # и такие строки не сравниваются с курсором пагинации в формате SQLAlchemy
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     review_text_length = Column(Integer, default=0)
     helpful_votes = Column(Integer, default=0)
     unhelpful_votes = Column(Integer, default=0)
+    weighted_score = Column(Float, nullable=False, default=0.0, server_default="0")
+    quality_score = Column(Float, nullable=False, default=0.0, server_default="0")
+    manipulation_factor = Column(Float, nullable=False, default=1.0, server_default="1")
     
     __table_args__ = (
         Index('ix_ratings_user_album', 'user_id', 'album_id', unique=True),  # Уникальный индекс
         Index('ix_ratings_score', 'score'),  # Индекс для агрегации
         Index('ix_ratings_created_at', 'created_at'),  # Индекс для сортировки по дате
+        # Индексы для постраничного списка отзывов альбома
+        Index('ix_ratings_album_quality_id', 'album_id', 'quality_score', 'id'),
+        Index('ix_ratings_album_created_id', 'album_id', 'created_at', 'id'),
+        Index('ix_ratings_album_verified_quality_id', 'album_id', 'is_verified_purchase', 'quality_score', 'id'),
     )
     
     user = relationship("User", back_populates="ratings")
     album = relationship("Album", back_populates="ratings")
     votes = relationship("RatingVote", back_populates="rating", cascade="all, delete-orphan")
 
+class AlbumRatingAggregate(Base):
+    """
+    Накопленная статистика оценок альбома.
+    
+    Обновляется дельтами при создании и изменении отзыва и при голосовании,
+    поэтому запись не требует перечитывать все отзывы альбома.
+    
+    Attributes:
+        album_id: ID альбома
+        score_1 ... score_5: Количество оценок каждого значения
+        verified_score_1 ... verified_score_5: То же для подтвержденных покупок
+        weighted_sum: Сумма weighted_score всех отзывов альбома
+    """
+    __tablename__ = "album_rating_aggregates"
+
+    album_id = Column(Integer, ForeignKey("albums.id", ondelete="CASCADE"), primary_key=True)
+    score_1 = Column(Integer, nullable=False, default=0)
+    score_2 = Column(Integer, nullable=False, default=0)
+    score_3 = Column(Integer, nullable=False, default=0)
+    score_4 = Column(Integer, nullable=False, default=0)
+    score_5 = Column(Integer, nullable=False, default=0)
+    verified_score_1 = Column(Integer, nullable=False, default=0)
+    verified_score_2 = Column(Integer, nullable=False, default=0)
+    verified_score_3 = Column(Integer, nullable=False, default=0)
+    verified_score_4 = Column(Integer, nullable=False, default=0)
+    verified_score_5 = Column(Integer, nullable=False, default=0)
+    weighted_sum = Column(Float, nullable=False, default=0.0)
+
 class RatingVote(Base):
     """
     Модель голоса за полезность отзыва.
@@ -3,5 +3,10 @@ from .artists import router as artists_router
 from .albums import router as albums_router
 from .promotions import router as promotions_router
 from .ratings import router as ratings_router
+from .admin import router as admin_router
+from .tracks import router as tracks_router
+from .orders import router as orders_router
+from .leaderboards import router as leaderboards_router
+from .catalog_async import router as catalog_async_router
 
-__all__ = ["auth_router", "artists_router", "albums_router", "promotions_router", "ratings_router"]
+__all__ = ["auth_router", "artists_router", "albums_router", "promotions_router", "ratings_router", "admin_router", "tracks_router", "orders_router", "leaderboards_router", "catalog_async_router"]
@@ -0,0 +1,103 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.database import database_settings, engine, get_db, read_engine
+from ..models.models import Album
+from ..schemas.schemas import CatalogImportReport, RatingRecomputeReport
+from ..services.catalog_import import CatalogImportService
+from ..services.rating_batch import RatingBatchService
+from ..services.rating_service import RatingService
+from ..utils.cache import album_cache, artist_cache, user_cache
+from ..utils.password_hasher import password_hasher
+from ..utils.security import get_current_admin_user
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"]
+)
+
+@router.get("/cache/stats")
+def get_cache_stats(
+    _: dict = Depends(get_current_admin_user)
+):
+    """
+    Get hit/miss/eviction counters and size of the catalog and user caches (Admin only)
+    """
+    return {"caches": [album_cache.stats(), artist_cache.stats(), user_cache.stats()]}
+
+@router.get("/password-hasher/stats")
+def get_password_hasher_stats(
+    _: dict = Depends(get_current_admin_user)
+):
+    """
+    Get queue depth, rejections and timings of the password hashing pool (Admin only)
+    """
+    return password_hasher.stats()
+
+@router.get("/database/settings")
+def get_database_settings(
+    _: dict = Depends(get_current_admin_user)
+):
+    """
+    Get the connection pool status and effective SQLite PRAGMA values of the
+    primary and read engines (Admin only)
+
+    `read` is null when reads go to the primary database.
+    """
+    return {
+        "primary": database_settings(engine),
+        "read": database_settings(read_engine) if read_engine is not engine else None,
+    }
+
+@router.post("/catalog/import", response_model=CatalogImportReport)
+def import_catalog(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, enum=["csv", "ndjson"]),
+    db: Session = Depends(get_db),
+    _: dict = Depends(get_current_admin_user)
+):
+    """
+    Bulk import artists, albums and tracks from a CSV or NDJSON file (Admin only)
+
+    Every record has a `type` field (`artist`, `album` or `track`) and the fields
+    of the matching create schema. Albums reference an artist by `artist_id` or
+    `artist_name`; tracks reference `album_id`, or are nested in an NDJSON album
+    record as a `tracks` list. The format is taken from `format` or the file
+    extension. Rows are validated and inserted in batches, each batch in its own
+    transaction; invalid rows are reported and skipped.
+    """
+    if format is None:
+        filename = (file.filename or "").lower()
+        if filename.endswith(".csv"):
+            format = "csv"
+        elif filename.endswith((".ndjson", ".jsonl")):
+            format = "ndjson"
+        else:
+            raise HTTPException(status_code=400, detail="Cannot detect file format, pass format=csv or format=ndjson")
+
+    reader = CatalogImportService.read_csv if format == "csv" else CatalogImportService.read_ndjson
+    return CatalogImportService.import_rows(db, reader(file.file), settings.CATALOG_IMPORT_BATCH_SIZE)
+
+@router.post("/ratings/recompute", response_model=RatingRecomputeReport)
+def recompute_ratings(
+    album_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    _: dict = Depends(get_current_admin_user)
+):
+    """
+    Rebuild rating aggregates from scratch for one album or the whole catalog (Admin only)
+
+    Ratings are normally applied to album aggregates incrementally; this repairs
+    drift and refreshes the age penalty of every review. The whole catalog is
+    recomputed with vectorized batch code (see also `recompute_ratings.py`).
+    Both forms return the same report: reviews checked and updated, albums
+    whose rating changed and elapsed time.
+    """
+    if album_id is None:
+        return RatingRecomputeReport(**RatingBatchService.recompute_all(db))
+
+    if db.query(Album.id).filter(Album.id == album_id).first() is None:
+        raise HTTPException(status_code=404, detail="Album not found")
+    return RatingRecomputeReport(**RatingService.update_album_rating(db, album_id))
@@ -1,18 +1,121 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-
-from ..models.database import get_db
-from ..models.models import Album, Artist
-from ..schemas.schemas import AlbumCreate, AlbumResponse
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload
+
+from ..models.database import get_db, get_read_db, reads_primary
+from ..models.models import Album, Artist, Track
+from ..schemas.schemas import AlbumCreate, AlbumDetailResponse, AlbumResponse, TrackResponse
+from ..services.leaderboard_service import leaderboards
+from ..services.search_service import SearchService
+from ..utils.cache import album_cache, invalidate_albums
+from ..utils.etag import etag_matches, etag_response, make_etag, make_page_etag, not_modified
+from ..utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, order_by_key, paginate
 from ..utils.security import get_current_admin_user, get_current_user
+from ..utils.streaming import stream_query, streaming_media_type
 
 router = APIRouter(
     prefix="/albums",
     tags=["albums"]
 )
 
+# Sort key columns (id as tie-breaker) and direction for each sort_by option
+ALBUM_SORT_KEYS = {
+    None: ((Album.id,), False),
+    "price_asc": ((Album.price, Album.id), False),
+    "price_desc": ((Album.price, Album.id), True),
+    "title": ((Album.title, Album.id), False),
+    "year": ((Album.release_year, Album.id), True),
+    "relevance": ((Album.id,), False),
+    "rating": ((Album.weighted_rating, Album.id), True),
+}
+
+# Relations that can be embedded with GET /albums/{id}?include=
+ALBUM_INCLUDES = {"tracks", "artist"}
+
+# Query and response helpers shared with the async catalog router (catalog_async)
+
+def parse_album_includes(include: Optional[str]) -> bool:
+    """
+    Validate the `include` parameter of GET /albums/{id}.
+
+    Returns:
+        Whether the tracklist is embedded
+
+    Raises:
+        HTTPException: If an unknown relation is requested
+    """
+    includes = {part.strip() for part in include.split(",") if part.strip()} if include else set()
+    unknown = includes - ALBUM_INCLUDES
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(sorted(unknown))}")
+    return "tracks" in includes
+
+def album_cache_key(album_id: int, with_tracks: bool):
+    """Key of the album response in album_cache."""
+    return (album_id, "tracks") if with_tracks else album_id
+
+def album_exists_query(album_id: int) -> Select:
+    """SELECT returning a row only if the album exists."""
+    return select(Album.id).where(Album.id == album_id)
+
+def album_versions_query(album_id: int) -> Select:
+    """SELECT of the album and artist versions the album ETag is built from."""
+    return select(Album.version, Artist.version)\
+        .outerjoin(Artist, Artist.id == Album.artist_id)\
+        .where(Album.id == album_id)
+
+def album_query(album_id: int, with_tracks: bool) -> Select:
+    """
+    SELECT of an album with its artist and, optionally, tracks.
+
+    Relations are loaded eagerly (album with artist, then tracks), so the
+    result can be serialized without lazy loading, which AsyncSession lacks.
+    """
+    query = select(Album).options(joinedload(Album.artist)).where(Album.id == album_id)
+    if with_tracks:
+        query = query.options(selectinload(Album.tracks))
+    return query
+
+def album_tracks_query(album_id: int) -> Select:
+    """SELECT of the ordered tracklist of an album."""
+    return select(Track).where(Track.album_id == album_id).order_by(Track.track_number, Track.id)
+
+def album_etag(album_id: int, album_version: int, artist_version: Optional[int], with_tracks: bool) -> str:
+    """ETag of an album response."""
+    return make_etag("album", album_id, album_version, artist_version, *(("tracks",) if with_tracks else ()))
+
+def album_not_modified(request: Request, album_id: int, versions, with_tracks: bool) -> Optional[Response]:
+    """
+    Answer a conditional request from the row versions alone (`album_versions_query`).
+
+    Returns:
+        304 response if If-None-Match matches, otherwise None
+
+    Raises:
+        HTTPException: If the album does not exist
+    """
+    if versions is None:
+        raise HTTPException(status_code=404, detail="Album not found")
+    etag = album_etag(album_id, *versions, with_tracks)
+    return not_modified(etag) if etag_matches(request, etag) else None
+
+def album_cache_entry(album: Optional[Album], with_tracks: bool) -> Tuple[str, str]:
+    """
+    Serialize an album loaded with `album_query` for album_cache.
+
+    Returns:
+        JSON body and ETag
+
+    Raises:
+        HTTPException: If the album does not exist
+    """
+    if album is None:
+        raise HTTPException(status_code=404, detail="Album not found")
+    etag = album_etag(album.id, album.version, album.artist.version if album.artist else None, with_tracks)
+    schema = AlbumDetailResponse if with_tracks else AlbumResponse
+    return schema.model_validate(album).model_dump_json(), etag
+
 @router.post("/", response_model=AlbumResponse, status_code=status.HTTP_201_CREATED, responses={201: {"content": {"application/json": {}}}})
 def create_album(
     album: AlbumCreate,
@@ -35,28 +138,38 @@ def create_album(
 
 @router.get("/", response_model=List[AlbumResponse], responses={200: {"content": {"application/json": {}}}})
 def get_albums(
+    request: Request,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     genre: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    sort_by: Optional[str] = Query(None, enum=["price_asc", "price_desc", "title", "year"]),
-    db: Session = Depends(get_db),
+    sort_by: Optional[str] = Query(None, enum=["price_asc", "price_desc", "title", "year", "rating", "relevance"]),
+    stream: bool = False,
+    db: Session = Depends(get_read_db),
     _: dict = Depends(get_current_user)
 ):
     """
     Get all albums with filtering, sorting and pagination (Authenticated users only)
+
+    `search` matches album title, genre and artist name through the full-text
+    index; `sort_by=relevance` orders search results by match rank.
+
+    When more rows are available the `X-Next-Cursor` response header holds a
+    cursor; pass it back as `cursor` to fetch the next page in constant time.
+
+    With `Accept: application/x-ndjson` (one album per line) or `stream=true`
+    (JSON array) the whole filtered result is streamed as it is fetched and
+    `skip`, `limit` and `cursor` are ignored.
     """
     query = db.query(Album)
     
     # Apply filters
     if search:
-        query = query.filter(
-            or_(
-                Album.title.ilike(f"%{search}%"),
-                Album.genre.ilike(f"%{search}%")
-            )
+        query = SearchService.apply_album_search(
+            db, query, search, rank=sort_by == "relevance"
         )
     if genre:
         query = query.filter(Album.genre == genre)
@@ -65,34 +178,98 @@ def get_albums(
     if max_price is not None:
         query = query.filter(Album.price <= max_price)
     
-    # Apply sorting
-    if sort_by:
-        if sort_by == "price_asc":
-            query = query.order_by(Album.price.asc())
-        elif sort_by == "price_desc":
-            query = query.order_by(Album.price.desc())
-        elif sort_by == "title":
-            query = query.order_by(Album.title.asc())
-        elif sort_by == "year":
-            query = query.order_by(Album.release_year.desc())
-    
-    # Apply pagination
-    albums = query.offset(skip).limit(limit).all()
-    return Response(content=[AlbumResponse.model_validate(album).model_dump_json() for album in albums], media_type="application/json")
+    relevance = sort_by == "relevance" and bool(search)
+    columns, descending = ALBUM_SORT_KEYS.get(sort_by, ALBUM_SORT_KEYS[None])
+
+    media_type = streaming_media_type(request, stream)
+    if media_type:
+        if not relevance:
+            query = query.order_by(*order_by_key(columns, descending))
+        return stream_query(query.options(joinedload(Album.artist)), AlbumResponse, media_type)
+
+    if relevance and cursor:
+        raise HTTPException(
+            status_code=400,
+            detail="Cursor pagination is not supported for relevance sorting"
+        )
+
+    # Apply sorting and pagination
+    def fetch_page(page_query):
+        if relevance:
+            return page_query.offset(skip).limit(limit).all(), None
+        return paginate(page_query, columns, descending, limit, cursor, skip)
+
+    if request.headers.get("if-none-match"):
+        # Сначала выбираем только ключи и версии строк страницы: если ETag
+        # совпал, полные строки не загружаются и не сериализуются
+        artist = aliased(Artist)
+        key_query = query.outerjoin(artist, artist.id == Album.artist_id).with_entities(
+            *columns, Album.version, artist.version.label("artist_version")
+        )
+        keys, next_cursor = fetch_page(key_query)
+        etag = make_page_etag("albums", ((row.id, row.version, row.artist_version) for row in keys))
+        if etag_matches(request, etag):
+            return not_modified(etag, next_cursor)
 
-@router.get("/{album_id}", response_model=AlbumResponse, responses={200: {"content": {"application/json": {}}}})
+    albums, next_cursor = fetch_page(query.options(joinedload(Album.artist)))
+    etag = make_page_etag(
+        "albums",
+        ((album.id, album.version, album.artist.version if album.artist else None) for album in albums)
+    )
+
+    content = "[" + ",".join(AlbumResponse.model_validate(album).model_dump_json() for album in albums) + "]"
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(content=content, media_type="application/json", headers=headers)
+
+@router.get("/{album_id}", response_model=AlbumDetailResponse, responses={200: {"content": {"application/json": {}}}})
 def get_album(
     album_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    include: Optional[str] = Query(None, description="Comma-separated relations to embed: tracks, artist"),
+    db: Session = Depends(get_read_db),
     _: dict = Depends(get_current_user)
 ):
     """
     Get album by ID (Authenticated users only)
+
+    `include=tracks` embeds the ordered tracklist. The artist is always
+    embedded, so `include=artist` is accepted as a no-op. The album is loaded
+    in at most two queries (album with artist, then tracks).
+
+    Returns `304 Not Modified` when `If-None-Match` matches the album's ETag.
     """
-    album = db.query(Album).filter(Album.id == album_id).first()
-    if album is None:
+    with_tracks = parse_album_includes(include)
+    cache_key = album_cache_key(album_id, with_tracks)
+    cached = album_cache.get(cache_key)
+    if cached is None:
+        if request.headers.get("if-none-match"):
+            versions = db.execute(album_versions_query(album_id)).first()
+            response = album_not_modified(request, album_id, versions, with_tracks)
+            if response is not None:
+                return response
+
+        epoch = album_cache.epoch
+        album = db.execute(album_query(album_id, with_tracks)).scalars().first()
+        cached = album_cache_entry(album, with_tracks)
+        if reads_primary(db):
+            album_cache.set(cache_key, cached, epoch)
+
+    return etag_response(request, *cached)
+
+@router.get("/{album_id}/tracks", response_model=List[TrackResponse])
+def get_album_tracks(
+    album_id: int,
+    db: Session = Depends(get_read_db),
+    _: dict = Depends(get_current_user)
+):
+    """
+    Get the ordered tracklist of an album (Authenticated users only)
+    """
+    if db.execute(album_exists_query(album_id)).first() is None:
         raise HTTPException(status_code=404, detail="Album not found")
-    return Response(content=AlbumResponse.model_validate(album).model_dump_json(), media_type="application/json")
+    return db.execute(album_tracks_query(album_id)).scalars().all()
 
 @router.put("/{album_id}", response_model=AlbumResponse, responses={200: {"content": {"application/json": {}}}})
 def update_album(
@@ -117,6 +294,8 @@ def update_album(
         setattr(db_album, key, value)
     
     db.commit()
+    invalidate_albums(album_id)
+    leaderboards.mark_dirty(album_id)
     db.refresh(db_album)
     return Response(content=AlbumResponse.model_validate(db_album).model_dump_json(), media_type="application/json")
 
@@ -135,4 +314,6 @@ def delete_album(
     
     db.delete(db_album)
     db.commit()
+    invalidate_albums(album_id)
+    leaderboards.mark_dirty(album_id)
     return None
@@ -1,17 +1,64 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from sqlalchemy import Select, select
 from sqlalchemy.orm import Session
 
-from ..models.database import get_db
-from ..models.models import Artist
+from ..models.database import get_db, get_read_db, reads_primary
+from ..models.models import Album, Artist
 from ..schemas.schemas import ArtistCreate, ArtistResponse
+from ..utils.cache import artist_cache, invalidate_albums
+from ..utils.etag import etag_matches, etag_response, make_etag, not_modified
+from ..utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, paginate
 from ..utils.security import get_current_admin_user, get_current_user
+from ..utils.streaming import stream_query, streaming_media_type
 
 router = APIRouter(
     prefix="/artists",
     tags=["artists"]
 )
 
+# Query and response helpers shared with the async catalog router (catalog_async)
+
+def artist_version_query(artist_id: int) -> Select:
+    """SELECT of the artist version the artist ETag is built from."""
+    return select(Artist.version).where(Artist.id == artist_id)
+
+def artist_not_modified(request: Request, artist_id: int, version: Optional[int]) -> Optional[Response]:
+    """
+    Answer a conditional request from the artist version alone.
+
+    Returns:
+        304 response if If-None-Match matches, otherwise None
+
+    Raises:
+        HTTPException: If the artist does not exist
+    """
+    if version is None:
+        raise HTTPException(status_code=404, detail="Artist not found")
+    etag = make_etag("artist", artist_id, version)
+    return not_modified(etag) if etag_matches(request, etag) else None
+
+def artist_cache_entry(artist: Optional[Artist]) -> Tuple[str, str]:
+    """
+    Serialize an artist for artist_cache.
+
+    Returns:
+        JSON body and ETag
+
+    Raises:
+        HTTPException: If the artist does not exist
+    """
+    if artist is None:
+        raise HTTPException(status_code=404, detail="Artist not found")
+    return ArtistResponse.model_validate(artist).model_dump_json(), make_etag("artist", artist.id, artist.version)
+
+def invalidate_artist_cache(db: Session, artist_id: int) -> None:
+    """Drop cached responses of an artist and of the albums that embed it."""
+    artist_cache.invalidate(artist_id)
+    album_ids = [album_id for (album_id,) in db.query(Album.id).filter(Album.artist_id == artist_id)]
+    if album_ids:
+        invalidate_albums(*album_ids)
+
 @router.post("/", response_model=ArtistResponse, status_code=status.HTTP_201_CREATED, responses={201: {"content": {"application/json": {}}}})
 def create_artist(
     artist: ArtistCreate,
@@ -29,30 +76,56 @@ def create_artist(
 
 @router.get("/", response_model=List[ArtistResponse], responses={200: {"content": {"application/json": {}}}})
 def get_artists(
+    request: Request,
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    db: Session = Depends(get_read_db),
     _: dict = Depends(get_current_user)
 ):
     """
     Get all artists with pagination (Authenticated users only)
+
+    The `X-Next-Cursor` response header holds the cursor for the next page.
+    With `Accept: application/x-ndjson` or `stream=true` all artists are
+    streamed instead and the pagination parameters are ignored.
     """
-    artists = db.query(Artist).offset(skip).limit(limit).all()
-    return Response(content=[ArtistResponse.model_validate(artist).model_dump_json() for artist in artists], media_type="application/json")
+    media_type = streaming_media_type(request, stream)
+    if media_type:
+        return stream_query(db.query(Artist).order_by(Artist.id), ArtistResponse, media_type)
+
+    artists, next_cursor = paginate(db.query(Artist), (Artist.id,), False, limit, cursor, skip)
+    content = "[" + ",".join(ArtistResponse.model_validate(artist).model_dump_json() for artist in artists) + "]"
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=content, media_type="application/json", headers=headers)
 
 @router.get("/{artist_id}", response_model=ArtistResponse, responses={200: {"content": {"application/json": {}}}})
 def get_artist(
     artist_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     _: dict = Depends(get_current_user)
 ):
     """
     Get artist by ID (Authenticated users only)
+
+    Returns `304 Not Modified` when `If-None-Match` matches the artist's ETag.
     """
-    artist = db.query(Artist).filter(Artist.id == artist_id).first()
-    if artist is None:
-        raise HTTPException(status_code=404, detail="Artist not found")
-    return Response(content=ArtistResponse.model_validate(artist).model_dump_json(), media_type="application/json")
+    cached = artist_cache.get(artist_id)
+    if cached is None:
+        if request.headers.get("if-none-match"):
+            version = db.execute(artist_version_query(artist_id)).scalar()
+            response = artist_not_modified(request, artist_id, version)
+            if response is not None:
+                return response
+
+        epoch = artist_cache.epoch
+        cached = artist_cache_entry(db.get(Artist, artist_id))
+        if reads_primary(db):
+            artist_cache.set(artist_id, cached, epoch)
+
+    return etag_response(request, *cached)
 
 @router.put("/{artist_id}", response_model=ArtistResponse, responses={200: {"content": {"application/json": {}}}})
 def update_artist(
@@ -72,6 +145,7 @@ def update_artist(
         setattr(db_artist, key, value)
     
     db.commit()
+    invalidate_artist_cache(db, artist_id)
     db.refresh(db_artist)
     return Response(content=ArtistResponse.model_validate(db_artist).model_dump_json(), media_type="application/json")
 
@@ -90,4 +164,5 @@ def delete_artist(
     
     db.delete(db_artist)
     db.commit()
+    invalidate_artist_cache(db, artist_id)
     return None
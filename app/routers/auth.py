@@ -1,19 +1,23 @@
-from datetime import timedelta
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from ..models.database import get_db
 from ..models.models import User
-from ..schemas.schemas import UserCreate, UserResponse, Token
+from ..schemas.schemas import UserCreate, UserResponse, Token, UserPrincipal
+from ..utils.cache import invalidate_user
+from ..utils.password_hasher import HasherBusyError, password_hasher
 from ..utils.security import (
-    verify_password,
-    create_access_token,
-    get_password_hash,
-    get_current_admin_user
+    create_user_token,
+    get_current_admin_user,
+    inactive_user_exception
 )
-from ..core.config import settings
 
 router = APIRouter(tags=["authentication"])
 
@@ -21,59 +25,127 @@ router = APIRouter(tags=["authentication"])
 class UserRightsUpdate(BaseModel):
     is_admin: bool
 
+# Схема для блокировки/разблокировки пользователя
+class UserStatusUpdate(BaseModel):
+    is_active: bool
+
+def hasher_busy() -> HTTPException:
+    """503 response for requests rejected by the password hashing pool."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is temporarily overloaded, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+def find_registered(db: Session, user: UserCreate) -> bool:
+    """Whether the email or username is already taken."""
+    return db.query(User.id).filter(
+        (User.email == user.email) | (User.username == user.username)
+    ).first() is not None
+
+def create_registered_user(db: Session, user: UserCreate, hashed_password: str) -> User:
+    """
+    Store a new user; the first registered user becomes an admin.
+    
+    The admin flag is decided after the INSERT, once no other registration
+    can commit in between: SQLite holds the write lock from the INSERT until
+    commit, PostgreSQL gets an explicit table lock while the table is empty.
+    """
+    # Пока пользователей нет, одновременные регистрации не должны обе стать админами
+    maybe_first = db.query(User.id).first() is None
+    if maybe_first and db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE users IN SHARE ROW EXCLUSIVE MODE"))
+    db_user = User(
+        email=user.email,
+        username=user.username,
+        hashed_password=hashed_password,
+        is_active=True,
+        is_admin=False
+    )
+    db.add(db_user)
+    try:
+        db.flush()
+        if maybe_first:
+            # Первый пользователь становится админом
+            db_user.is_admin = db.query(User.id).filter(User.id != db_user.id).first() is None
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Email or username already registered"
+        )
+    db.refresh(db_user)
+    return db_user
+
 @router.post("/register", response_model=UserResponse, responses={200: {"content": {"application/json": {}}}})
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: Session = Depends(get_db)):
     """
     Register a new user.
     First registered user automatically becomes an admin.
+    
+    The password is hashed on the dedicated password hashing pool; database
+    work runs on the threadpool so the event loop is never blocked.
     """
     # Check if user already exists
-    db_user = db.query(User).filter(
-        (User.email == user.email) | (User.username == user.username)
-    ).first()
-    if db_user:
+    if await run_in_threadpool(find_registered, db, user):
         raise HTTPException(
             status_code=400,
             detail="Email or username already registered"
         )
     
-    # Check if this is the first user
-    is_first_user = db.query(User).first() is None
-    
     # Create new user
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        email=user.email,
-        username=user.username,
-        hashed_password=hashed_password,
-        is_active=True,
-        is_admin=is_first_user  # Первый пользователь становится админом
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    try:
+        hashed_password = await password_hasher.hash(user.password)
+    except HasherBusyError:
+        raise hasher_busy()
+    db_user = await run_in_threadpool(create_registered_user, db, user, hashed_password)
     return Response(content=UserResponse.model_validate(db_user).json(), media_type="application/json")
 
+def find_login_user(db: Session, username: str) -> Optional[User]:
+    """Load the user logging in."""
+    return db.query(User).filter(User.username == username).first()
+
+def store_password_hash(db: Session, user: User, new_hash: str) -> None:
+    """Replace a hash made with a different BCRYPT_ROUNDS."""
+    user.hashed_password = new_hash
+    db.commit()
+    db.refresh(user)
+
 @router.post("/token", response_model=Token, responses={200: {"content": {"application/json": {}}}})
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """
     OAuth2 compatible token login, get an access token for future requests.
+    
+    The password is verified on the dedicated password hashing pool; hashes
+    made with a different BCRYPT_ROUNDS are transparently replaced.
+    Database work runs on the threadpool so the event loop is never blocked.
+    Deactivated users get `403 Inactive user`.
     """
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await run_in_threadpool(find_login_user, db, form_data.username)
+    valid = False
+    if user:
+        try:
+            valid, new_hash = await password_hasher.verify(form_data.password, user.hashed_password)
+        except HasherBusyError:
+            raise hasher_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if not user.is_active:
+        raise inactive_user_exception()
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
+    # Стоимость bcrypt изменилась — сохраняем новый хеш
+    if new_hash is not None:
+        await run_in_threadpool(store_password_hash, db, user, new_hash)
+    
+    access_token = create_user_token(user)
     return Response(content=Token(access_token=access_token, token_type="bearer").json(), media_type="application/json")
 
 @router.patch("/users/{username}/rights", response_model=UserResponse, responses={200: {"content": {"application/json": {}}}})
@@ -81,7 +153,7 @@ def update_user_rights(
     username: str,
     rights: UserRightsUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: UserPrincipal = Depends(get_current_admin_user)
 ):
     """
     Update user rights (Admin only)
@@ -101,8 +173,41 @@ def update_user_rights(
             detail="User not found"
         )
     
-    # Обновляем права
+    # Обновляем права; выданные пользователю токены с правами в claims отзываются
     user.is_admin = rights.is_admin
+    user.token_version = (user.token_version or 0) + 1
+    db.commit()
+    invalidate_user(username, user.id)
+    db.refresh(user)
+    return Response(content=UserResponse.model_validate(user).json(), media_type="application/json")
+
+@router.patch("/users/{username}/status", response_model=UserResponse, responses={200: {"content": {"application/json": {}}}})
+def update_user_status(
+    username: str,
+    status_update: UserStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """
+    Activate or deactivate a user (Admin only)
+    """
+    # Проверяем, что администратор не блокирует сам себя
+    if current_user.username == username:
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot change your own status"
+        )
+    
+    user = db.query(User).filter(User.username == username).first()
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="User not found"
+        )
+    
+    user.is_active = status_update.is_active
+    user.token_version = (user.token_version or 0) + 1
     db.commit()
+    invalidate_user(username, user.id)
     db.refresh(user)
     return Response(content=UserResponse.model_validate(user).json(), media_type="application/json")
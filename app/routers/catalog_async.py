@@ -0,0 +1,147 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.database import get_async_read_db, reads_primary
+from ..models.models import Artist, Discount, Rating
+from ..schemas.schemas import AlbumDetailResponse, ArtistResponse, DiscountResponse, RatingResponse, TrackResponse
+from ..utils.cache import album_cache, artist_cache
+from ..utils.etag import etag_response
+from ..utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, paginate_async
+from ..utils.security import get_current_user_async
+from .albums import (
+    album_cache_entry, album_cache_key, album_exists_query, album_not_modified, album_query,
+    album_tracks_query, album_versions_query, parse_album_includes
+)
+from .artists import artist_cache_entry, artist_not_modified, artist_version_query
+from .promotions import active_discount_filter, found_discount
+from .ratings import REVIEW_SORT_KEYS, review_page_response
+
+# Async versions of the read-heavy catalog endpoints, mounted ahead of the
+# sync routers when DATABASE_BACKEND=async so they serve the same paths.
+# Queries, validation and responses come from the sync routers; only the
+# database calls differ
+router = APIRouter()
+
+@router.get("/albums/{album_id}", response_model=AlbumDetailResponse, tags=["albums"], responses={200: {"content": {"application/json": {}}}})
+async def get_album(
+    album_id: int,
+    request: Request,
+    include: Optional[str] = Query(None, description="Comma-separated relations to embed: tracks, artist"),
+    db: AsyncSession = Depends(get_async_read_db),
+    _: dict = Depends(get_current_user_async)
+):
+    """
+    Get album by ID (Authenticated users only)
+
+    Same contract, cache and ETag handling as the sync endpoint.
+    """
+    with_tracks = parse_album_includes(include)
+    cache_key = album_cache_key(album_id, with_tracks)
+    cached = album_cache.get(cache_key)
+    if cached is None:
+        if request.headers.get("if-none-match"):
+            versions = (await db.execute(album_versions_query(album_id))).first()
+            response = album_not_modified(request, album_id, versions, with_tracks)
+            if response is not None:
+                return response
+
+        epoch = album_cache.epoch
+        album = (await db.execute(album_query(album_id, with_tracks))).scalars().first()
+        cached = album_cache_entry(album, with_tracks)
+        if reads_primary(db):
+            album_cache.set(cache_key, cached, epoch)
+
+    return etag_response(request, *cached)
+
+@router.get("/albums/{album_id}/tracks", response_model=List[TrackResponse], tags=["albums"])
+async def get_album_tracks(
+    album_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    _: dict = Depends(get_current_user_async)
+):
+    """
+    Get the ordered tracklist of an album (Authenticated users only)
+    """
+    if (await db.execute(album_exists_query(album_id))).first() is None:
+        raise HTTPException(status_code=404, detail="Album not found")
+    return (await db.execute(album_tracks_query(album_id))).scalars().all()
+
+@router.get("/artists/{artist_id}", response_model=ArtistResponse, tags=["artists"], responses={200: {"content": {"application/json": {}}}})
+async def get_artist(
+    artist_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    _: dict = Depends(get_current_user_async)
+):
+    """
+    Get artist by ID (Authenticated users only)
+
+    Returns `304 Not Modified` when `If-None-Match` matches the artist's ETag.
+    """
+    cached = artist_cache.get(artist_id)
+    if cached is None:
+        if request.headers.get("if-none-match"):
+            version = (await db.execute(artist_version_query(artist_id))).scalar()
+            response = artist_not_modified(request, artist_id, version)
+            if response is not None:
+                return response
+
+        epoch = artist_cache.epoch
+        cached = artist_cache_entry(await db.get(Artist, artist_id))
+        if reads_primary(db):
+            artist_cache.set(artist_id, cached, epoch)
+
+    return etag_response(request, *cached)
+
+@router.get("/ratings/albums/{album_id}", response_model=List[RatingResponse], tags=["ratings"], responses={200: {"content": {"application/json": {}}}})
+async def get_album_ratings(
+    album_id: int,
+    sort_by: str = Query("most_helpful", enum=list(REVIEW_SORT_KEYS)),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get album reviews page by page.
+
+    Same sorting and `X-Next-Cursor` pagination as the sync endpoint.
+    """
+    if (await db.execute(album_exists_query(album_id))).first() is None:
+        raise HTTPException(status_code=404, detail="Album not found")
+
+    statement = select(Rating).where(Rating.album_id == album_id)
+    ratings, next_cursor = await paginate_async(db, statement, REVIEW_SORT_KEYS[sort_by], True, limit, cursor)
+    return review_page_response(ratings, next_cursor)
+
+@router.get("/promotions/discounts/", response_model=List[DiscountResponse], tags=["promotions"])
+async def get_discounts(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    active_only: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
+    _: dict = Depends(get_current_user_async)
+):
+    """Get all discounts with optional filtering for active ones.
+
+    The `X-Next-Cursor` response header holds the cursor for the next page.
+    """
+    statement = select(Discount)
+    if active_only:
+        statement = statement.where(active_discount_filter())
+    discounts, next_cursor = await paginate_async(db, statement, (Discount.id,), False, limit, cursor, skip)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return discounts
+
+@router.get("/promotions/discounts/{discount_id}", response_model=DiscountResponse, tags=["promotions"])
+async def get_discount(
+    discount_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    _: dict = Depends(get_current_user_async)
+):
+    """Get discount by ID"""
+    return found_discount(await db.get(Discount, discount_id))
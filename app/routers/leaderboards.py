@@ -0,0 +1,80 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, joinedload
+
+from ..models.database import get_db
+from ..models.models import Album
+from ..schemas.schemas import AlbumResponse, LeaderboardEntry
+from ..services.leaderboard_service import leaderboards
+from ..utils.security import get_current_user
+
+router = APIRouter(
+    prefix="/leaderboards",
+    tags=["leaderboards"]
+)
+
+def get_leaderboard(
+    db: Session,
+    kind: str,
+    genre: Optional[str],
+    decade: Optional[int],
+    offset: int,
+    limit: int
+) -> List[LeaderboardEntry]:
+    if genre is not None and decade is not None:
+        raise HTTPException(status_code=400, detail="Pass either genre or decade, not both")
+    if decade is not None and decade % 10:
+        raise HTTPException(status_code=400, detail="Decade must be the first year of a decade, e.g. 1970")
+
+    board = leaderboards.get_board(db, kind, genre, decade, offset, limit)
+    if not board:
+        return []
+    albums = {
+        album.id: album
+        for album in db.query(Album).options(joinedload(Album.artist))
+        .filter(Album.id.in_([album_id for _, album_id, _ in board]))
+    }
+    return [
+        LeaderboardEntry(
+            rank=rank,
+            score=round(score, 4),
+            weighted_rating=albums[album_id].weighted_rating,
+            rating_count=albums[album_id].rating_count,
+            album=AlbumResponse.model_validate(albums[album_id])
+        )
+        for rank, album_id, score in board
+        if album_id in albums
+    ]
+
+@router.get("/top-rated", response_model=List[LeaderboardEntry])
+def get_top_rated(
+    genre: Optional[str] = None,
+    decade: Optional[int] = Query(None, description="First year of the decade, e.g. 1970"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """
+    Top-rated albums overall, by genre or by release decade (Authenticated users only)
+
+    Albums are ranked by a Bayesian average of their weighted rating that pulls
+    albums with few ratings towards the catalog mean; albums with fewer than
+    `LEADERBOARD_MIN_RATINGS` ratings are not ranked. The ranking is precomputed
+    in memory and updated as ratings change.
+    """
+    return get_leaderboard(db, leaderboards.TOP_RATED, genre, decade, offset, limit)
+
+@router.get("/most-reviewed", response_model=List[LeaderboardEntry])
+def get_most_reviewed(
+    genre: Optional[str] = None,
+    decade: Optional[int] = Query(None, description="First year of the decade, e.g. 1970"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """
+    Albums with the most ratings overall, by genre or by release decade (Authenticated users only)
+    """
+    return get_leaderboard(db, leaderboards.MOST_REVIEWED, genre, decade, offset, limit)
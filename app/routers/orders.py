@@ -0,0 +1,87 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy.orm import Session, selectinload
+
+from ..models.database import get_db
+from ..models.models import Order
+from ..schemas.schemas import OrderCreate, OrderResponse, OrderStatusUpdate, UserPrincipal
+from ..services.order_service import CheckoutError, OrderService
+from ..services.purchase_service import PurchaseService
+from ..utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, paginate
+from ..utils.security import get_current_admin_user, get_current_user
+
+router = APIRouter(
+    prefix="/orders",
+    tags=["orders"]
+)
+
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+def create_order(
+    order: OrderCreate,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """
+    Checkout: create an order from the cart, applying promo code,
+    loyalty points and gift card in a single transaction
+    """
+    try:
+        return OrderService.checkout(db, current_user.id, order)
+    except CheckoutError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/", response_model=List[OrderResponse])
+def get_orders(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """
+    Get orders of the current user, newest first.
+
+    The `X-Next-Cursor` response header holds the cursor for the next page.
+    """
+    query = db.query(Order).options(selectinload(Order.items)).filter(Order.user_id == current_user.id)
+    orders, next_cursor = paginate(query, (Order.id,), True, limit, cursor, skip)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return orders
+
+@router.get("/{order_id}", response_model=OrderResponse)
+def get_order(
+    order_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """
+    Get order by ID (owner or admin)
+    """
+    order = db.query(Order).options(selectinload(Order.items)).filter(Order.id == order_id).first()
+    if not order or (order.user_id != current_user.id and not current_user.is_admin):
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+@router.put("/{order_id}/status", response_model=OrderResponse)
+def update_order_status(
+    order_id: int,
+    status_update: OrderStatusUpdate,
+    db: Session = Depends(get_db),
+    _: dict = Depends(get_current_admin_user)
+):
+    """
+    Update order status (Admin only)
+    """
+    order = db.query(Order).filter(Order.id == order_id).first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    
+    # Completed orders feed the purchase index used to verify ratings
+    if status_update.status == PurchaseService.COMPLETED_STATUS and order.status != status_update.status:
+        PurchaseService.record_order(db, order)
+    order.status = status_update.status
+    db.commit()
+    db.refresh(order)
+    return order
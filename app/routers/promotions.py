@@ -1,23 +1,26 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, func
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-import secrets
 
-from ..models.database import get_db
+from ..models.database import get_db, get_read_db
 from ..models.models import (
-    Discount, PromoCode, PromoCodeUsage, GiftCard, 
+    Discount, PromoCode, GiftCard, 
     GiftCardTransaction, LoyaltyTier, UserLoyalty, 
-    LoyaltyPointTransaction, User, Order
+    LoyaltyPointTransaction, Order
 )
 from ..schemas.schemas import (
     DiscountCreate, DiscountResponse,
-    PromoCodeCreate, PromoCodeResponse,
-    GiftCardCreate, GiftCardResponse,
+    PromoCodeCreate, PromoCodeResponse, PromoCodeBatchCreate,
+    GiftCardCreate, GiftCardResponse, GiftCardBatchCreate,
     LoyaltyTierCreate, LoyaltyTierResponse,
-    UserLoyaltyResponse
+    UserLoyaltyResponse, UserPrincipal
 )
+from ..services.campaign_service import CampaignService
+from ..services.promo_service import PromoCodeError, PromoCodeService
+from ..utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, paginate
 from ..utils.security import get_current_admin_user, get_current_user
 
 router = APIRouter(
@@ -25,6 +28,23 @@ router = APIRouter(
     tags=["promotions"]
 )
 
+# Helpers shared with the async catalog router (catalog_async)
+
+def active_discount_filter():
+    """WHERE clause selecting discounts that are enabled and running now."""
+    now = datetime.utcnow()
+    return and_(
+        Discount.is_active == True,
+        Discount.start_date <= now,
+        Discount.end_date > now
+    )
+
+def found_discount(discount: Optional[Discount]) -> Discount:
+    """Return the discount or raise 404 if it does not exist."""
+    if not discount:
+        raise HTTPException(status_code=404, detail="Discount not found")
+    return discount
+
 # Discount endpoints
 @router.post("/discounts/", response_model=DiscountResponse)
 def create_discount(
@@ -47,34 +67,34 @@ def create_discount(
 
 @router.get("/discounts/", response_model=List[DiscountResponse])
 def get_discounts(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     active_only: bool = False,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: dict = Depends(get_current_user)
 ):
-    """Get all discounts with optional filtering for active ones"""
+    """Get all discounts with optional filtering for active ones.
+
+    The `X-Next-Cursor` response header holds the cursor for the next page.
+    """
     query = db.query(Discount)
     if active_only:
-        now = datetime.utcnow()
-        query = query.filter(
-            Discount.is_active == True,
-            Discount.start_date <= now,
-            Discount.end_date > now
-        )
-    return query.offset(skip).limit(limit).all()
+        query = query.filter(active_discount_filter())
+    discounts, next_cursor = paginate(query, (Discount.id,), False, limit, cursor, skip)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return discounts
 
 @router.get("/discounts/{discount_id}", response_model=DiscountResponse)
 def get_discount(
     discount_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: dict = Depends(get_current_user)
 ):
     """Get discount by ID"""
-    discount = db.query(Discount).filter(Discount.id == discount_id).first()
-    if not discount:
-        raise HTTPException(status_code=404, detail="Discount not found")
-    return discount
+    return found_discount(db.get(Discount, discount_id))
 
 @router.put("/discounts/{discount_id}", response_model=DiscountResponse)
 def update_discount(
@@ -144,57 +164,91 @@ def create_promo_code(
     db.refresh(db_promo)
     return db_promo
 
+@router.post("/promo-codes/batch", response_class=StreamingResponse)
+def create_promo_codes_batch(
+    batch: PromoCodeBatchCreate,
+    db: Session = Depends(get_db),
+    _: dict = Depends(get_current_admin_user)
+):
+    """Issue a campaign of promo codes with shared settings (Admin only).
+
+    Codes are generated in memory, checked for uniqueness with one query per
+    chunk and bulk inserted in a single transaction. The created codes are
+    streamed back as CSV.
+    """
+    if batch.end_date <= batch.start_date:
+        raise HTTPException(
+            status_code=400,
+            detail="End date must be after start date"
+        )
+
+    codes = CampaignService.create_promo_codes(db, batch)
+    return StreamingResponse(
+        CampaignService.to_csv(["code"], ([code] for code in codes)),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="promo-codes.csv"'}
+    )
+
+@router.get("/promo-codes/{code}", response_model=PromoCodeResponse)
+def get_promo_code(
+    code: str,
+    db: Session = Depends(get_read_db),
+    _: dict = Depends(get_current_admin_user)
+):
+    """Get promo code with its total number of uses (Admin only)"""
+    promo = db.query(PromoCode).filter(PromoCode.code == code.upper()).first()
+    if not promo:
+        raise HTTPException(status_code=404, detail="Promo code not found")
+
+    response = PromoCodeResponse.model_validate(promo)
+    response.uses_count = PromoCodeService.get_uses_count(db, promo)
+    return response
+
 @router.post("/promo-codes/{code}/validate")
 def validate_promo_code(
     code: str,
     order_amount: float,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Validate a promo code for the current user and order amount"""
-    promo = db.query(PromoCode).filter(PromoCode.code == code.upper()).first()
-    if not promo:
-        raise HTTPException(status_code=404, detail="Promo code not found")
-    
-    now = datetime.utcnow()
-    
-    # Проверки валидности
-    if not promo.is_active:
-        raise HTTPException(status_code=400, detail="Promo code is not active")
-    
-    if now < promo.start_date or now > promo.end_date:
-        raise HTTPException(status_code=400, detail="Promo code is not valid at this time")
-    
-    if promo.minimum_order_amount > order_amount:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Order amount must be at least {promo.minimum_order_amount}"
-        )
-    
-    if promo.max_uses and promo.uses_count >= promo.max_uses:
-        raise HTTPException(status_code=400, detail="Promo code has reached maximum uses")
-    
-    if promo.is_single_use:
-        # Проверка использования данным пользователем
-        usage = db.query(PromoCodeUsage).filter(
-            PromoCodeUsage.promo_code_id == promo.id,
-            PromoCodeUsage.user_id == current_user.id
-        ).first()
-        if usage:
-            raise HTTPException(status_code=400, detail="You have already used this promo code")
-    
-    # Расчет скидки
-    discount_amount = promo.discount_amount
-    if promo.discount_percent:
-        percent_discount = order_amount * (promo.discount_percent / 100)
-        discount_amount = max(discount_amount, percent_discount)
-    
+    try:
+        promo = PromoCodeService.get_valid(db, code, current_user.id, order_amount)
+    except PromoCodeError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
     return {
         "valid": True,
-        "discount_amount": discount_amount,
+        "discount_amount": PromoCodeService.calculate_discount(promo, order_amount),
         "message": "Promo code is valid"
     }
 
+@router.post("/promo-codes/{code}/redeem")
+def redeem_promo_code(
+    code: str,
+    order_amount: float,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Redeem a promo code for the current user outside of checkout.
+
+    The usage is counted atomically: concurrent redemptions never exceed
+    `max_uses` and a single-use code is redeemed at most once per user.
+    """
+    try:
+        promo = PromoCodeService.get_valid(db, code, current_user.id, order_amount)
+        PromoCodeService.redeem(db, promo, current_user.id)
+        db.commit()
+    except PromoCodeError as e:
+        db.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    return {
+        "redeemed": True,
+        "discount_amount": PromoCodeService.calculate_discount(promo, order_amount),
+        "message": "Promo code redeemed"
+    }
+
 # Gift card endpoints
 @router.post("/gift-cards/", response_model=GiftCardResponse)
 def create_gift_card(
@@ -204,11 +258,7 @@ def create_gift_card(
 ):
     """Create a new gift card (Admin only)"""
     # Генерация уникального кода
-    while True:
-        code = ''.join(secrets.choice('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(16))
-        existing = db.query(GiftCard).filter(GiftCard.code == code).first()
-        if not existing:
-            break
+    [code] = next(CampaignService.generate_codes(db, GiftCard, 1, CampaignService.GIFT_CARD_CODE_LENGTH))
     
     db_card = GiftCard(
         code=code,
@@ -222,10 +272,31 @@ def create_gift_card(
     db.refresh(db_card)
     return db_card
 
+@router.post("/gift-cards/batch", response_class=StreamingResponse)
+def create_gift_cards_batch(
+    batch: GiftCardBatchCreate,
+    db: Session = Depends(get_db),
+    _: dict = Depends(get_current_admin_user)
+):
+    """Issue a batch of gift cards with the same balance (Admin only).
+
+    The created cards are streamed back as CSV.
+    """
+    codes = CampaignService.create_gift_cards(db, batch)
+    expiry_date = batch.expiry_date.isoformat()
+    return StreamingResponse(
+        CampaignService.to_csv(
+            ["code", "initial_balance", "expiry_date"],
+            ([code, batch.initial_balance, expiry_date] for code in codes)
+        ),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="gift-cards.csv"'}
+    )
+
 @router.get("/gift-cards/{code}/balance")
 def check_gift_card_balance(
     code: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: dict = Depends(get_current_user)
 ):
     """Check gift card balance"""
@@ -262,8 +333,8 @@ def create_loyalty_tier(
 @router.get("/loyalty/users/{user_id}", response_model=UserLoyaltyResponse)
 def get_user_loyalty(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Get user loyalty information"""
     # Проверка прав доступа
@@ -327,7 +398,7 @@ def add_loyalty_points(
 def redeem_loyalty_points(
     points_to_redeem: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Redeem loyalty points for a discount"""
     loyalty = db.query(UserLoyalty).filter(UserLoyalty.user_id == current_user.id).first()
@@ -1,12 +1,16 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from ..models.database import get_db
+from ..models.database import get_db, get_read_db
 from ..models.models import Rating, User, Album
 from ..schemas.schemas import RatingCreate, RatingUpdate, RatingResponse, RatingVote
-from ..schemas.schemas import AlbumRatingStats, UserRatingStats
+from ..schemas.schemas import AlbumRatingStats, UserRatingStats, UserPrincipal
+from ..services.purchase_service import PurchaseService
 from ..services.rating_service import RatingService
+from ..services.vote_buffer import vote_buffer
+from .albums import album_exists_query
 from ..dependencies import get_current_user
+from ..utils.pagination import NEXT_CURSOR_HEADER, paginate
 
 router = APIRouter(
     prefix="/ratings",
@@ -14,11 +18,34 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# Колонки ключа сортировки (id для однозначности) для каждого режима списка отзывов;
+# все режимы идут по убыванию и покрываются индексами ratings по album_id
+REVIEW_SORT_KEYS = {
+    "most_helpful": (Rating.quality_score, Rating.id),
+    "newest": (Rating.created_at, Rating.id),
+    "verified_first": (Rating.is_verified_purchase, Rating.quality_score, Rating.id),
+}
+
+def review_page_response(ratings: List[Rating], next_cursor: Optional[str]) -> Response:
+    """
+    Собирает ответ со страницей отзывов; используется и асинхронным роутером каталога.
+    
+    Args:
+        ratings: отзывы страницы
+        next_cursor: курсор следующей страницы или None
+        
+    Returns:
+        Response: JSON-массив отзывов с заголовком X-Next-Cursor
+    """
+    content = "[" + ",".join(RatingResponse.model_validate(r).model_dump_json() for r in ratings) + "]"
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=content, media_type="application/json", headers=headers)
+
 @router.post("/", response_model=RatingResponse)
 def create_rating(
     rating: RatingCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Создает новый рейтинг для альбома."""
     # Проверяем существование альбома
@@ -38,13 +65,8 @@ def create_rating(
             detail="You have already rated this album"
         )
         
-    # Проверяем, покупал ли пользователь альбом
-    is_verified = db.query(Album)\
-        .join(Album.orders)\
-        .filter(
-            Album.id == rating.album_id,
-            Album.orders.any(user_id=current_user.id)
-        ).first() is not None
+    # Проверяем, покупал ли пользователь альбом (поиск по индексу покупок)
+    is_verified = PurchaseService.has_purchased(db, current_user.id, rating.album_id)
         
     # Создаем рейтинг
     db_rating = Rating(
@@ -56,12 +78,13 @@ def create_rating(
     )
     
     db.add(db_rating)
+    
+    # Обновляем агрегаты рейтинга альбома в той же транзакции
+    RatingService.record_rating_change(db, db_rating)
     db.commit()
+    RatingService.album_ratings_changed(rating.album_id)
     db.refresh(db_rating)
     
-    # Обновляем рейтинг альбома
-    RatingService.update_album_rating(db, rating.album_id)
-    
     return db_rating
 
 @router.put("/{rating_id}", response_model=RatingResponse)
@@ -69,7 +92,7 @@ def update_rating(
     rating_id: int,
     rating: RatingUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Обновляет существующий рейтинг."""
     db_rating = db.query(Rating).filter(Rating.id == rating_id).first()
@@ -79,55 +102,72 @@ def update_rating(
     if db_rating.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not your rating")
         
-    db_rating.score = rating.score
+    old_state = RatingService.rating_state(db_rating)
+    if rating.score is not None:
+        db_rating.score = rating.score
     db_rating.review_text_length = len(rating.review_text) if rating.review_text else 0
     
+    # Обновляем агрегаты рейтинга альбома в той же транзакции
+    RatingService.record_rating_change(db, db_rating, old_state)
     db.commit()
+    RatingService.album_ratings_changed(db_rating.album_id)
     db.refresh(db_rating)
     
-    # Обновляем рейтинг альбома
-    RatingService.update_album_rating(db, db_rating.album_id)
-    
     return db_rating
 
-@router.post("/{rating_id}/vote")
+@router.post("/{rating_id}/vote", status_code=status.HTTP_202_ACCEPTED)
 def vote_for_rating(
     rating_id: int,
     vote: RatingVote,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    """Голосует за полезность рейтинга."""
-    db_rating = db.query(Rating).filter(Rating.id == rating_id).first()
-    if not db_rating:
+    """
+    Голосует за полезность рейтинга.
+    
+    Голос попадает в буфер и записывается в БД пачкой вместе с другими
+    голосами; повторный голос пользователя за тот же отзыв отбрасывается
+    уникальным индексом при записи.
+    """
+    if db.query(Rating.id).filter(Rating.id == rating_id).first() is None:
         raise HTTPException(status_code=404, detail="Rating not found")
         
-    # Проверяем, не голосовал ли пользователь уже
-    existing_vote = db.query(Rating).filter(
-        Rating.id == rating_id,
-        Rating.votes.any(user_id=current_user.id)
-    ).first()
-    
-    if existing_vote:
+    if not vote_buffer.add(rating_id, current_user.id, vote.is_helpful):
         raise HTTPException(
             status_code=400,
             detail="You have already voted for this rating"
         )
-        
-    # Обновляем счетчики
-    if vote.is_helpful:
-        db_rating.helpful_votes += 1
-    else:
-        db_rating.unhelpful_votes += 1
-        
-    db.commit()
     
-    return {"status": "success"}
+    return {"status": "accepted"}
+
+@router.get("/albums/{album_id}", response_model=List[RatingResponse], responses={200: {"content": {"application/json": {}}}})
+def get_album_ratings(
+    album_id: int,
+    sort_by: str = Query("most_helpful", enum=list(REVIEW_SORT_KEYS)),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Получает отзывы альбома постранично.
+    
+    Сортировка most_helpful идет по сохраненному quality_score, newest — по
+    дате создания, verified_first — сначала подтвержденные покупки, затем по
+    quality_score. Если есть следующая страница, заголовок X-Next-Cursor
+    содержит курсор для параметра cursor; страница по курсору читается по
+    индексу за постоянное время независимо от ее номера.
+    """
+    if db.execute(album_exists_query(album_id)).first() is None:
+        raise HTTPException(status_code=404, detail="Album not found")
+        
+    query = db.query(Rating).filter(Rating.album_id == album_id)
+    ratings, next_cursor = paginate(query, REVIEW_SORT_KEYS[sort_by], True, limit, cursor)
+    return review_page_response(ratings, next_cursor)
 
 @router.get("/albums/{album_id}/stats", response_model=AlbumRatingStats)
 def get_album_stats(
     album_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Получает статистику рейтингов для альбома."""
     album = db.query(Album).filter(Album.id == album_id).first()
@@ -139,7 +179,7 @@ def get_album_stats(
 @router.get("/users/{user_id}/stats", response_model=UserRatingStats)
 def get_user_stats(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Получает статистику рейтингов пользователя."""
     user = db.query(User).filter(User.id == user_id).first()
@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from ..models.database import get_db
+from ..models.models import Album, Track
+from ..schemas.schemas import TrackCreate, TrackResponse
+from ..utils.cache import invalidate_albums
+from ..utils.security import get_current_admin_user, get_current_user
+
+router = APIRouter(
+    prefix="/tracks",
+    tags=["tracks"]
+)
+
+def touch_albums(db: Session, *album_ids: int) -> None:
+    """Bump album versions so that ETags of their tracklists change."""
+    db.query(Album).filter(Album.id.in_(album_ids))\
+        .update({Album.version: Album.version + 1}, synchronize_session=False)
+
+@router.post("/", response_model=TrackResponse, status_code=status.HTTP_201_CREATED)
+def create_track(
+    track: TrackCreate,
+    db: Session = Depends(get_db),
+    _: dict = Depends(get_current_admin_user)
+):
+    """
+    Add a track to an album (Admin only)
+    """
+    if db.query(Album.id).filter(Album.id == track.album_id).first() is None:
+        raise HTTPException(status_code=404, detail="Album not found")
+    
+    db_track = Track(**track.dict())
+    db.add(db_track)
+    touch_albums(db, track.album_id)
+    db.commit()
+    invalidate_albums(track.album_id)
+    db.refresh(db_track)
+    return db_track
+
+@router.get("/{track_id}", response_model=TrackResponse)
+def get_track(
+    track_id: int,
+    db: Session = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """
+    Get track by ID (Authenticated users only)
+    """
+    track = db.query(Track).filter(Track.id == track_id).first()
+    if track is None:
+        raise HTTPException(status_code=404, detail="Track not found")
+    return track
+
+@router.put("/{track_id}", response_model=TrackResponse)
+def update_track(
+    track_id: int,
+    track: TrackCreate,
+    db: Session = Depends(get_db),
+    _: dict = Depends(get_current_admin_user)
+):
+    """
+    Update track details (Admin only)
+    """
+    db_track = db.query(Track).filter(Track.id == track_id).first()
+    if db_track is None:
+        raise HTTPException(status_code=404, detail="Track not found")
+    
+    if db.query(Album.id).filter(Album.id == track.album_id).first() is None:
+        raise HTTPException(status_code=404, detail="Album not found")
+    
+    album_ids = {db_track.album_id, track.album_id}
+    for key, value in track.dict().items():
+        setattr(db_track, key, value)
+    
+    touch_albums(db, *album_ids)
+    db.commit()
+    invalidate_albums(*album_ids)
+    db.refresh(db_track)
+    return db_track
+
+@router.delete("/{track_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_track(
+    track_id: int,
+    db: Session = Depends(get_db),
+    _: dict = Depends(get_current_admin_user)
+):
+    """
+    Delete a track (Admin only)
+    """
+    db_track = db.query(Track).filter(Track.id == track_id).first()
+    if db_track is None:
+        raise HTTPException(status_code=404, detail="Track not found")
+    
+    album_id = db_track.album_id
+    db.delete(db_track)
+    touch_albums(db, album_id)
+    db.commit()
+    invalidate_albums(album_id)
+    return None
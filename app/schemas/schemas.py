@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, conint, Field
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Literal
 from datetime import datetime
 
 # User schemas
@@ -63,6 +63,48 @@ class TrackResponse(TrackBase):
 
     model_config = {"from_attributes": True}
 
+class AlbumDetailResponse(AlbumResponse):
+    tracks: List[TrackResponse] = []  # Треклист, упорядоченный по track_number
+
+    model_config = {"from_attributes": True}
+
+# Leaderboard schemas
+class LeaderboardEntry(BaseModel):
+    rank: int
+    score: float  # Байесовская оценка для top-rated, число оценок для most-reviewed
+    weighted_rating: float
+    rating_count: int
+    album: AlbumResponse
+
+# Catalog import schemas
+class CatalogImportError(BaseModel):
+    line: int  # Номер строки во входном файле
+    error: str
+
+class CatalogImportReport(BaseModel):
+    rows_total: int = 0
+    rows_failed: int = 0
+    artists_created: int = 0
+    albums_created: int = 0
+    tracks_created: int = 0
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    errors: List[CatalogImportError] = []  # Не более 1000 первых ошибок
+
+class RatingRecomputeReport(BaseModel):
+    ratings: int = 0
+    ratings_updated: int = 0
+    albums_updated: int = 0
+    elapsed_seconds: float = 0.0
+
+class UserImportReport(BaseModel):
+    rows_total: int = 0
+    rows_failed: int = 0
+    users_created: int = 0
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    errors: List[CatalogImportError] = []  # Не более 1000 первых ошибок
+
 # Order schemas
 class OrderItemBase(BaseModel):
     album_id: int = Field(..., ge=1)
@@ -100,6 +142,9 @@ class OrderResponse(BaseModel):
 
     model_config = {"from_attributes": True}
 
+class OrderStatusUpdate(BaseModel):
+    status: Literal["pending", "paid", "shipped", "completed", "cancelled"]
+
 # Review schemas
 class ReviewBase(BaseModel):
     rating: conint(ge=1, le=5)
@@ -234,6 +279,7 @@ class RatingResponse(RatingBase):
         is_verified_purchase: Подтвержденная покупка
         helpful_votes: Количество голосов "полезно"
         unhelpful_votes: Количество голосов "бесполезно"
+        quality_score: Качество отзыва (0-1)
         created_at: Дата создания
         updated_at: Дата обновления
     """
@@ -243,6 +289,7 @@ class RatingResponse(RatingBase):
     is_verified_purchase: bool
     helpful_votes: int
     unhelpful_votes: int
+    quality_score: float
     created_at: datetime
     updated_at: datetime
 
@@ -307,6 +354,11 @@ class GiftCardResponse(GiftCardBase):
 
     model_config = {"from_attributes": True}
 
+class GiftCardBatchCreate(BaseModel):
+    count: int = Field(..., ge=1, le=1_000_000)
+    initial_balance: float = Field(..., gt=0)
+    expiry_date: datetime
+
 # Promo code schemas
 class PromoCodeBase(BaseModel):
     code: str = Field(..., min_length=3, max_length=20, pattern="^[A-Z0-9_-]+$")
@@ -330,6 +382,20 @@ class PromoCodeResponse(PromoCodeBase):
 
     model_config = {"from_attributes": True}
 
+class PromoCodeBatchCreate(BaseModel):
+    count: int = Field(..., ge=1, le=1_000_000)
+    prefix: str = Field(default="", max_length=8, pattern="^[A-Z0-9_-]*$")
+    code_length: int = Field(default=10, ge=6, le=12)
+    description: Optional[str] = Field(None, max_length=1000)
+    discount_amount: float = Field(default=0, ge=0)
+    discount_percent: Optional[int] = Field(None, ge=0, le=100)
+    start_date: datetime
+    end_date: datetime
+    is_active: bool = True
+    max_uses: Optional[int] = Field(None, ge=1)
+    minimum_order_amount: float = Field(default=0, ge=0)
+    is_single_use: bool = False
+
 # Loyalty schemas
 class LoyaltyTierBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=50)
@@ -386,3 +452,12 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+
+class UserPrincipal(BaseModel):
+    """Authenticated user resolved from a token; cached between requests."""
+    id: int
+    username: str
+    is_active: bool
+    is_admin: bool
+
+    model_config = {"from_attributes": True, "frozen": True}
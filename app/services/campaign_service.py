@@ -0,0 +1,139 @@
+import csv
+import io
+import secrets
+from typing import Iterable, Iterator, List, Set
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from ..models.models import GiftCard, PromoCode
+from ..schemas.schemas import GiftCardBatchCreate, PromoCodeBatchCreate
+
+
+class CampaignService:
+    """Сервис пакетного выпуска промокодов и подарочных карт."""
+
+    CODE_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    GIFT_CARD_CODE_LENGTH = 16
+    # Кодов в одном запросе проверки уникальности и в одном INSERT
+    CHUNK_SIZE = 1000
+
+    @staticmethod
+    def random_code(length: int) -> str:
+        """Возвращает случайный код из CODE_ALPHABET одним вызовом генератора."""
+        alphabet = CampaignService.CODE_ALPHABET
+        value = secrets.randbelow(len(alphabet) ** length)
+        chars = []
+        for _ in range(length):
+            value, index = divmod(value, len(alphabet))
+            chars.append(alphabet[index])
+        return "".join(chars)
+
+    @staticmethod
+    def generate_codes(db: Session, model, count: int, length: int, prefix: str = "") -> Iterator[List[str]]:
+        """
+        Генерирует уникальные коды пачками по CHUNK_SIZE.
+
+        Кандидаты создаются в памяти, а существующие коды отсеиваются одним
+        запросом IN на пачку; отсеянные кандидаты заменяются новыми.
+
+        Args:
+            db: сессия базы данных
+            model: модель с уникальной колонкой code (PromoCode или GiftCard)
+            count: количество кодов
+            length: длина случайной части кода
+            prefix: префикс кода
+
+        Returns:
+            Iterator[List[str]]: пачки кодов, которых еще нет в базе
+        """
+        issued: Set[str] = set()
+        remaining = count
+        while remaining:
+            chunk_size = min(remaining, CampaignService.CHUNK_SIZE)
+            chunk: List[str] = []
+            while len(chunk) < chunk_size:
+                candidates = set()
+                while len(candidates) < chunk_size - len(chunk):
+                    code = prefix + CampaignService.random_code(length)
+                    if code not in issued:
+                        candidates.add(code)
+                existing = set(db.scalars(select(model.code).where(model.code.in_(list(candidates)))))
+                fresh = candidates - existing
+                issued.update(fresh)
+                chunk.extend(fresh)
+            remaining -= chunk_size
+            yield chunk
+
+    @staticmethod
+    def create_promo_codes(db: Session, batch: PromoCodeBatchCreate) -> List[str]:
+        """
+        Выпускает batch.count промокодов с общими параметрами в одной транзакции.
+
+        Args:
+            db: сессия базы данных
+            batch: количество, формат кода и параметры промокодов
+
+        Returns:
+            List[str]: созданные коды
+        """
+        template = batch.model_dump(exclude={"count", "prefix", "code_length"})
+        template["uses_count"] = 0
+        return CampaignService._insert_codes(
+            db,
+            PromoCode,
+            CampaignService.generate_codes(db, PromoCode, batch.count, batch.code_length, batch.prefix),
+            template
+        )
+
+    @staticmethod
+    def create_gift_cards(db: Session, batch: GiftCardBatchCreate) -> List[str]:
+        """
+        Выпускает batch.count подарочных карт с одинаковым балансом в одной транзакции.
+
+        Args:
+            db: сессия базы данных
+            batch: количество, номинал и срок действия карт
+
+        Returns:
+            List[str]: коды созданных карт
+        """
+        template = {
+            "initial_balance": batch.initial_balance,
+            "current_balance": batch.initial_balance,
+            "expiry_date": batch.expiry_date,
+            "is_active": True,
+        }
+        return CampaignService._insert_codes(
+            db,
+            GiftCard,
+            CampaignService.generate_codes(db, GiftCard, batch.count, CampaignService.GIFT_CARD_CODE_LENGTH),
+            template
+        )
+
+    @staticmethod
+    def to_csv(header: List[str], rows: Iterable[Iterable]) -> Iterator[str]:
+        """Сериализует строки в CSV пачками по CHUNK_SIZE строк."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        for index, row in enumerate(rows, start=1):
+            writer.writerow(row)
+            if index % CampaignService.CHUNK_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    @staticmethod
+    def _insert_codes(db: Session, model, chunks: Iterator[List[str]], template: dict) -> List[str]:
+        codes: List[str] = []
+        try:
+            for chunk in chunks:
+                db.execute(insert(model), [{**template, "code": code} for code in chunk])
+                codes.extend(chunk)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return codes
@@ -0,0 +1,297 @@
+import codecs
+import csv
+import json
+import time
+from typing import IO, Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..models.models import Album, Artist, Track
+from ..schemas.schemas import (
+    AlbumCreate, ArtistCreate, CatalogImportError, CatalogImportReport, TrackBase, TrackCreate
+)
+from ..utils.cache import invalidate_albums
+
+# Номер строки во входном файле и разобранная запись
+ImportRow = Tuple[int, Dict[str, Any]]
+
+
+class CatalogImportService:
+    """Сервис пакетного импорта каталога (артисты, альбомы, треки)."""
+
+    RECORD_TYPES = ("artist", "album", "track")
+    MAX_REPORTED_ERRORS = 1000
+
+    @staticmethod
+    def read_ndjson(stream: IO[bytes]) -> Iterator[ImportRow]:
+        """
+        Читает записи NDJSON: один JSON-объект с полем "type" на строку.
+
+        Args:
+            stream: бинарный поток с данными
+
+        Returns:
+            Iterator[ImportRow]: пары (номер строки, запись); некорректный JSON
+            возвращается как запись с ключом "_error"
+        """
+        for line_no, line in enumerate(codecs.iterdecode(stream, "utf-8-sig"), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, {"_error": f"Invalid JSON: {e}"}
+                continue
+            if not isinstance(record, dict):
+                yield line_no, {"_error": "Record must be a JSON object"}
+                continue
+            yield line_no, record
+
+    @staticmethod
+    def read_csv(stream: IO[bytes]) -> Iterator[ImportRow]:
+        """
+        Читает записи CSV с заголовком. Колонка "type" задает тип записи,
+        пустые ячейки считаются отсутствующими полями.
+
+        Args:
+            stream: бинарный поток с данными
+
+        Returns:
+            Iterator[ImportRow]: пары (номер строки, запись)
+        """
+        # iterdecode, а не TextIOWrapper: SpooledTemporaryFile из UploadFile
+        # до Python 3.11 не реализует интерфейс, нужный TextIOWrapper
+        reader = csv.DictReader(codecs.iterdecode(stream, "utf-8-sig"))
+        for record in reader:
+            yield reader.line_num, {key: value for key, value in record.items() if key and value not in (None, "")}
+
+    @staticmethod
+    def import_rows(db: Session, rows: Iterable[ImportRow], batch_size: int = 1000) -> CatalogImportReport:
+        """
+        Импортирует записи каталога пачками, каждая пачка в отдельной транзакции.
+
+        В пределах пачки сначала создаются артисты, затем альбомы, затем треки,
+        поэтому альбом может ссылаться на артиста из той же пачки по имени
+        (artist_name), а треки можно передать вложенным списком "tracks" в записи
+        альбома. Ошибки валидации отдельных строк попадают в отчет и не
+        прерывают импорт.
+
+        Args:
+            db: сессия базы данных
+            rows: записи, например из read_ndjson или read_csv
+            batch_size: количество записей в одной транзакции
+
+        Returns:
+            CatalogImportReport: отчет об импорте
+        """
+        report = CatalogImportReport()
+        started = time.monotonic()
+
+        batch: List[ImportRow] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                CatalogImportService._import_batch(db, batch, report)
+                batch = []
+        if batch:
+            CatalogImportService._import_batch(db, batch, report)
+
+        report.elapsed_seconds = round(time.monotonic() - started, 3)
+        if report.elapsed_seconds > 0:
+            report.rows_per_second = round(report.rows_total / report.elapsed_seconds, 1)
+        return report
+
+    @staticmethod
+    def _add_error(report: CatalogImportReport, line: int, error: str) -> None:
+        report.rows_failed += 1
+        if len(report.errors) < CatalogImportService.MAX_REPORTED_ERRORS:
+            report.errors.append(CatalogImportError(line=line, error=error))
+
+    @staticmethod
+    def _reject(report: CatalogImportReport, rejected: Set[int], line: int, error: str) -> None:
+        rejected.add(line)
+        CatalogImportService._add_error(report, line, error)
+
+    @staticmethod
+    def _validation_message(e: ValidationError) -> str:
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+        )
+
+    @staticmethod
+    def _import_batch(db: Session, batch: List[ImportRow], report: CatalogImportReport) -> None:
+        report.rows_total += len(batch)
+
+        grouped: Dict[str, List[ImportRow]] = {record_type: [] for record_type in CatalogImportService.RECORD_TYPES}
+        for line, record in batch:
+            if "_error" in record:
+                CatalogImportService._add_error(report, line, record["_error"])
+            elif record.get("type") not in grouped:
+                CatalogImportService._add_error(report, line, "Field 'type' must be one of: artist, album, track")
+            else:
+                grouped[record["type"]].append((line, record))
+
+        created = {"artists": 0, "albums": 0, "tracks": 0}
+        # Строки, уже отклоненные валидацией: при откате пачки не учитываются повторно
+        rejected: Set[int] = set()
+        try:
+            artist_ids = CatalogImportService._import_artists(db, grouped["artist"], report, rejected, created)
+            CatalogImportService._import_albums(db, grouped["album"], artist_ids, report, rejected, created)
+            touched_album_ids = CatalogImportService._import_tracks(db, grouped["track"], report, rejected, created)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            failed_lines = [
+                line for record_type in grouped.values() for line, _ in record_type if line not in rejected
+            ]
+            for line in failed_lines:
+                CatalogImportService._add_error(report, line, f"Batch rolled back: {e.__class__.__name__}")
+            return
+
+        if touched_album_ids:
+            invalidate_albums(*touched_album_ids)
+        report.artists_created += created["artists"]
+        report.albums_created += created["albums"]
+        report.tracks_created += created["tracks"]
+
+    @staticmethod
+    def _import_artists(
+        db: Session,
+        rows: List[ImportRow],
+        report: CatalogImportReport,
+        rejected: Set[int],
+        created: Dict[str, int]
+    ) -> Dict[str, int]:
+        """Создает недостающих артистов и возвращает отображение имя -> id."""
+        names: Dict[str, ArtistCreate] = {}
+        for line, record in rows:
+            try:
+                artist = ArtistCreate.model_validate(record)
+            except ValidationError as e:
+                CatalogImportService._reject(report, rejected, line, CatalogImportService._validation_message(e))
+                continue
+            names.setdefault(artist.name, artist)
+
+        if not names:
+            return {}
+
+        # Один запрос на пачку вместо проверки каждого артиста
+        artist_ids = {
+            name: artist_id
+            for artist_id, name in db.query(Artist.id, Artist.name)
+            .filter(Artist.name.in_(list(names))).order_by(Artist.id.desc())
+        }
+        missing = [artist.model_dump() for name, artist in names.items() if name not in artist_ids]
+        if missing:
+            result = db.execute(insert(Artist).returning(Artist.id, Artist.name), missing)
+            for artist_id, name in result:
+                artist_ids[name] = artist_id
+            created["artists"] += len(missing)
+        return artist_ids
+
+    @staticmethod
+    def _import_albums(
+        db: Session,
+        rows: List[ImportRow],
+        artist_ids: Dict[str, int],
+        report: CatalogImportReport,
+        rejected: Set[int],
+        created: Dict[str, int]
+    ) -> None:
+        if not rows:
+            return
+
+        # Разрешаем ссылки на артистов одним запросом на пачку
+        names = {record["artist_name"] for _, record in rows if "artist_name" in record} - artist_ids.keys()
+        ids = set()
+        for _, record in rows:
+            try:
+                ids.add(int(record["artist_id"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        known_ids = set(artist_ids.values())
+        if names or ids - known_ids:
+            for artist_id, name in db.query(Artist.id, Artist.name).filter(
+                or_(Artist.name.in_(list(names)), Artist.id.in_(list(ids - known_ids)))
+            ).order_by(Artist.id):
+                artist_ids.setdefault(name, artist_id)
+                known_ids.add(artist_id)
+
+        albums: List[Dict[str, Any]] = []
+        album_tracks: List[List[Dict[str, Any]]] = []
+        for line, record in rows:
+            record = dict(record)
+            if "artist_id" not in record and "artist_name" in record:
+                if record["artist_name"] not in artist_ids:
+                    CatalogImportService._reject(report, rejected, line, f"Artist '{record['artist_name']}' not found")
+                    continue
+                record["artist_id"] = artist_ids[record["artist_name"]]
+            if not isinstance(record.get("tracks") or [], list):
+                CatalogImportService._reject(report, rejected, line, "Field 'tracks' must be a list")
+                continue
+            try:
+                album = AlbumCreate.model_validate(record)
+                tracks = [TrackBase.model_validate(track).model_dump() for track in record.get("tracks") or []]
+            except ValidationError as e:
+                CatalogImportService._reject(report, rejected, line, CatalogImportService._validation_message(e))
+                continue
+            if album.artist_id not in known_ids:
+                CatalogImportService._reject(report, rejected, line, "Artist not found")
+                continue
+            albums.append(album.model_dump())
+            album_tracks.append(tracks)
+
+        if not albums:
+            return
+
+        result = db.execute(insert(Album).returning(Album.id, sort_by_parameter_order=True), albums)
+        tracks = []
+        for album_id, album_track_list in zip(result.scalars(), album_tracks):
+            tracks.extend({**track, "album_id": album_id} for track in album_track_list)
+        if tracks:
+            db.execute(insert(Track), tracks)
+        created["albums"] += len(albums)
+        created["tracks"] += len(tracks)
+
+    @staticmethod
+    def _import_tracks(
+        db: Session,
+        rows: List[ImportRow],
+        report: CatalogImportReport,
+        rejected: Set[int],
+        created: Dict[str, int]
+    ) -> Set[int]:
+        """Добавляет треки к существующим альбомам и возвращает id измененных альбомов."""
+        if not rows:
+            return set()
+
+        tracks: List[Tuple[int, TrackCreate]] = []
+        for line, record in rows:
+            try:
+                tracks.append((line, TrackCreate.model_validate(record)))
+            except ValidationError as e:
+                CatalogImportService._reject(report, rejected, line, CatalogImportService._validation_message(e))
+
+        album_ids = {track.album_id for _, track in tracks}
+        existing = {album_id for (album_id,) in db.query(Album.id).filter(Album.id.in_(album_ids))} if album_ids else set()
+
+        values = []
+        for line, track in tracks:
+            if track.album_id not in existing:
+                CatalogImportService._reject(report, rejected, line, "Album not found")
+                continue
+            values.append(track.model_dump())
+        if not values:
+            return set()
+        db.execute(insert(Track), values)
+        created["tracks"] += len(values)
+
+        # Меняем версии альбомов, чтобы ETag их треклистов стал другим
+        touched = {track["album_id"] for track in values}
+        db.query(Album).filter(Album.id.in_(list(touched)))\
+            .update({Album.version: Album.version + 1}, synchronize_session=False)
+        return touched
@@ -0,0 +1,202 @@
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.models import Album
+
+# Рейтинг альбома для досок: (жанр, десятилетие, weighted_rating, rating_count)
+AlbumStanding = Tuple[Optional[str], Optional[int], float, int]
+# Ключ доски: (вид доски, срез, значение среза), например ("top-rated", "genre", "ROCK")
+BoardKey = Tuple[str, str, Optional[object]]
+
+
+class LeaderboardService:
+    """
+    Предрасчитанные доски лучших альбомов.
+
+    Доски хранятся в памяти как отсортированные списки ключей по каждому срезу
+    (весь каталог, жанр, десятилетие), поэтому страница доски отдается срезом
+    списка без сортировки таблицы альбомов. Альбомы, чей рейтинг изменился,
+    помечаются через mark_dirty и переставляются на доске при следующем
+    чтении; раз в refresh_seconds доски перестраиваются целиком.
+
+    Запросы к БД выполняет один поток вне общей блокировки; под ней только
+    подменяются готовые доски, поэтому чтение не ждет перестройки. Пока
+    доски обновляются, остальные потоки отдают текущие.
+    """
+
+    TOP_RATED = "top-rated"
+    MOST_REVIEWED = "most-reviewed"
+    KINDS = (TOP_RATED, MOST_REVIEWED)
+
+    def __init__(self, min_ratings: int, size: int, refresh_seconds: float):
+        self.min_ratings = min_ratings
+        self.size = size
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._albums: Dict[int, AlbumStanding] = {}
+        self._boards: Dict[BoardKey, List[Tuple[float, int]]] = {}
+        self._dirty: Set[int] = set()
+        self._mean = 0.0
+        self._loaded_at: Optional[float] = None
+        self._generation = 0  # Увеличивается в clear(), чтобы не принять доски, загруженные до сброса
+
+    def mark_dirty(self, *album_ids: int) -> None:
+        """Помечает альбомы, рейтинг или жанр/год которых изменился."""
+        with self._lock:
+            self._dirty.update(album_ids)
+
+    def clear(self) -> None:
+        """Сбрасывает доски; они будут построены заново при следующем чтении."""
+        with self._lock:
+            self._loaded_at = None
+            self._generation += 1
+
+    def bayesian_score(self, weighted_rating: float, rating_count: int, mean: Optional[float] = None) -> float:
+        """
+        Байесовская оценка: рейтинг альбома, притянутый к среднему по каталогу
+        (по умолчанию текущему) с силой min_ratings голосов.
+        """
+        prior = self.min_ratings
+        mean = self._mean if mean is None else mean
+        return (rating_count * weighted_rating + prior * mean) / (rating_count + prior)
+
+    def get_board(
+        self,
+        db: Session,
+        kind: str,
+        genre: Optional[str] = None,
+        decade: Optional[int] = None,
+        offset: int = 0,
+        limit: int = 20
+    ) -> List[Tuple[int, int, float]]:
+        """
+        Возвращает страницу доски.
+
+        Args:
+            db: сессия базы данных (нужна только для обновления досок)
+            kind: TOP_RATED или MOST_REVIEWED
+            genre: жанр; вместе с decade не используется
+            decade: первый год десятилетия, например 1970
+            offset: смещение от начала доски
+            limit: количество позиций
+
+        Returns:
+            List[Tuple[int, int, float]]: (место, ID альбома, оценка на доске)
+        """
+        if genre is not None:
+            key: BoardKey = (kind, "genre", genre)
+        elif decade is not None:
+            key = (kind, "decade", decade)
+        else:
+            key = (kind, "overall", None)
+
+        self._refresh(db)
+        with self._lock:
+            end = min(offset + limit, self.size)
+            entries = self._boards.get(key, [])[offset:end]
+        return [(offset + index + 1, album_id, -score) for index, (score, album_id) in enumerate(entries)]
+
+    def _refresh(self, db: Session) -> None:
+        with self._lock:
+            if self._is_fresh() and not self._dirty:
+                return
+            loaded = self._loaded_at is not None
+        # Доски обновляет один поток; остальные ждут только первой загрузки
+        if not self._refresh_lock.acquire(blocking=not loaded):
+            return
+        try:
+            with self._lock:
+                stale = not self._is_fresh()
+                dirty, self._dirty = self._dirty, set()
+            if stale:
+                self._rebuild(db)
+            elif dirty:
+                self._update(db, dirty)
+        finally:
+            self._refresh_lock.release()
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds
+
+    def _update(self, db: Session, dirty: Set[int]) -> None:
+        """Переставляет измененные альбомы на текущих досках."""
+        rows = db.query(
+            Album.id, Album.genre, Album.release_year, Album.weighted_rating, Album.rating_count
+        ).filter(Album.id.in_(list(dirty))).all()
+        found = {row.id for row in rows}
+        with self._lock:
+            for album_id in dirty - found:
+                self._place(album_id, None)
+            for row in rows:
+                self._place(row.id, self._standing(row))
+
+    def _rebuild(self, db: Session) -> None:
+        """Строит доски заново и подменяет ими текущие."""
+        with self._lock:
+            generation = self._generation
+        mean = db.query(func.avg(Album.weighted_rating)).filter(Album.rating_count > 0).scalar() or 0.0
+        albums: Dict[int, AlbumStanding] = {}
+        boards: Dict[BoardKey, List[Tuple[float, int]]] = {}
+        for row in db.query(
+            Album.id, Album.genre, Album.release_year, Album.weighted_rating, Album.rating_count
+        ).filter(Album.rating_count > 0):
+            standing = self._standing(row)
+            albums[row.id] = standing
+            for key, entry in self._entries(row.id, standing, mean):
+                boards.setdefault(key, []).append(entry)
+        for entries in boards.values():
+            entries.sort()
+        with self._lock:
+            self._mean = mean
+            self._albums = albums
+            self._boards = boards
+            self._loaded_at = time.monotonic() if self._generation == generation else None
+
+    def _place(self, album_id: int, standing: Optional[AlbumStanding]) -> None:
+        """Убирает альбом с прежних позиций и ставит на новые."""
+        old = self._albums.pop(album_id, None)
+        if old is not None:
+            for key, entry in self._entries(album_id, old):
+                board = self._boards.get(key, [])
+                index = bisect.bisect_left(board, entry)
+                if index < len(board) and board[index] == entry:
+                    del board[index]
+        if standing is None or standing[3] <= 0:
+            return
+        self._albums[album_id] = standing
+        for key, entry in self._entries(album_id, standing):
+            bisect.insort(self._boards.setdefault(key, []), entry)
+
+    def _entries(
+        self, album_id: int, standing: AlbumStanding, mean: Optional[float] = None
+    ) -> Iterable[Tuple[BoardKey, Tuple[float, int]]]:
+        genre, decade, weighted_rating, rating_count = standing
+        scopes = [("overall", None)]
+        if genre:
+            scopes.append(("genre", genre))
+        if decade is not None:
+            scopes.append(("decade", decade))
+        # Ключи хранятся с минусом, чтобы список по возрастанию шел от лучших к худшим
+        for scope in scopes:
+            yield (self.MOST_REVIEWED, *scope), (-rating_count, album_id)
+            if rating_count >= self.min_ratings:
+                yield (self.TOP_RATED, *scope), (-self.bayesian_score(weighted_rating, rating_count, mean), album_id)
+
+    @staticmethod
+    def _standing(row) -> AlbumStanding:
+        decade = row.release_year // 10 * 10 if row.release_year is not None else None
+        return row.genre, decade, row.weighted_rating or 0.0, row.rating_count or 0
+
+
+leaderboards = LeaderboardService(
+    settings.LEADERBOARD_MIN_RATINGS,
+    settings.LEADERBOARD_SIZE,
+    settings.LEADERBOARD_REFRESH_SECONDS
+)
@@ -0,0 +1,196 @@
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import String, bindparam, cast, select, update
+from sqlalchemy.orm import Session
+
+from ..models.models import Album, Rating, RatingVote
+from .rating_batch import RatingBatchService
+
+
+class ManipulationService:
+    """
+    Офлайн-поиск накрутки рейтингов на NumPy.
+
+    Анализ читает ratings и rating_votes целиком в массивы и ищет три шаблона:
+
+    - всплески: не меньше BURST_MIN_RATINGS одинаковых оценок одного альбома
+      в пределах BURST_WINDOW_SECONDS;
+    - кольца голосов: пары пользователей, каждый из которых отметил отзывы
+      другого полезными не меньше RING_MIN_VOTES раз. Разреженная матрица
+      «голосующий × автор» хранится как отсортированные ключи ребер с
+      количеством голосов, взаимные ребра находятся поиском обратного ключа;
+    - аккаунты одного артиста: пользователи, у которых не меньше
+      SINGLE_ARTIST_MIN_RATINGS отзывов и все на альбомы одного артиста.
+
+    Помеченные отзывы получают manipulation_factor — произведение множителей
+    найденных шаблонов, которое учитывает RatingService.calculate_weighted_rating.
+    """
+
+    BURST_WINDOW_SECONDS = 3600
+    BURST_MIN_RATINGS = 5
+    BURST_FACTOR = 0.5
+
+    RING_MIN_VOTES = 3
+    RING_FACTOR = 0.3
+
+    SINGLE_ARTIST_MIN_RATINGS = 3
+    SINGLE_ARTIST_FACTOR = 0.7
+
+    @staticmethod
+    def analyze(db: Session, now: Optional[datetime] = None) -> Dict[str, float]:
+        """
+        Пересчитывает manipulation_factor всех отзывов и рейтинги каталога.
+
+        Измененные множители записываются одним executemany, затем
+        RatingBatchService.recompute_all пересчитывает веса отзывов и рейтинги
+        альбомов; все изменения фиксируются одной транзакцией.
+
+        Args:
+            db: сессия базы данных
+            now: момент, на который считается возраст отзывов
+
+        Returns:
+            Dict[str, float]: количество отзывов по каждому шаблону, измененных
+                отзывов и альбомов, время работы
+        """
+        started = time.monotonic()
+        ratings = RatingBatchService.load_columns(db, select(
+            Rating.id,
+            Rating.user_id,
+            Rating.album_id,
+            Rating.score,
+            cast(Rating.created_at, String),
+            Rating.manipulation_factor
+        ).order_by(Rating.id), (
+            ("id", np.int64, 0),
+            ("user_id", np.int64, 0),
+            ("album_id", np.int64, 0),
+            ("score", np.int64, 0),
+            ("created_at", "datetime64[s]", None),
+            ("manipulation_factor", np.float64, 1.0),
+        ))
+        votes = RatingBatchService.load_columns(db, select(
+            RatingVote.user_id,
+            RatingVote.rating_id
+        ).where(RatingVote.is_helpful.is_(True)), (
+            ("user_id", np.int64, 0),
+            ("rating_id", np.int64, 0),
+        ))
+        albums = RatingBatchService.load_columns(db, select(Album.id, Album.artist_id), (
+            ("id", np.int64, 0),
+            ("artist_id", np.int64, -1),
+        ))
+
+        burst = ManipulationService.find_bursts(ratings)
+        ring = ManipulationService.find_vote_rings(ratings, votes)
+        single_artist = ManipulationService.find_single_artist_accounts(ratings, albums)
+
+        factors = np.ones(len(ratings["id"]))
+        factors[burst] *= ManipulationService.BURST_FACTOR
+        factors[ring] *= ManipulationService.RING_FACTOR
+        factors[single_artist] *= ManipulationService.SINGLE_ARTIST_FACTOR
+
+        changed = np.flatnonzero(factors != ratings["manipulation_factor"])
+        table = Rating.__table__
+        RatingBatchService.executemany(db, update(table).where(table.c.id == bindparam("b_id")).values(
+            manipulation_factor=bindparam("b_manipulation_factor")
+        ), [
+            {"b_id": int(ratings["id"][i]), "b_manipulation_factor": float(factors[i])} for i in changed
+        ])
+
+        report = RatingBatchService.recompute_all(db, now)
+        return {
+            "ratings": int(len(factors)),
+            "votes": int(len(votes["user_id"])),
+            "burst": int(burst.sum()),
+            "ring": int(ring.sum()),
+            "single_artist": int(single_artist.sum()),
+            "flagged": int((factors < 1.0).sum()),
+            "factors_updated": int(len(changed)),
+            "albums_updated": report["albums_updated"],
+            "elapsed_seconds": round(time.monotonic() - started, 3),
+        }
+
+    @staticmethod
+    def find_bursts(ratings: Dict[str, np.ndarray]) -> np.ndarray:
+        """Маска отзывов, попавших в окно с BURST_MIN_RATINGS одинаковыми оценками альбома."""
+        size = len(ratings["id"])
+        flagged = np.zeros(size, dtype=bool)
+        created = ratings["created_at"]
+        known = np.flatnonzero(~np.isnat(created))
+        if not len(known):
+            return flagged
+
+        window = ManipulationService.BURST_WINDOW_SECONDS
+        seconds = created[known].astype(np.int64)
+        seconds -= seconds.min()
+        # Один ключ на (альбом, оценка, время): группы не пересекаются, так как
+        # шаг между группами больше разброса времени и ширины окна
+        group = ratings["album_id"][known] * 8 + ratings["score"][known]
+        key = group * (int(seconds.max()) + window + 1) + seconds
+        order = np.argsort(key, kind="stable")
+        key = key[order]
+
+        # Для каждого отзыва — конец окна [t, t + window] в его группе
+        end = np.searchsorted(key, key + window, side="right")
+        start = np.flatnonzero(end - np.arange(len(key)) >= ManipulationService.BURST_MIN_RATINGS)
+        if not len(start):
+            return flagged
+
+        # Отмечаем все отзывы внутри найденных окон через разностный массив
+        coverage = np.zeros(len(key) + 1, dtype=np.int64)
+        np.add.at(coverage, start, 1)
+        np.add.at(coverage, end[start], -1)
+        flagged[known[order[np.cumsum(coverage[:-1]) > 0]]] = True
+        return flagged
+
+    @staticmethod
+    def find_vote_rings(ratings: Dict[str, np.ndarray], votes: Dict[str, np.ndarray]) -> np.ndarray:
+        """Маска отзывов, получивших голоса «полезно» от партнера по взаимному кольцу."""
+        flagged = np.zeros(len(ratings["id"]), dtype=bool)
+        if not len(votes["rating_id"]) or not len(ratings["id"]):
+            return flagged
+
+        # Автор каждого голосованного отзыва (ratings отсортированы по id)
+        position = np.searchsorted(ratings["id"], votes["rating_id"])
+        position = np.minimum(position, len(ratings["id"]) - 1)
+        known = ratings["id"][position] == votes["rating_id"]
+        position = position[known]
+        voter = votes["user_id"][known]
+        author = ratings["user_id"][position]
+        own = voter != author
+        position, voter, author = position[own], voter[own], author[own]
+
+        # Разреженная матрица голосующий × автор: ключ ребра и число голосов
+        users = int(max(voter.max(initial=0), author.max(initial=0))) + 1
+        edge = voter * users + author
+        edges, counts = np.unique(edge, return_counts=True)
+        strong = edges[counts >= ManipulationService.RING_MIN_VOTES]
+        reverse = (strong % users) * users + strong // users
+        mutual = strong[np.isin(reverse, strong, assume_unique=True)]
+
+        flagged[position[np.isin(edge, mutual)]] = True
+        return flagged
+
+    @staticmethod
+    def find_single_artist_accounts(ratings: Dict[str, np.ndarray], albums: Dict[str, np.ndarray]) -> np.ndarray:
+        """Маска отзывов пользователей, оценивших только альбомы одного артиста."""
+        flagged = np.zeros(len(ratings["id"]), dtype=bool)
+        if not len(ratings["id"]) or not len(albums["id"]):
+            return flagged
+
+        order = np.argsort(albums["id"])
+        album_ids, artist_ids = albums["id"][order], albums["artist_id"][order]
+        position = np.minimum(np.searchsorted(album_ids, ratings["album_id"]), len(album_ids) - 1)
+        artist = np.where(album_ids[position] == ratings["album_id"], artist_ids[position], -1)
+
+        users, user_index, rating_count = np.unique(ratings["user_id"], return_inverse=True, return_counts=True)
+        # Число разных артистов пользователя — число уникальных пар (пользователь, артист)
+        pairs = np.unique(np.stack([user_index, artist]), axis=1)
+        artist_count = np.bincount(pairs[0], minlength=len(users))
+        suspicious = (artist_count == 1) & (rating_count >= ManipulationService.SINGLE_ARTIST_MIN_RATINGS)
+        flagged[suspicious[user_index] & (artist >= 0)] = True
+        return flagged
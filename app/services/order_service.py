@@ -0,0 +1,226 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Tuple
+
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models.models import (
+    Album, GiftCard, GiftCardTransaction, LoyaltyPointTransaction, LoyaltyTier,
+    Order, OrderItem, UserLoyalty
+)
+from ..schemas.schemas import OrderCreate, OrderResponse
+from ..utils.cache import invalidate_albums
+from .promo_service import PromoCodeError, PromoCodeService
+
+
+class CheckoutError(Exception):
+    """Ошибка оформления заказа с HTTP-статусом для ответа клиенту."""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class OrderService:
+    """Сервис оформления заказов."""
+
+    STATUSES = ("pending", "paid", "shipped", "completed", "cancelled")
+    INITIAL_STATUS = "pending"
+    POINTS_PER_CURRENCY_UNIT = 0.01  # 1 балл за каждые 100 единиц суммы заказа
+
+    @staticmethod
+    def checkout(db: Session, user_id: int, order: OrderCreate) -> OrderResponse:
+        """
+        Оформляет заказ в одной короткой транзакции.
+
+        Цены и остатки всех альбомов корзины читаются одним запросом IN, остатки
+        списываются одним условным UPDATE (stock >= qty), позиции заказа
+        вставляются одним executemany. Промокод (см. PromoCodeService.redeem),
+        баллы лояльности и подарочная карта списываются условными UPDATE,
+        поэтому параллельные заказы не могут уйти в минус ни по складу, ни по
+        балансам, ни по лимиту промокода.
+
+        Args:
+            db: сессия базы данных
+            user_id: ID покупателя
+            order: содержимое корзины и применяемые скидки
+
+        Returns:
+            OrderResponse: созданный заказ с деталями скидок
+
+        Raises:
+            CheckoutError: если заказ не может быть оформлен
+        """
+        quantities = Counter()
+        for item in order.items:
+            quantities[item.album_id] += item.quantity
+        if not quantities:
+            raise CheckoutError("Order must contain at least one item")
+
+        try:
+            # Цены и остатки всей корзины одним запросом
+            albums = {
+                album_id: (price, stock)
+                for album_id, price, stock in db.execute(
+                    select(Album.id, Album.price, Album.stock).where(Album.id.in_(list(quantities)))
+                )
+            }
+            missing = sorted(set(quantities) - albums.keys())
+            if missing:
+                raise CheckoutError(f"Albums not found: {', '.join(map(str, missing))}", 404)
+            short = sorted(album_id for album_id, qty in quantities.items() if (albums[album_id][1] or 0) < qty)
+            if short:
+                raise CheckoutError(f"Insufficient stock for albums: {', '.join(map(str, short))}", 409)
+
+            OrderService._reserve_stock(db, quantities)
+
+            subtotal = round(sum(albums[album_id][0] * qty for album_id, qty in quantities.items()), 2)
+            remaining = subtotal
+            details: Dict[str, float] = {}
+
+            promo = None
+            if order.promo_code:
+                promo = PromoCodeService.get_valid(db, order.promo_code, user_id, subtotal)
+                promo_discount = min(PromoCodeService.calculate_discount(promo, subtotal), remaining)
+                details["promo_code"] = promo_discount
+                remaining = round(remaining - promo_discount, 2)
+
+            points_used = 0
+            if order.use_loyalty_points:
+                # 1 балл = 1 единица скидки, списываем не больше остатка суммы
+                points_used = min(order.use_loyalty_points, int(remaining))
+                if points_used:
+                    OrderService._redeem_points(db, user_id, points_used)
+                    details["loyalty_points"] = float(points_used)
+                    remaining = round(remaining - points_used, 2)
+
+            gift_card, gift_card_amount = None, 0.0
+            if order.gift_card_code and remaining > 0:
+                gift_card, gift_card_amount = OrderService._charge_gift_card(db, order.gift_card_code, remaining)
+                details["gift_card"] = gift_card_amount
+                remaining = round(remaining - gift_card_amount, 2)
+
+            points_earned = OrderService._earn_points(db, user_id, remaining)
+
+            db_order = Order(
+                user_id=user_id,
+                subtotal=subtotal,
+                discount_amount=round(subtotal - remaining, 2),
+                total_amount=remaining,
+                points_earned=points_earned,
+                status=OrderService.INITIAL_STATUS,
+                applied_promo_code=promo.code if promo else None,
+                applied_gift_card=gift_card.code if gift_card else None,
+                used_loyalty_points=points_used or None,
+            )
+            db.add(db_order)
+            db.flush()
+
+            # Позиции заказа и журналы списаний вставляются пачкой
+            db.execute(insert(OrderItem), [
+                {
+                    "order_id": db_order.id,
+                    "album_id": album_id,
+                    "quantity": qty,
+                    "price_at_time": albums[album_id][0],
+                }
+                for album_id, qty in quantities.items()
+            ])
+            if promo:
+                PromoCodeService.redeem(db, promo, user_id, db_order.id)
+            if gift_card:
+                db.add(GiftCardTransaction(order_id=db_order.id, gift_card_id=gift_card.id, amount=gift_card_amount))
+            point_changes = [points for points in (-points_used, points_earned) if points]
+            if point_changes:
+                db.execute(insert(LoyaltyPointTransaction), [
+                    {"order_id": db_order.id, "user_id": user_id, "points": points} for points in point_changes
+                ])
+
+            db.commit()
+        except PromoCodeError as e:
+            db.rollback()
+            raise CheckoutError(e.detail, e.status_code)
+        except Exception:
+            db.rollback()
+            raise
+
+        invalidate_albums(*quantities)
+        db.refresh(db_order)
+        response = OrderResponse.model_validate(db_order)
+        response.discount_details = details or None
+        return response
+
+    @staticmethod
+    def _reserve_stock(db: Session, quantities: Dict[int, int]) -> None:
+        """Списывает остатки всех позиций одним условным UPDATE."""
+        qty = case(quantities, value=Album.id)
+        result = db.execute(
+            update(Album)
+            .where(Album.id.in_(list(quantities)), Album.stock >= qty)
+            .values(stock=Album.stock - qty, version=Album.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(quantities):
+            # Остаток успели выкупить между чтением и списанием
+            raise CheckoutError("Insufficient stock", 409)
+
+    @staticmethod
+    def _redeem_points(db: Session, user_id: int, points: int) -> None:
+        result = db.execute(
+            update(UserLoyalty)
+            .where(UserLoyalty.user_id == user_id, UserLoyalty.points >= points)
+            .values(points=UserLoyalty.points - points)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise CheckoutError("Insufficient points balance")
+
+    @staticmethod
+    def _charge_gift_card(db: Session, code: str, amount: float) -> Tuple[GiftCard, float]:
+        card = db.query(GiftCard).filter(GiftCard.code == code.upper()).first()
+        if not card:
+            raise CheckoutError("Gift card not found", 404)
+        if not card.is_active:
+            raise CheckoutError("Gift card is not active")
+        if datetime.utcnow() > card.expiry_date:
+            raise CheckoutError("Gift card has expired")
+
+        charge = round(min(card.current_balance, amount), 2)
+        if charge <= 0:
+            raise CheckoutError("Gift card has no balance")
+        result = db.execute(
+            update(GiftCard)
+            .where(GiftCard.id == card.id, GiftCard.current_balance >= charge)
+            .values(current_balance=GiftCard.current_balance - charge)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise CheckoutError("Gift card balance changed, please retry", 409)
+        return card, charge
+
+    @staticmethod
+    def _earn_points(db: Session, user_id: int, amount: float) -> int:
+        """Начисляет баллы лояльности за оплаченную сумму с учетом множителя уровня."""
+        loyalty = db.query(UserLoyalty.id, LoyaltyTier.points_multiplier)\
+            .outerjoin(LoyaltyTier, LoyaltyTier.id == UserLoyalty.tier_id)\
+            .filter(UserLoyalty.user_id == user_id).first()
+        multiplier = loyalty.points_multiplier if loyalty and loyalty.points_multiplier else 1.0
+        points = int(amount * OrderService.POINTS_PER_CURRENCY_UNIT * multiplier)
+        if points <= 0:
+            return 0
+
+        if loyalty:
+            db.execute(
+                update(UserLoyalty)
+                .where(UserLoyalty.id == loyalty.id)
+                .values(
+                    points=UserLoyalty.points + points,
+                    total_points_earned=UserLoyalty.total_points_earned + points
+                )
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            db.add(UserLoyalty(user_id=user_id, points=points, total_points_earned=points))
+        return points
@@ -0,0 +1,140 @@
+import random
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.models import PromoCode, PromoCodeUsage, PromoCodeUsageCounter
+from ..utils.sql import upsert
+
+
+class PromoCodeError(Exception):
+    """Промокод не может быть применен; содержит HTTP-статус для ответа клиенту."""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class PromoCodeService:
+    """Сервис проверки и погашения промокодов."""
+
+    # Количество строк-шардов счетчика для промокодов без лимита
+    COUNTER_SHARDS = 16
+
+    @staticmethod
+    def get_valid(db: Session, code: str, user_id: int, order_amount: float) -> PromoCode:
+        """
+        Находит промокод и проверяет, что его можно применить к заказу.
+
+        Проверка лимита и однократного использования здесь предварительная:
+        окончательно они проверяются атомарно в redeem.
+
+        Args:
+            db: сессия базы данных
+            code: промокод
+            user_id: ID покупателя
+            order_amount: сумма заказа
+
+        Returns:
+            PromoCode: найденный промокод
+
+        Raises:
+            PromoCodeError: если промокод не найден или не может быть применен
+        """
+        promo = db.query(PromoCode).filter(PromoCode.code == code.upper()).first()
+        if not promo:
+            raise PromoCodeError("Promo code not found", 404)
+
+        now = datetime.utcnow()
+        if not promo.is_active:
+            raise PromoCodeError("Promo code is not active")
+        if now < promo.start_date or now > promo.end_date:
+            raise PromoCodeError("Promo code is not valid at this time")
+        if (promo.minimum_order_amount or 0) > order_amount:
+            raise PromoCodeError(f"Order amount must be at least {promo.minimum_order_amount}")
+        if promo.max_uses is not None and (promo.uses_count or 0) >= promo.max_uses:
+            raise PromoCodeError("Promo code has reached maximum uses")
+        if promo.is_single_use:
+            used = db.query(PromoCodeUsage.id).filter(
+                PromoCodeUsage.promo_code_id == promo.id,
+                PromoCodeUsage.user_id == user_id
+            ).first()
+            if used:
+                raise PromoCodeError("You have already used this promo code")
+        return promo
+
+    @staticmethod
+    def calculate_discount(promo: PromoCode, order_amount: float) -> float:
+        """Возвращает скидку промокода для суммы заказа."""
+        discount = promo.discount_amount or 0
+        if promo.discount_percent:
+            discount = max(discount, order_amount * (promo.discount_percent / 100))
+        return round(discount, 2)
+
+    @staticmethod
+    def redeem(db: Session, promo: PromoCode, user_id: int, order_id: Optional[int] = None) -> None:
+        """
+        Засчитывает использование промокода в текущей транзакции.
+
+        Для промокода с лимитом счетчик увеличивается одним условным UPDATE
+        (uses_count < max_uses), поэтому параллельные заказы не превысят лимит.
+        Промокоды без лимита считаются в шардированном счетчике: запись идет в
+        случайную строку, и заказы не блокируют друг друга на одной строке.
+        Запись об использовании однократного промокода защищена частичным
+        уникальным индексом ix_promo_code_usages_single_use, поэтому и
+        параллельные заказы одного пользователя не погасят его дважды.
+        Фиксацию транзакции выполняет вызывающий код.
+
+        Args:
+            db: сессия базы данных
+            promo: промокод, полученный из get_valid
+            user_id: ID покупателя
+            order_id: ID заказа, если промокод применяется к заказу
+
+        Raises:
+            PromoCodeError: если лимит исчерпан или пользователь уже использовал промокод
+        """
+        if promo.max_uses is not None:
+            result = db.execute(
+                update(PromoCode)
+                .where(PromoCode.id == promo.id, PromoCode.uses_count < PromoCode.max_uses)
+                .values(uses_count=PromoCode.uses_count + 1)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != 1:
+                raise PromoCodeError("Promo code has reached maximum uses")
+        else:
+            PromoCodeService._increment_shard(db, promo.id)
+
+        values = {"promo_code_id": promo.id, "user_id": user_id, "order_id": order_id}
+        if not promo.is_single_use:
+            db.execute(insert(PromoCodeUsage).values(**values))
+            return
+
+        # Повторное погашение отклоняет уникальный индекс; точка сохранения
+        # откатывает только эту вставку, а не всю транзакцию заказа
+        try:
+            with db.begin_nested():
+                db.execute(insert(PromoCodeUsage).values(**values, is_single_use=True))
+        except IntegrityError:
+            raise PromoCodeError("You have already used this promo code")
+
+    @staticmethod
+    def get_uses_count(db: Session, promo: PromoCode) -> int:
+        """Возвращает общее количество использований с учетом шардированного счетчика."""
+        sharded = db.query(func.coalesce(func.sum(PromoCodeUsageCounter.uses_count), 0))\
+            .filter(PromoCodeUsageCounter.promo_code_id == promo.id).scalar()
+        return (promo.uses_count or 0) + sharded
+
+    @staticmethod
+    def _increment_shard(db: Session, promo_code_id: int) -> None:
+        shard = random.randrange(PromoCodeService.COUNTER_SHARDS)
+        upsert(
+            db, PromoCodeUsageCounter.__table__,
+            {"promo_code_id": promo_code_id, "shard": shard, "uses_count": 1},
+            ["promo_code_id", "shard"], increment=["uses_count"]
+        )
@@ -0,0 +1,106 @@
+from typing import Set
+
+from sqlalchemy import and_, exists, func, select, update
+from sqlalchemy.orm import Session
+
+from ..models.models import Order, OrderItem, Purchase, Rating
+from ..utils.sql import insert_from_select_ignore, insert_ignore
+from .rating_service import RatingService
+
+
+class PurchaseService:
+    """Сервис индекса покупок для подтверждения отзывов."""
+
+    COMPLETED_STATUS = "completed"
+    # Отзывов, проверяемых одним UPDATE при пересчете is_verified_purchase
+    BACKFILL_CHUNK_SIZE = 10_000
+
+    @staticmethod
+    def record_order(db: Session, order: Order) -> None:
+        """
+        Добавляет альбомы завершенного заказа в индекс покупок.
+        
+        Уже известные пары (пользователь, альбом) пропускаются через
+        ON CONFLICT DO NOTHING. Транзакцию фиксирует вызывающий код.
+        
+        Args:
+            db: сессия базы данных
+            order: заказ, переводимый в статус completed
+        """
+        album_ids = {item.album_id for item in order.items if item.album_id is not None}
+        if order.user_id is None or not album_ids:
+            return
+        insert_ignore(db, Purchase.__table__, [
+            {"user_id": order.user_id, "album_id": album_id} for album_id in sorted(album_ids)
+        ], ["user_id", "album_id"])
+
+    @staticmethod
+    def has_purchased(db: Session, user_id: int, album_id: int) -> bool:
+        """
+        Проверяет, купил ли пользователь альбом.
+        
+        Args:
+            db: сессия базы данных
+            user_id: ID пользователя
+            album_id: ID альбома
+            
+        Returns:
+            bool: True, если альбом есть хотя бы в одном завершенном заказе пользователя
+        """
+        return db.get(Purchase, (user_id, album_id)) is not None
+
+    @staticmethod
+    def backfill(db: Session) -> dict:
+        """
+        Восстанавливает индекс покупок и пересчитывает is_verified_purchase всех отзывов.
+        
+        Сначала индекс пополняется одним INSERT ... SELECT по завершенным
+        заказам. Затем отзывы проверяются пачками по диапазонам id: каждая
+        пачка — один UPDATE, который меняет только расходящиеся отзывы и
+        фиксируется отдельной транзакцией. В конце рейтинги затронутых
+        альбомов пересчитываются целиком (RatingService.update_album_rating).
+        
+        Args:
+            db: сессия базы данных
+            
+        Returns:
+            dict: количество проверенных и исправленных отзывов и затронутых альбомов
+        """
+        table = Purchase.__table__
+        completed = select(Order.user_id, OrderItem.album_id).distinct()\
+            .join(OrderItem, OrderItem.order_id == Order.id)\
+            .where(
+                Order.status == PurchaseService.COMPLETED_STATUS,
+                Order.user_id.isnot(None),
+                OrderItem.album_id.isnot(None)
+            )
+        insert_from_select_ignore(db, table, ["user_id", "album_id"], completed, ["user_id", "album_id"])
+        db.commit()
+
+        verified = exists().where(and_(Purchase.user_id == Rating.user_id, Purchase.album_id == Rating.album_id))
+        ratings = Rating.__table__
+        min_id, max_id = db.query(func.min(Rating.id), func.max(Rating.id)).one()
+        checked = 0
+        updated = 0
+        album_ids: Set[int] = set()
+        if min_id is not None:
+            for start in range(min_id, max_id + 1, PurchaseService.BACKFILL_CHUNK_SIZE):
+                end = start + PurchaseService.BACKFILL_CHUNK_SIZE
+                rows = db.execute(
+                    update(ratings)
+                    .where(
+                        ratings.c.id >= start,
+                        ratings.c.id < end,
+                        func.coalesce(ratings.c.is_verified_purchase, False) != verified
+                    )
+                    .values(is_verified_purchase=verified)
+                    .returning(ratings.c.album_id)
+                ).all()
+                db.commit()
+                updated += len(rows)
+                album_ids.update(album_id for album_id, in rows)
+            checked = db.query(func.count(Rating.id)).scalar()
+
+        for album_id in sorted(album_ids):
+            RatingService.update_album_rating(db, album_id)
+        return {"ratings": checked, "ratings_updated": updated, "albums_updated": len(album_ids)}
@@ -0,0 +1,276 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import String, bindparam, cast, delete, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from ..models.models import Album, AlbumRatingAggregate, Rating
+from .rating_service import RatingService
+
+MICROSECONDS_PER_DAY = 86_400_000_000
+
+# Колонка для load_columns: (имя массива, тип NumPy, значение вместо NULL)
+ColumnSpec = Tuple[str, Any, Any]
+
+
+class RatingBatchService:
+    """Пакетный пересчет взвешенных рейтингов всего каталога на NumPy."""
+
+    # Строк, читаемых из БД за раз и записываемых одним executemany
+    CHUNK_SIZE = 50_000
+
+    @staticmethod
+    def round2(values: np.ndarray) -> np.ndarray:
+        """
+        Округляет до 2 знаков так же, как встроенный round.
+
+        np.round умножает на 100 и может разойтись с round для значений,
+        близких к половине сотой; такие значения округляются поштучно.
+        """
+        rounded = np.round(values, 2)
+        scaled = values * 100
+        near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+        for i in np.flatnonzero(near_half):
+            rounded[i] = round(float(values[i]), 2)
+        return rounded
+
+    @staticmethod
+    def calculate_review_quality(helpful: np.ndarray, unhelpful: np.ndarray, length: np.ndarray) -> np.ndarray:
+        """Векторная версия RatingService.calculate_review_quality."""
+        total = helpful + unhelpful
+        with np.errstate(divide="ignore", invalid="ignore"):
+            helpfulness = np.where(total > 0, helpful / total, 0.5)
+            length_score = np.select(
+                [
+                    length <= 0,
+                    length < RatingService.REVIEW_MIN_LENGTH,
+                    length <= RatingService.REVIEW_MAX_LENGTH,
+                ],
+                [
+                    0.0,
+                    length / RatingService.REVIEW_MIN_LENGTH,
+                    1.0,
+                ],
+                RatingService.REVIEW_MAX_LENGTH / length
+            )
+        return RatingBatchService.round2((helpfulness * 0.7) + (length_score * 0.3))
+
+    @staticmethod
+    def calculate_weighted_rating(
+        score: np.ndarray,
+        total_votes: np.ndarray,
+        verified: np.ndarray,
+        quality: np.ndarray,
+        age_days: np.ndarray,
+        manipulation_factor: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Векторная версия RatingService.calculate_weighted_rating (тот же порядок операций)."""
+        weight = np.where(verified, 1.5, 1.0)
+        weight = weight * (1.0 + np.minimum(total_votes / 10.0, 2.0))
+        weight = weight * (1.0 + quality)
+        weight = weight * np.maximum(0.5, 1.0 - (age_days / 365))
+        if manipulation_factor is not None:
+            weight = weight * manipulation_factor
+        return RatingBatchService.round2(score * weight)
+
+    @staticmethod
+    def recompute_all(db: Session, now: Optional[datetime] = None) -> Dict[str, float]:
+        """
+        Пересчитывает quality_score и weighted_score всех отзывов, агрегаты и рейтинги всех альбомов.
+
+        Колонки отзывов читаются пачками в массивы NumPy, веса считаются
+        векторно, а суммы по альбомам — через np.bincount в порядке id отзывов,
+        поэтому результат совпадает с RatingService.update_album_rating.
+        Записываются только изменившиеся отзывы и альбомы, все в одной транзакции.
+        До чтения отзывов запись в ratings и album_rating_aggregates
+        блокируется (см. _lock_for_rebuild), чтобы дельты параллельных записей
+        не потерялись при пересборке агрегатов.
+
+        Args:
+            db: сессия базы данных
+            now: момент, на который считается возраст отзывов
+
+        Returns:
+            Dict[str, float]: количество отзывов, измененных отзывов и альбомов, время работы
+        """
+        started = time.monotonic()
+        now = now or datetime.utcnow()
+        RatingBatchService._lock_for_rebuild(db)
+        columns = RatingBatchService._load_ratings(db)
+        ids = columns["id"]
+
+        # Возраст в днях с округлением вниз, как timedelta.days
+        created = columns["created_at"]
+        age_us = (np.datetime64(now, "us") - created).astype(np.int64)
+        age_days = np.where(np.isnat(created), 0, np.floor_divide(age_us, MICROSECONDS_PER_DAY))
+
+        helpful, unhelpful = columns["helpful_votes"], columns["unhelpful_votes"]
+        quality = RatingBatchService.calculate_review_quality(helpful, unhelpful, columns["review_text_length"])
+        weights = RatingBatchService.calculate_weighted_rating(
+            columns["score"], helpful + unhelpful, columns["verified"], quality, age_days,
+            columns["manipulation_factor"]
+        )
+
+        changed = np.flatnonzero((weights != columns["weighted_score"]) | (quality != columns["quality_score"]))
+        update_rating = update(Rating.__table__)\
+            .where(Rating.__table__.c.id == bindparam("b_id"))\
+            .values(weighted_score=bindparam("b_weighted_score"), quality_score=bindparam("b_quality_score"))
+        RatingBatchService.executemany(db, update_rating, [
+            {"b_id": int(ids[i]), "b_weighted_score": float(weights[i]), "b_quality_score": float(quality[i])}
+            for i in changed
+        ])
+
+        album_ids = RatingBatchService._rebuild_aggregates(db, columns, weights)
+
+        db.commit()
+        if album_ids:
+            RatingService.album_ratings_changed(*album_ids)
+        return {
+            "ratings": int(len(ids)),
+            "ratings_updated": int(len(changed)),
+            "albums_updated": len(album_ids),
+            "elapsed_seconds": round(time.monotonic() - started, 3),
+        }
+
+    @staticmethod
+    def load_columns(db: Session, query, spec: Sequence[ColumnSpec]) -> Dict[str, np.ndarray]:
+        """
+        Читает результат запроса пачками по CHUNK_SIZE строк в массивы NumPy.
+
+        Args:
+            db: сессия базы данных
+            query: SELECT, колонки которого идут в порядке spec
+            spec: имя массива, тип и значение вместо NULL для каждой колонки
+                (None для даты дает NaT)
+
+        Returns:
+            Dict[str, np.ndarray]: массивы колонок по именам из spec
+        """
+        chunks: List[list] = []
+        result = db.connection().execution_options(yield_per=RatingBatchService.CHUNK_SIZE).execute(query)
+        for partition in result.partitions():
+            chunks.append(list(zip(*partition)))
+
+        columns = {}
+        for index, (name, dtype, default) in enumerate(spec):
+            parts = [
+                np.array([default if value is None else value for value in chunk[index]], dtype=dtype)
+                for chunk in chunks
+            ]
+            columns[name] = np.concatenate(parts) if parts else np.array([], dtype=dtype)
+        return columns
+
+    @staticmethod
+    def _lock_for_rebuild(db: Session) -> None:
+        """
+        Блокирует запись отзывов и агрегатов до конца транзакции и очищает агрегаты.
+
+        В PostgreSQL таблицы блокируются в порядке ratings, album_rating_aggregates
+        (в том же порядке их меняют записи дельтами, поэтому взаимоблокировок
+        нет), чтение при этом не блокируется. В SQLite первый DELETE берет
+        блокировку базы на запись.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text(
+                f"LOCK TABLE {Rating.__tablename__}, {AlbumRatingAggregate.__tablename__} IN SHARE ROW EXCLUSIVE MODE"
+            ))
+        db.execute(delete(AlbumRatingAggregate))
+
+    @staticmethod
+    def _load_ratings(db: Session) -> Dict[str, np.ndarray]:
+        query = select(
+            Rating.id,
+            Rating.album_id,
+            Rating.score,
+            Rating.is_verified_purchase,
+            Rating.helpful_votes,
+            Rating.unhelpful_votes,
+            Rating.review_text_length,
+            # Строку ISO NumPy разбирает на порядок быстрее, чем объекты datetime
+            cast(Rating.created_at, String),
+            Rating.weighted_score,
+            Rating.quality_score,
+            Rating.manipulation_factor
+        ).where(
+            Rating.score.between(RatingService.MIN_RATING, RatingService.MAX_RATING)
+        ).order_by(Rating.id)
+        return RatingBatchService.load_columns(db, query, (
+            ("id", np.int64, 0),
+            ("album_id", np.int64, 0),
+            ("score", np.int64, 0),
+            ("verified", bool, False),
+            ("helpful_votes", np.int64, 0),
+            ("unhelpful_votes", np.int64, 0),
+            ("review_text_length", np.int64, 0),
+            ("created_at", "datetime64[us]", None),
+            ("weighted_score", np.float64, 0.0),
+            ("quality_score", np.float64, 0.0),
+            ("manipulation_factor", np.float64, 1.0),
+        ))
+
+    @staticmethod
+    def _rebuild_aggregates(db: Session, columns: Dict[str, np.ndarray], weights: np.ndarray) -> List[int]:
+        """Пересобирает album_rating_aggregates и возвращает id альбомов, чей рейтинг изменился."""
+        album_index, inverse = np.unique(columns["album_id"], return_inverse=True)
+        size = len(album_index)
+        weighted_sum = np.bincount(inverse, weights=weights, minlength=size)
+
+        scores = range(RatingService.MIN_RATING, RatingService.MAX_RATING + 1)
+        counts, verified_counts = {}, {}
+        for score in scores:
+            mask = columns["score"] == score
+            counts[score] = np.bincount(inverse[mask], minlength=size)
+            verified_counts[score] = np.bincount(inverse[mask & columns["verified"]], minlength=size)
+        rating_count = sum(counts.values())
+        verified_count = sum(verified_counts.values())
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weighted_rating = np.where(
+                rating_count > 0,
+                RatingBatchService.round2(weighted_sum / np.maximum(rating_count, 1)),
+                0.0
+            )
+
+        RatingBatchService.executemany(db, insert(AlbumRatingAggregate.__table__), [
+            {
+                "album_id": int(album_id),
+                **{f"score_{score}": int(counts[score][i]) for score in scores},
+                **{f"verified_score_{score}": int(verified_counts[score][i]) for score in scores},
+                "weighted_sum": float(weighted_sum[i]),
+            }
+            for i, album_id in enumerate(album_index)
+        ])
+
+        # Альбомы без отзывов получают нулевой рейтинг
+        new_values = {
+            int(album_id): (float(weighted_rating[i]), int(rating_count[i]), int(verified_count[i]))
+            for i, album_id in enumerate(album_index)
+        }
+        changed = []
+        for album_id, *current in db.execute(
+            select(Album.id, Album.weighted_rating, Album.rating_count, Album.verified_rating_count)
+        ):
+            values = new_values.get(album_id, (0.0, 0, 0))
+            if tuple(current) != values:
+                changed.append({
+                    "b_id": album_id,
+                    "b_weighted_rating": values[0],
+                    "b_rating_count": values[1],
+                    "b_verified_rating_count": values[2],
+                })
+
+        albums = Album.__table__
+        RatingBatchService.executemany(db, update(albums).where(albums.c.id == bindparam("b_id")).values(
+            weighted_rating=bindparam("b_weighted_rating"),
+            rating_count=bindparam("b_rating_count"),
+            verified_rating_count=bindparam("b_verified_rating_count"),
+            version=albums.c.version + 1
+        ), changed)
+        return [row["b_id"] for row in changed]
+
+    @staticmethod
+    def executemany(db: Session, statement, rows: List[dict]) -> None:
+        """Выполняет statement для строк пачками по CHUNK_SIZE."""
+        for start in range(0, len(rows), RatingBatchService.CHUNK_SIZE):
+            db.execute(statement, rows[start:start + RatingBatchService.CHUNK_SIZE])
@@ -1,9 +1,18 @@
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from ..models.models import Rating, Album, User, RatingVote
+from sqlalchemy import bindparam, func, and_, update
+from ..models.models import Rating, Album, AlbumRatingAggregate, User, RatingVote
 from ..schemas.schemas import RatingCreate, AlbumRatingStats, UserRatingStats
+from ..utils.cache import invalidate_albums
+from .leaderboard_service import leaderboards
+from ..utils.sql import insert_ignore, upsert
+
+# Вклад отзыва в агрегаты альбома: (оценка, подтвержденная покупка, weighted_score)
+RatingState = Tuple[int, bool, float]
+# Голос за полезность отзыва: (rating_id, user_id, is_helpful)
+VoteState = Tuple[int, int, bool]
 
 class RatingService:
     """Сервис для работы с рейтингами и отзывами."""
@@ -12,6 +21,7 @@ class RatingService:
     REVIEW_MAX_LENGTH = 2000
     MAX_RATING = 5
     MIN_RATING = 1
+    VOTE_INSERT_CHUNK = 5000  # Голосов в одном многострочном INSERT
 
     @staticmethod
     def calculate_weighted_rating(
@@ -19,7 +29,8 @@ class RatingService:
         total_votes: int,
         verified_purchase: bool,
         review_quality: float,
-        age_days: int
+        age_days: int,
+        manipulation_factor: float = 1.0
     ) -> float:
         """
         Вычисляет взвешенный рейтинг с учетом различных факторов.
@@ -30,6 +41,7 @@ class RatingService:
             verified_purchase: является ли покупателем
             review_quality: качество отзыва (0-1)
             age_days: возраст отзыва в днях
+            manipulation_factor: понижающий множитель для подозрительных отзывов (0-1)
         
         Returns:
             float: взвешенный рейтинг
@@ -58,6 +70,9 @@ class RatingService:
         age_penalty = max(0.5, 1.0 - (age_days / 365))  # Максимальное снижение веса на 50%
         weight *= age_penalty
         
+        # Понижаем вес отзывов, помеченных как накрутка (ManipulationService)
+        weight *= manipulation_factor
+        
         return round(rating * weight, 2)
 
     @staticmethod
@@ -101,6 +116,208 @@ class RatingService:
         # Общая оценка качества (70% полезность, 30% длина)
         return round((helpfulness * 0.7) + (length_score * 0.3), 2)
 
+    @staticmethod
+    def rating_quality(rating: Rating) -> float:
+        """Вычисляет качество отзыва по его текущим голосам и длине текста."""
+        return RatingService.calculate_review_quality(
+            rating.helpful_votes or 0,
+            rating.unhelpful_votes or 0,
+            rating.review_text_length or 0
+        )
+
+    @staticmethod
+    def calculate_rating_weight(rating: Rating, now: Optional[datetime] = None) -> float:
+        """
+        Вычисляет вклад отзыва во взвешенный рейтинг альбома.
+        
+        Args:
+            rating: отзыв; для еще не сохраненного отзыва возраст считается нулевым
+            now: момент, на который считается возраст отзыва
+            
+        Returns:
+            float: взвешенная оценка отзыва
+        """
+        now = now or datetime.utcnow()
+        helpful, unhelpful = rating.helpful_votes or 0, rating.unhelpful_votes or 0
+        quality = RatingService.rating_quality(rating)
+        age_days = (now - rating.created_at).days if rating.created_at else 0
+        manipulation_factor = rating.manipulation_factor
+        return RatingService.calculate_weighted_rating(
+            rating.score,
+            helpful + unhelpful,
+            bool(rating.is_verified_purchase),
+            quality,
+            age_days,
+            1.0 if manipulation_factor is None else manipulation_factor
+        )
+
+    @staticmethod
+    def rating_state(rating: Rating) -> RatingState:
+        """Возвращает текущий вклад отзыва в агрегаты альбома."""
+        return rating.score, bool(rating.is_verified_purchase), rating.weighted_score or 0.0
+
+    @staticmethod
+    def record_rating_change(db: Session, rating: Rating, old: Optional[RatingState] = None) -> None:
+        """
+        Пересчитывает quality_score и weighted_score отзыва и применяет изменение
+        к агрегатам альбома.
+        
+        Args:
+            db: сессия базы данных
+            rating: новый или измененный отзыв
+            old: вклад отзыва до изменения, полученный из rating_state (None для нового отзыва)
+        """
+        rating.quality_score = RatingService.rating_quality(rating)
+        rating.weighted_score = RatingService.calculate_rating_weight(rating)
+        db.flush()
+        RatingService.apply_rating_change(db, rating.album_id, old, RatingService.rating_state(rating))
+
+    @staticmethod
+    def apply_rating_change(
+        db: Session,
+        album_id: int,
+        old: Optional[RatingState],
+        new: Optional[RatingState]
+    ) -> None:
+        """
+        Применяет изменение одного отзыва к агрегатам альбома за O(1).
+        
+        Счетчики и сумма весов в album_rating_aggregates меняются одним UPSERT
+        на дельту, затем одним UPDATE обновляются рейтинговые колонки альбома.
+        Транзакцию фиксирует вызывающий код, после фиксации нужно вызвать
+        RatingService.album_ratings_changed(album_id).
+        
+        Args:
+            db: сессия базы данных
+            album_id: ID альбома
+            old: вклад отзыва до изменения (None для нового отзыва)
+            new: вклад отзыва после изменения (None для удаленного отзыва)
+        """
+        deltas = RatingService._empty_aggregate()
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            score, verified, weighted_score = state
+            deltas[f"score_{score}"] += sign
+            if verified:
+                deltas[f"verified_score_{score}"] += sign
+            deltas["weighted_sum"] += sign * weighted_score
+        RatingService.apply_aggregate_deltas(db, album_id, deltas)
+
+    @staticmethod
+    def album_ratings_changed(*album_ids: int) -> None:
+        """Сбрасывает кеш альбомов и обновляет их позиции в чартах после фиксации транзакции."""
+        invalidate_albums(*album_ids)
+        leaderboards.mark_dirty(*album_ids)
+
+    @staticmethod
+    def apply_aggregate_deltas(db: Session, album_id: int, deltas: Dict[str, float]) -> None:
+        """
+        Прибавляет дельты к колонкам album_rating_aggregates и обновляет рейтинг альбома.
+        
+        Args:
+            db: сессия базы данных
+            album_id: ID альбома
+            deltas: изменения колонок агрегата, например {"weighted_sum": 0.4}
+        """
+        aggregate = upsert(
+            db, AlbumRatingAggregate.__table__, {"album_id": album_id, **deltas}, ["album_id"], increment=deltas
+        )
+        RatingService._store_album_rating(db, album_id, aggregate)
+
+    @staticmethod
+    def apply_votes(db: Session, votes: List[VoteState]) -> int:
+        """
+        Записывает пачку голосов за полезность отзывов в одной транзакции.
+        
+        Голоса вставляются с ON CONFLICT DO NOTHING по уникальному индексу
+        (user_id, rating_id), поэтому повторные голоса отбрасываются базой.
+        Счетчики helpful_votes/unhelpful_votes увеличиваются одним UPDATE на
+        отзыв, quality_score отзывов пересчитывается, а изменение весов отзывов применяется к агрегатам альбомов одной
+        дельтой на альбом.
+        
+        Args:
+            db: сессия базы данных
+            votes: голоса (rating_id, user_id, is_helpful) без повторов
+            
+        Returns:
+            int: количество записанных голосов
+        """
+        table = RatingVote.__table__
+        inserted = []
+        for start in range(0, len(votes), RatingService.VOTE_INSERT_CHUNK):
+            chunk = votes[start:start + RatingService.VOTE_INSERT_CHUNK]
+            inserted.extend(
+                (row["rating_id"], row["is_helpful"])
+                for row in insert_ignore(db, table, [
+                    {"rating_id": rating_id, "user_id": user_id, "is_helpful": is_helpful}
+                    for rating_id, user_id, is_helpful in chunk
+                ], ["user_id", "rating_id"])
+            )
+        if not inserted:
+            db.commit()
+            return 0
+            
+        counts: Dict[int, List[int]] = {}
+        for rating_id, is_helpful in inserted:
+            counts.setdefault(rating_id, [0, 0])[0 if is_helpful else 1] += 1
+        ratings = Rating.__table__
+        db.execute(
+            update(ratings)
+            .where(ratings.c.id == bindparam("b_id"))
+            .values(
+                helpful_votes=func.coalesce(ratings.c.helpful_votes, 0) + bindparam("b_helpful"),
+                unhelpful_votes=func.coalesce(ratings.c.unhelpful_votes, 0) + bindparam("b_unhelpful")
+            ),
+            [{"b_id": rating_id, "b_helpful": h, "b_unhelpful": u} for rating_id, (h, u) in counts.items()]
+        )
+        
+        # Голоса меняют качество отзывов, а значит и их вес в рейтинге альбомов
+        weight_deltas: Dict[int, float] = {}
+        now = datetime.utcnow()
+        for rating in db.query(Rating).filter(Rating.id.in_(list(counts))):
+            rating.quality_score = RatingService.rating_quality(rating)
+            weighted_score = RatingService.calculate_rating_weight(rating, now)
+            if weighted_score != rating.weighted_score:
+                weight_deltas[rating.album_id] = weight_deltas.get(rating.album_id, 0.0) \
+                    + weighted_score - (rating.weighted_score or 0.0)
+                rating.weighted_score = weighted_score
+        db.flush()
+        for album_id, delta in weight_deltas.items():
+            RatingService.apply_aggregate_deltas(db, album_id, {"weighted_sum": delta})
+        db.commit()
+        
+        if weight_deltas:
+            RatingService.album_ratings_changed(*weight_deltas)
+        return len(inserted)
+
+    @staticmethod
+    def _empty_aggregate() -> Dict[str, float]:
+        aggregate: Dict[str, float] = {"weighted_sum": 0.0}
+        for score in range(RatingService.MIN_RATING, RatingService.MAX_RATING + 1):
+            aggregate[f"score_{score}"] = 0
+            aggregate[f"verified_score_{score}"] = 0
+        return aggregate
+
+    @staticmethod
+    def _store_album_rating(db: Session, album_id: int, aggregate: Dict[str, float]) -> None:
+        """Переносит агрегаты в рейтинговые колонки альбома."""
+        scores = range(RatingService.MIN_RATING, RatingService.MAX_RATING + 1)
+        rating_count = sum(aggregate[f"score_{score}"] for score in scores)
+        verified_count = sum(aggregate[f"verified_score_{score}"] for score in scores)
+        weighted_rating = round(aggregate["weighted_sum"] / rating_count, 2) if rating_count else 0.0
+        db.execute(
+            update(Album)
+            .where(Album.id == album_id)
+            .values(
+                weighted_rating=weighted_rating,
+                rating_count=rating_count,
+                verified_rating_count=verified_count,
+                version=Album.version + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+
     @staticmethod
     def get_album_rating_stats(db: Session, album_id: int) -> AlbumRatingStats:
         """
@@ -119,54 +336,40 @@ class RatingService:
         if album_id < 1:
             raise ValueError("Album ID must be positive")
             
-        # Получаем все рейтинги альбома
-        ratings = db.query(Rating).filter(
-            Rating.album_id == album_id
-        ).all()
-        
-        if not ratings:
-            return AlbumRatingStats(
-                album_id=album_id,
-                weighted_rating=0.0,
-                rating_count=0,
-                verified_rating_count=0,
-                rating_distribution={1: 0, 2: 0, 3: 0, 4: 0, 5: 0},
-                verified_rating_distribution={1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-            )
-            
-        # Подсчет распределения оценок
+        # Распределение оценок считается в БД одним GROUP BY
         distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
         verified_distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+        rating_count = 0
         verified_count = 0
-        weighted_sum = 0.0
-        total_weight = 0.0
-        
-        for r in ratings:
+        for score, verified, count in db.query(
+            Rating.score, Rating.is_verified_purchase, func.count(Rating.id)
+        ).filter(Rating.album_id == album_id).group_by(Rating.score, Rating.is_verified_purchase):
+            rating_count += count
             # Проверяем валидность оценки
-            if not RatingService.MIN_RATING <= r.score <= RatingService.MAX_RATING:
+            if not RatingService.MIN_RATING <= score <= RatingService.MAX_RATING:
                 continue
-                
-            # Обновляем распределение
-            distribution[r.score] = distribution.get(r.score, 0) + 1
-            if r.is_verified_purchase:
-                verified_distribution[r.score] = verified_distribution.get(r.score, 0) + 1
-                verified_count += 1
-                
-            # Считаем взвешенный рейтинг
-            age_days = (datetime.utcnow() - r.created_at).days
-            quality = RatingService.calculate_review_quality(
-                r.helpful_votes, 
-                r.unhelpful_votes,
-                r.review_text_length
-            )
-            weight = RatingService.calculate_weighted_rating(
-                r.score,
-                r.helpful_votes + r.unhelpful_votes,
-                r.is_verified_purchase,
-                quality,
-                age_days
-            )
-            weighted_sum += weight
+            distribution[score] += count
+            if verified:
+                verified_distribution[score] += count
+                verified_count += count
+            
+        # Для взвешенного рейтинга читаем только нужные колонки, без ORM-объектов
+        weighted_sum = 0.0
+        total_weight = 0
+        now = datetime.utcnow()
+        for r in db.query(
+            Rating.score,
+            Rating.is_verified_purchase,
+            Rating.helpful_votes,
+            Rating.unhelpful_votes,
+            Rating.review_text_length,
+            Rating.created_at,
+            Rating.manipulation_factor
+        ).filter(
+            Rating.album_id == album_id,
+            Rating.score.between(RatingService.MIN_RATING, RatingService.MAX_RATING)
+        ).order_by(Rating.id):
+            weighted_sum += RatingService.calculate_rating_weight(r, now)
             total_weight += 1
             
         weighted_rating = weighted_sum / total_weight if total_weight > 0 else 0
@@ -174,7 +377,7 @@ class RatingService:
         return AlbumRatingStats(
             album_id=album_id,
             weighted_rating=round(weighted_rating, 2),
-            rating_count=len(ratings),
+            rating_count=rating_count,
             verified_rating_count=verified_count,
             rating_distribution=distribution,
             verified_rating_distribution=verified_distribution
@@ -198,38 +401,27 @@ class RatingService:
         if user_id < 1:
             raise ValueError("User ID must be positive")
             
-        # Получаем все рейтинги пользователя с оптимизированным запросом
-        ratings = db.query(Rating).filter(
-            Rating.user_id == user_id
-        ).all()
-        
-        if not ratings:
-            return UserRatingStats(
-                user_id=user_id,
-                total_ratings=0,
-                average_rating=0.0,
-                rating_distribution={1: 0, 2: 0, 3: 0, 4: 0, 5: 0},
-                helpful_votes_received=0,
-                total_review_length=0
-            )
-            
-        # Подсчет статистики
+        # Распределение и суммы считаются в БД одним GROUP BY
         distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
         total_score = 0
         total_helpful_votes = 0
         total_length = 0
         valid_ratings = 0
         
-        for r in ratings:
-            # Проверяем валидность оценки
-            if not RatingService.MIN_RATING <= r.score <= RatingService.MAX_RATING:
-                continue
-                
-            distribution[r.score] = distribution.get(r.score, 0) + 1
-            total_score += r.score
-            total_helpful_votes += r.helpful_votes
-            total_length += r.review_text_length
-            valid_ratings += 1
+        for score, count, helpful_votes, length in db.query(
+            Rating.score,
+            func.count(Rating.id),
+            func.coalesce(func.sum(Rating.helpful_votes), 0),
+            func.coalesce(func.sum(Rating.review_text_length), 0)
+        ).filter(
+            Rating.user_id == user_id,
+            Rating.score.between(RatingService.MIN_RATING, RatingService.MAX_RATING)
+        ).group_by(Rating.score):
+            distribution[score] = count
+            total_score += score * count
+            total_helpful_votes += helpful_votes
+            total_length += length
+            valid_ratings += count
             
         average_rating = round(total_score / valid_ratings, 2) if valid_ratings > 0 else 0.0
             
@@ -243,26 +435,69 @@ class RatingService:
         )
 
     @staticmethod
-    def update_album_rating(db: Session, album_id: int) -> None:
+    def update_album_rating(db: Session, album_id: int) -> Dict[str, float]:
         """
-        Обновляет рейтинг альбома на основе всех отзывов.
+        Полностью пересчитывает рейтинг альбома по всем отзывам.
+        
+        Обычные записи обновляют рейтинг дельтами (apply_rating_change); этот
+        метод восстанавливает агрегаты с нуля и заново считает quality_score и
+        weighted_score каждого отзыва с текущим возрастом. Используется для исправления
+        расхождений и учета старения отзывов.
+        
+        Перед чтением отзывов блокируются отзывы альбома и строка агрегата в
+        том же порядке, что и у записей дельтами, поэтому параллельная дельта
+        либо уже видна пересчету, либо применяется поверх него после фиксации.
         
         Args:
             db: сессия базы данных
             album_id: ID альбома
             
+        Returns:
+            Dict[str, float]: отчет в формате RatingBatchService.recompute_all
+            
         Raises:
             ValueError: если album_id отрицательный
         """
         if album_id < 1:
             raise ValueError("Album ID must be positive")
             
-        stats = RatingService.get_album_rating_stats(db, album_id)
+        started = time.monotonic()
+        report = {"ratings": 0, "ratings_updated": 0, "albums_updated": 0, "elapsed_seconds": 0.0}
+        current = db.query(Album.weighted_rating, Album.rating_count, Album.verified_rating_count)\
+            .filter(Album.id == album_id).first()
+        if current is None:
+            return report
         
-        # Обновляем информацию в БД с оптимистичной блокировкой
-        album = db.query(Album).filter(Album.id == album_id).with_for_update().first()
-        if album:
-            album.weighted_rating = stats.weighted_rating
-            album.rating_count = stats.rating_count
-            album.verified_rating_count = stats.verified_rating_count
-            db.commit()
+        # В PostgreSQL — блокировки строк; в SQLite upsert берет блокировку
+        # базы на запись до конца транзакции
+        db.query(Rating.id).filter(Rating.album_id == album_id).with_for_update().all()
+        table = AlbumRatingAggregate.__table__
+        upsert(db, table, {"album_id": album_id, "weighted_sum": 0.0}, ["album_id"], increment=["weighted_sum"])
+            
+        aggregate = RatingService._empty_aggregate()
+        now = datetime.utcnow()
+        for r in db.query(Rating).filter(Rating.album_id == album_id).order_by(Rating.id).populate_existing():
+            if not RatingService.MIN_RATING <= r.score <= RatingService.MAX_RATING:
+                continue
+            quality_score = RatingService.rating_quality(r)
+            weighted_score = RatingService.calculate_rating_weight(r, now)
+            if (quality_score, weighted_score) != (r.quality_score, r.weighted_score):
+                r.quality_score = quality_score
+                r.weighted_score = weighted_score
+                report["ratings_updated"] += 1
+            report["ratings"] += 1
+            aggregate[f"score_{r.score}"] += 1
+            if r.is_verified_purchase:
+                aggregate[f"verified_score_{r.score}"] += 1
+            aggregate["weighted_sum"] += r.weighted_score
+        db.flush()
+        
+        upsert(db, table, {"album_id": album_id, **aggregate}, ["album_id"])
+        RatingService._store_album_rating(db, album_id, aggregate)
+        stored = db.query(Album.weighted_rating, Album.rating_count, Album.verified_rating_count)\
+            .filter(Album.id == album_id).one()
+        db.commit()
+        RatingService.album_ratings_changed(album_id)
+        report["albums_updated"] = int(tuple(stored) != tuple(current))
+        report["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        return report
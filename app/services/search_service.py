@@ -0,0 +1,172 @@
+from typing import List
+
+from sqlalchemy import Float, Integer, or_, text, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+
+from ..models.models import Album, Artist
+
+
+class SearchService:
+    """Сервис полнотекстового поиска по каталогу альбомов."""
+
+    # Триграммный токенизатор FTS5 работает только для запросов от 3 символов
+    MIN_QUERY_LENGTH = 3
+    FTS_TABLE = "albums_fts"
+
+    _SQLITE_DDL: List[str] = [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+        USING fts5(title, genre, artist_name, tokenize='trigram')
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS albums_fts_ai AFTER INSERT ON albums BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, genre, artist_name)
+            VALUES (
+                new.id, new.title, new.genre,
+                (SELECT name FROM artists WHERE id = new.artist_id)
+            );
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS albums_fts_au
+        AFTER UPDATE OF title, genre, artist_id ON albums BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            INSERT INTO {FTS_TABLE}(rowid, title, genre, artist_name)
+            VALUES (
+                new.id, new.title, new.genre,
+                (SELECT name FROM artists WHERE id = new.artist_id)
+            );
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS albums_fts_ad AFTER DELETE ON albums BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS artists_fts_au AFTER UPDATE OF name ON artists BEGIN
+            UPDATE {FTS_TABLE} SET artist_name = new.name
+            WHERE rowid IN (SELECT id FROM albums WHERE artist_id = new.id);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS artists_fts_ad AFTER DELETE ON artists BEGIN
+            UPDATE {FTS_TABLE} SET artist_name = NULL
+            WHERE rowid IN (SELECT id FROM albums WHERE artist_id = old.id);
+        END
+        """,
+    ]
+
+    _POSTGRES_DDL: List[str] = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_albums_title_trgm ON albums USING gin (title gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_albums_genre_trgm ON albums USING gin (genre gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_artists_name_trgm ON artists USING gin (name gin_trgm_ops)",
+    ]
+
+    @staticmethod
+    def ensure_search_index(engine: Engine) -> None:
+        """
+        Создает поисковый индекс и триггеры синхронизации, если их еще нет.
+
+        Для SQLite это виртуальная таблица FTS5 с триграммным токенизатором,
+        которая поддерживается в актуальном состоянии триггерами на таблицах
+        albums и artists. При первом создании индекс заполняется из каталога.
+        Для PostgreSQL создаются GIN-индексы pg_trgm, которые ускоряют ILIKE.
+
+        Args:
+            engine: движок базы данных
+        """
+        dialect = engine.dialect.name
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": SearchService.FTS_TABLE},
+                ).first() is not None
+                for ddl in SearchService._SQLITE_DDL:
+                    conn.execute(text(ddl))
+                if not exists:
+                    SearchService._populate_sqlite_index(conn)
+            elif dialect == "postgresql":
+                for ddl in SearchService._POSTGRES_DDL:
+                    conn.execute(text(ddl))
+
+    @staticmethod
+    def rebuild_search_index(engine: Engine) -> None:
+        """
+        Полностью перестраивает поисковый индекс SQLite из таблиц каталога.
+
+        Args:
+            engine: движок базы данных
+        """
+        if engine.dialect.name != "sqlite":
+            return
+        with engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {SearchService.FTS_TABLE}"))
+            SearchService._populate_sqlite_index(conn)
+
+    @staticmethod
+    def _populate_sqlite_index(conn) -> None:
+        conn.execute(text(f"""
+            INSERT INTO {SearchService.FTS_TABLE}(rowid, title, genre, artist_name)
+            SELECT albums.id, albums.title, albums.genre, artists.name
+            FROM albums LEFT JOIN artists ON artists.id = albums.artist_id
+        """))
+
+    @staticmethod
+    def apply_album_search(db: Session, query: Query, search: str, rank: bool = False) -> Query:
+        """
+        Ограничивает запрос альбомов результатами поиска по названию, жанру и имени артиста.
+
+        Args:
+            db: сессия базы данных
+            query: запрос по Album
+            search: поисковая строка
+            rank: сортировать ли результаты по релевантности
+
+        Returns:
+            Query: отфильтрованный (и при rank=True отсортированный) запрос
+        """
+        dialect = db.get_bind().dialect.name
+
+        if dialect == "sqlite" and len(search) >= SearchService.MIN_QUERY_LENGTH:
+            # Строка передается как одна фраза FTS5, чтобы сохранить поиск по подстроке
+            phrase = '"' + search.replace('"', '""') + '"'
+            matches = text(
+                f"SELECT rowid AS album_id, bm25({SearchService.FTS_TABLE}) AS rank "
+                f"FROM {SearchService.FTS_TABLE} WHERE {SearchService.FTS_TABLE} MATCH :phrase"
+            ).bindparams(phrase=phrase).columns(album_id=Integer, rank=Float)
+            matches = matches.subquery("fts_matches")
+            query = query.join(matches, matches.c.album_id == Album.id)
+            if rank:
+                # bm25 возвращает отрицательные значения: чем меньше, тем релевантнее
+                query = query.order_by(matches.c.rank.asc(), Album.id.asc())
+            return query
+
+        # Короткие запросы и остальные СУБД: ILIKE (на PostgreSQL ускоряется pg_trgm)
+        pattern = f"%{search}%"
+        query = query.outerjoin(Artist, Artist.id == Album.artist_id).filter(
+            or_(
+                Album.title.ilike(pattern),
+                Album.genre.ilike(pattern),
+                Artist.name.ilike(pattern),
+            )
+        )
+        if rank:
+            if dialect == "postgresql":
+                similarity = func.greatest(
+                    func.similarity(Album.title, search),
+                    func.similarity(Album.genre, search),
+                    func.coalesce(func.similarity(Artist.name, search), 0),
+                )
+                query = query.order_by(similarity.desc(), Album.id.asc())
+            else:
+                # Без индекса релевантности точные совпадения названия идут первыми
+                query = query.order_by(
+                    (func.lower(Album.title) == search.lower()).desc(),
+                    Album.title.ilike(pattern).desc(),
+                    Album.id.asc(),
+                )
+        return query
@@ -0,0 +1,153 @@
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..models.models import User
+from ..schemas.schemas import CatalogImportError, UserCreate, UserImportReport
+from ..utils.security import get_password_hash
+from .catalog_import import ImportRow
+
+
+class UserImportService:
+    """Сервис массового создания пользователей (перенос аккаунтов из другого магазина)."""
+
+    MAX_REPORTED_ERRORS = 1000
+
+    @staticmethod
+    def import_rows(
+        db: Session,
+        rows: Iterable[ImportRow],
+        batch_size: int = 1000,
+        workers: Optional[int] = None
+    ) -> UserImportReport:
+        """
+        Создает пользователей пачками, каждая пачка в отдельной транзакции.
+
+        Записи читаются потоком (например, CatalogImportService.read_csv с
+        колонками username, email, password и необязательной is_active).
+        Уникальность username и email в пачке проверяется одним запросом,
+        пароли хешируются bcrypt параллельно в пуле процессов на всех ядрах,
+        пользователи вставляются одним многострочным INSERT. Администраторами
+        импортированные пользователи не становятся. Ошибки отдельных строк
+        попадают в отчет и не прерывают импорт.
+
+        Args:
+            db: сессия базы данных
+            rows: записи пользователей
+            batch_size: количество записей в одной транзакции
+            workers: количество процессов хеширования (по умолчанию число ядер)
+
+        Returns:
+            UserImportReport: отчет об импорте
+        """
+        report = UserImportReport()
+        started = time.monotonic()
+        workers = workers or os.cpu_count() or 1
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batch: List[ImportRow] = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    UserImportService._import_batch(db, batch, report, pool, workers)
+                    batch = []
+            if batch:
+                UserImportService._import_batch(db, batch, report, pool, workers)
+
+        report.elapsed_seconds = round(time.monotonic() - started, 3)
+        if report.elapsed_seconds > 0:
+            report.rows_per_second = round(report.rows_total / report.elapsed_seconds, 1)
+        return report
+
+    @staticmethod
+    def _add_error(report: UserImportReport, line: int, error: str) -> None:
+        report.rows_failed += 1
+        if len(report.errors) < UserImportService.MAX_REPORTED_ERRORS:
+            report.errors.append(CatalogImportError(line=line, error=error))
+
+    @staticmethod
+    def _validation_message(e: ValidationError) -> str:
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+        )
+
+    @staticmethod
+    def _import_batch(
+        db: Session,
+        batch: List[ImportRow],
+        report: UserImportReport,
+        pool: Executor,
+        workers: int
+    ) -> None:
+        report.rows_total += len(batch)
+
+        users: Dict[int, UserCreate] = {}
+        is_active: Dict[int, bool] = {}
+        usernames: Set[str] = set()
+        emails: Set[str] = set()
+        for line, record in batch:
+            if "_error" in record:
+                UserImportService._add_error(report, line, record["_error"])
+                continue
+            try:
+                user = UserCreate.model_validate(record)
+            except ValidationError as e:
+                UserImportService._add_error(report, line, UserImportService._validation_message(e))
+                continue
+            if user.username in usernames or user.email in emails:
+                UserImportService._add_error(report, line, "Duplicate email or username in file")
+                continue
+            usernames.add(user.username)
+            emails.add(user.email)
+            users[line] = user
+            is_active[line] = str(record.get("is_active", "true")).lower() not in ("0", "false", "no")
+
+        if not users:
+            return
+
+        # Один запрос на пачку вместо проверки каждого пользователя
+        taken_usernames: Set[str] = set()
+        taken_emails: Set[str] = set()
+        for username, email in db.query(User.username, User.email).filter(
+            or_(User.username.in_(list(usernames)), User.email.in_(list(emails)))
+        ):
+            taken_usernames.add(username)
+            taken_emails.add(email)
+        for line, user in list(users.items()):
+            if user.username in taken_usernames or user.email in taken_emails:
+                UserImportService._add_error(report, line, "Email or username already registered")
+                del users[line]
+
+        if not users:
+            return
+
+        # bcrypt занимает процессор ~250 мс на пароль, поэтому хешируем на всех ядрах
+        passwords = [user.password for user in users.values()]
+        chunksize = max(1, len(passwords) // (workers * 4))
+        hashes = list(pool.map(get_password_hash, passwords, chunksize=chunksize))
+
+        values = [
+            {
+                "username": user.username,
+                "email": user.email,
+                "hashed_password": hashed_password,
+                "is_active": is_active[line],
+                "is_admin": False,
+            }
+            for (line, user), hashed_password in zip(users.items(), hashes)
+        ]
+        try:
+            db.execute(insert(User), values)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            for line in users:
+                UserImportService._add_error(report, line, f"Batch rolled back: {e.__class__.__name__}")
+            return
+        report.users_created += len(values)
@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from ..core.config import settings
+from ..models.database import SessionLocal
+from .rating_service import RatingService
+
+logger = logging.getLogger(__name__)
+
+# Голос в буфере: (user_id, rating_id) -> is_helpful
+PendingVotes = Dict[Tuple[int, int], bool]
+
+
+class VoteBuffer:
+    """
+    Буфер голосов за полезность отзывов с отложенной записью.
+
+    Голоса накапливаются в памяти и записываются фоновым потоком пачками
+    (RatingService.apply_votes) раз в flush_interval секунд или досрочно,
+    когда в буфере набирается max_batch голосов. При остановке приложения
+    буфер записывается полностью.
+
+    Голоса уже подтверждены клиентам, поэтому при временной ошибке БД
+    (блокировка, потеря соединения) пачка возвращается в буфер и запись
+    повторяется с экспоненциальной паузой до max_backoff секунд. При
+    постоянной ошибке пачка делится пополам, пока не останутся голоса,
+    которые записать нельзя (например, за удаленный отзыв); отбрасываются
+    только они.
+    """
+
+    # Попыток записи оставшихся голосов при остановке
+    STOP_FLUSH_ATTEMPTS = 5
+
+    def __init__(self, flush_interval: float, max_batch: int, max_backoff: float = 30.0):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_backoff = max_backoff
+        self._pending: PendingVotes = {}
+        self._failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, rating_id: int, user_id: int, is_helpful: bool) -> bool:
+        """
+        Добавляет голос в буфер.
+
+        Args:
+            rating_id: ID отзыва
+            user_id: ID голосующего пользователя
+            is_helpful: полезен ли отзыв
+
+        Returns:
+            bool: False, если голос этого пользователя за отзыв уже ожидает записи
+        """
+        key = (user_id, rating_id)
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending[key] = is_helpful
+            full = len(self._pending) >= self.max_batch
+        if self.flush_interval <= 0 or self._thread is None:
+            self.flush()
+        elif full:
+            self._wake.set()
+        return True
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Записывает накопленные голоса одной транзакцией.
+
+        Args:
+            force: писать, не дожидаясь конца паузы после временной ошибки
+
+        Returns:
+            int: количество записанных голосов (без отброшенных повторов)
+        """
+        with self._flush_lock:
+            if not force and time.monotonic() < self._retry_at:
+                return 0
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            votes = [(rating_id, user_id, is_helpful) for (user_id, rating_id), is_helpful in pending.items()]
+            try:
+                written = self._write(votes)
+            except Exception as e:
+                # Голоса, уже записанные частями пачки, возвращать безопасно:
+                # apply_votes отбрасывает повторы по уникальному индексу
+                self._requeue(pending)
+                self._failures += 1
+                backoff = min(max(self.flush_interval, 0.1) * 2 ** (self._failures - 1), self.max_backoff)
+                self._retry_at = time.monotonic() + backoff
+                logger.warning(
+                    "Failed to flush %d rating votes (%s), retrying in %.1fs", len(pending), e.__class__.__name__, backoff
+                )
+                return 0
+            self._failures = 0
+            self._retry_at = 0.0
+            return written
+
+    def _write(self, votes: List[Tuple[int, int, bool]]) -> int:
+        """
+        Записывает голоса; временные ошибки пробрасываются, голоса с
+        постоянной ошибкой отбрасываются.
+        """
+        db = SessionLocal()
+        try:
+            return RatingService.apply_votes(db, votes)
+        except Exception as e:
+            db.rollback()
+            if VoteBuffer._is_transient(e):
+                raise
+            if len(votes) == 1:
+                logger.exception("Dropping rating vote %s that cannot be written", votes[0])
+                return 0
+        finally:
+            db.close()
+        # Постоянная ошибка: ищем непригодные голоса делением пачки пополам
+        middle = len(votes) // 2
+        return self._write(votes[:middle]) + self._write(votes[middle:])
+
+    def _requeue(self, pending: PendingVotes) -> None:
+        """Возвращает незаписанные голоса в буфер; более новые голоса с тем же ключом сохраняются."""
+        with self._lock:
+            for key, is_helpful in pending.items():
+                self._pending.setdefault(key, is_helpful)
+
+    @staticmethod
+    def _is_transient(e: Exception) -> bool:
+        """Ошибки, после которых запись имеет смысл повторить: блокировки, обрывы соединения."""
+        if isinstance(e, OperationalError):
+            return True
+        return isinstance(e, DBAPIError) and e.connection_invalidated
+
+    def start(self) -> None:
+        """Запускает фоновый поток записи."""
+        if self._thread is not None or self.flush_interval <= 0:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="vote-buffer-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Останавливает фоновый поток и записывает оставшиеся голоса."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping = True
+            self._wake.set()
+            thread.join()
+        for attempt in range(self.STOP_FLUSH_ATTEMPTS):
+            self.flush(force=True)
+            if not self.pending_count():
+                return
+            time.sleep(min(2 ** attempt * 0.1, self.max_backoff))
+        logger.error("Lost %d rating votes: database unavailable at shutdown", self.pending_count())
+
+    def pending_count(self) -> int:
+        """Количество голосов, ожидающих записи."""
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+vote_buffer = VoteBuffer(
+    settings.VOTE_FLUSH_INTERVAL_SECONDS, settings.VOTE_FLUSH_MAX_BATCH, settings.VOTE_FLUSH_MAX_BACKOFF_SECONDS
+)
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from ..core.config import settings
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry TTL and hit/miss counters.
+
+    Readers that fill the cache after a database read should take `epoch`
+    before the read and pass it to `set`: if any key was invalidated in the
+    meantime the value may be stale and is not stored.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def epoch(self) -> int:
+        """Counter of invalidations, used to detect writes racing with a fill."""
+        return self._epoch
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None if it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, epoch: Optional[int] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries over `maxsize`.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            epoch: `epoch` observed before the value was read from the database
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """Drop the given keys."""
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and size of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# (serialized AlbumResponse / ArtistResponse JSON, ETag) keyed by id;
+# albums with their tracklist are keyed by (id, "tracks")
+album_cache = LRUCache("albums", settings.CATALOG_CACHE_MAX_ENTRIES, settings.CATALOG_CACHE_TTL_SECONDS)
+artist_cache = LRUCache("artists", settings.CATALOG_CACHE_MAX_ENTRIES, settings.CATALOG_CACHE_TTL_SECONDS)
+# UserPrincipal keyed by username (the token subject)
+user_cache = LRUCache("users", settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
+# Current users.token_version keyed by user id, checked against claims tokens
+token_version_cache = LRUCache("token_versions", settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_albums(*album_ids: int) -> None:
+    """Drop every cached representation of the given albums."""
+    album_cache.invalidate(*[key for album_id in album_ids for key in (album_id, (album_id, "tracks"))])
+
+
+def invalidate_user(username: str, user_id: int) -> None:
+    """Drop the cached principal and token version of a user whose rights or status changed."""
+    user_cache.invalidate(username)
+    token_version_cache.invalidate(user_id)
@@ -0,0 +1,42 @@
+import hashlib
+from typing import Any, Iterable, Optional
+
+from fastapi import Request, Response
+
+from .pagination import NEXT_CURSOR_HEADER
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from row ids and versions."""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def make_page_etag(prefix: str, rows: Iterable[Iterable[Any]]) -> str:
+    """Build a strong ETag for a listing page from the (id, version, ...) tuples of its rows."""
+    digest = hashlib.sha1(repr([tuple(row) for row in rows]).encode()).hexdigest()
+    return f'"{prefix}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    # Для If-None-Match используется слабое сравнение
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def not_modified(etag: str, next_cursor: Optional[str] = None) -> Response:
+    """Build an empty 304 Not Modified response carrying the ETag."""
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(status_code=304, headers=headers)
+
+
+def etag_response(request: Request, content: str, etag: str) -> Response:
+    """Serve a JSON body with its ETag, or 304 Not Modified when If-None-Match matches it."""
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return Response(content=content, media_type="application/json", headers={"ETag": etag})
@@ -0,0 +1,184 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, false, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Upper bound for the `limit` query parameter of paginated list endpoints
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """
+    Decode a cursor produced by `encode_cursor` for the given sort columns.
+
+    Raises:
+        HTTPException: If the cursor is malformed or was issued for another sort order
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    decoded = []
+    for value, column in zip(values, columns):
+        if value is not None and column.type.python_type is datetime:
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def is_nullable(column: Any) -> bool:
+    """Whether a sort column may hold NULL (mapped attributes and table columns)."""
+    return getattr(getattr(column, "expression", column), "nullable", True)
+
+
+def order_by_key(columns: Sequence[Any], descending: bool = False) -> List[Any]:
+    """
+    Build ORDER BY clauses for a sort key applying one direction to every column.
+
+    NULLs of nullable columns sort as the smallest value on every dialect:
+    first in ascending order and last in descending order, which is what
+    `keyset_filter` expects.
+    """
+    clauses = []
+    for column in columns:
+        clause = column.desc() if descending else column.asc()
+        if is_nullable(column):
+            clause = clause.nulls_last() if descending else clause.nulls_first()
+        clauses.append(clause)
+    return clauses
+
+
+def keyset_filter(columns: Sequence[Any], descending: bool, cursor: str) -> Any:
+    """
+    Build the WHERE clause selecting rows after the row encoded in `cursor`.
+
+    A row-value comparison is used when no column is nullable. Otherwise the
+    predicate is expanded column by column with NULL treated as the smallest
+    value, since a comparison with NULL would drop every following row.
+    """
+    values = decode_cursor(cursor, columns)
+    if not any(is_nullable(column) for column in columns):
+        key = tuple_(*columns)
+        return key < tuple_(*values) if descending else key > tuple_(*values)
+    return _after(list(columns), values, descending)
+
+
+def _after(columns: List[Any], values: List[Any], descending: bool) -> Any:
+    """Rows whose key (NULL as the smallest value) comes after `values` in the sort order."""
+    column, value = columns[0], values[0]
+    if value is None:
+        # NULL is the smallest value: descending, only NULLs follow; ascending, every value does
+        beyond = false() if descending else column.is_not(None)
+    elif descending:
+        beyond = or_(column < value, column.is_(None)) if is_nullable(column) else column < value
+    else:
+        beyond = column > value
+    if len(columns) == 1:
+        return beyond
+    same = column.is_(None) if value is None else column == value
+    return or_(beyond, and_(same, _after(columns[1:], values[1:], descending)))
+
+
+def paginate(
+    query: Query,
+    columns: Sequence[Any],
+    descending: bool = False,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+) -> Tuple[list, Optional[str]]:
+    """
+    Fetch one page of `query` ordered by `columns` and return it with the next cursor.
+
+    The last column must be unique (normally the primary key) so that the sort
+    key is a total order. With a cursor the page starts right after the encoded
+    row (keyset pagination), otherwise `skip` is used as a plain offset. The
+    returned cursor is None when there are no more rows.
+
+    Args:
+        query: Query to paginate
+        columns: Sort key columns, tie-breaker last
+        descending: Sort direction applied to every column
+        limit: Page size
+        cursor: Cursor returned with the previous page
+        skip: Offset used when no cursor is given
+
+    Returns:
+        Rows of the page and the cursor for the next page
+    """
+    if cursor:
+        query = query.filter(keyset_filter(columns, descending, cursor))
+
+    query = query.order_by(*order_by_key(columns, descending))
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    # Fetch one extra row to find out whether a next page exists
+    rows = query.limit(limit + 1).all()
+    return _page(rows, columns, limit)
+
+
+async def paginate_async(
+    db: AsyncSession,
+    statement: Select,
+    columns: Sequence[Any],
+    descending: bool = False,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+) -> Tuple[list, Optional[str]]:
+    """
+    Async counterpart of `paginate` for a 2.0-style SELECT of ORM entities.
+
+    Args:
+        db: Async database session
+        statement: SELECT of a single ORM entity
+        columns: Sort key columns, tie-breaker last
+        descending: Sort direction applied to every column
+        limit: Page size
+        cursor: Cursor returned with the previous page
+        skip: Offset used when no cursor is given
+
+    Returns:
+        Rows of the page and the cursor for the next page
+    """
+    if cursor:
+        statement = statement.where(keyset_filter(columns, descending, cursor))
+
+    statement = statement.order_by(*order_by_key(columns, descending))
+    if skip and not cursor:
+        statement = statement.offset(skip)
+
+    rows = (await db.execute(statement.limit(limit + 1))).scalars().all()
+    return _page(rows, columns, limit)
+
+
+def _page(rows: list, columns: Sequence[Any], limit: int) -> Tuple[list, Optional[str]]:
+    """Trim the extra row fetched by the paginators and build the next cursor."""
+    if len(rows) <= limit or limit <= 0:
+        return rows[:max(limit, 0)], None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column in columns])
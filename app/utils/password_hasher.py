@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..core.config import settings
+from .security import pwd_context
+
+
+class HasherBusyError(Exception):
+    """Raised when the password hashing queue is full and the request is rejected."""
+
+
+class PasswordHasher:
+    """
+    Dedicated worker pool for bcrypt hashing and verification.
+
+    Hashes run on a small pool of their own threads (bcrypt releases the GIL),
+    so a burst of logins cannot occupy the AnyIO threadpool that serves the
+    sync endpoints. At most `max_pending` operations may be queued or running;
+    further calls fail fast with HasherBusyError instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured bcrypt cost."""
+        return await self._submit(pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and rehash it if its cost differs from BCRYPT_ROUNDS.
+
+        Returns:
+            Whether the password matches and the new hash to store, if any
+        """
+        valid, new_hash = await self._submit(pwd_context.verify_and_update, password, hashed_password)
+        if new_hash is not None:
+            with self._lock:
+                self.rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and timing counters of the pool."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "peak_pending": self.peak_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "avg_wait_ms": round(self._wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+                "avg_hash_ms": round(self._run_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads; the pool is recreated on the next call."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    async def _submit(self, fn: Callable, *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherBusyError("Too many password operations in progress")
+            self._pending += 1
+            self.peak_pending = max(self.peak_pending, self._pending)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hasher")
+            executor = self._executor
+
+        queued_at = time.monotonic()
+
+        def run() -> Any:
+            started = time.monotonic()
+            with self._lock:
+                self._running += 1
+                self._wait_seconds += started - queued_at
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self.completed += 1
+                    self._run_seconds += time.monotonic() - started
+
+        future = executor.submit(run)
+        # The slot is released when the work finishes, even if the caller went away
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
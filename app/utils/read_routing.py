@@ -0,0 +1,55 @@
+import math
+import time
+
+from fastapi import Request, Response
+
+from ..core.config import settings
+
+# Time of the client's last successful write (unix seconds), sent back by the
+# client as a cookie or echoed in the header
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def mark_write(response: Response) -> None:
+    """Stamp the response with the current time as the client's last write."""
+    value = f"{time.time():.3f}"
+    response.headers[LAST_WRITE_HEADER] = value
+    response.set_cookie(
+        LAST_WRITE_COOKIE,
+        value,
+        max_age=math.ceil(settings.READ_YOUR_WRITES_SECONDS),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def wrote_recently(request: Request) -> bool:
+    """
+    Whether the client wrote within the last READ_YOUR_WRITES_SECONDS.
+
+    Timestamps from the future are ignored, so a client cannot pin itself to
+    the primary database.
+    """
+    window = settings.READ_YOUR_WRITES_SECONDS
+    if window <= 0:
+        return False
+    now = time.time()
+    for value in (request.headers.get(LAST_WRITE_HEADER), request.cookies.get(LAST_WRITE_COOKIE)):
+        try:
+            age = now - float(value)
+        except (TypeError, ValueError):
+            continue
+        if 0 <= age < window:
+            return True
+    return False
+
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """Mark successful unsafe requests so the client's next reads go to the primary."""
+    response = await call_next(request)
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        mark_write(response)
+    return response
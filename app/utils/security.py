@@ -1,18 +1,22 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..schemas.schemas import TokenData
+from ..schemas.schemas import TokenData, UserPrincipal
 from ..models.models import User
-from ..models.database import get_db
+from ..models.database import get_async_db, get_db
 from ..core.config import settings
+from .cache import token_version_cache, user_cache
 
 # Security configuration
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -43,53 +47,247 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+def create_user_token(user: User) -> str:
     """
-    Get current user from JWT token.
+    Create an access token for a user.
+    
+    With AUTH_TOKEN_CLAIMS the token also carries the user id (`uid`), the
+    admin and active flags (`adm`, `act`) and the user's token version
+    (`ver`), so requests are authenticated without loading the user.
+    
+    Args:
+        user: User to issue the token for
+        
+    Returns:
+        Encoded JWT token as string
+    """
+    data = {"sub": user.username}
+    if settings.AUTH_TOKEN_CLAIMS:
+        data.update({
+            "uid": user.id,
+            "adm": bool(user.is_admin),
+            "act": bool(user.is_active),
+            "ver": user.token_version or 0,
+        })
+    return create_access_token(data, timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+
+def get_token_version(db: Session, user_id: int) -> Optional[int]:
+    """
+    Return the current token version of a user, from memory when possible.
+    
+    Versions are dropped by `invalidate_user` when rights or status change
+    and expire after USER_CACHE_TTL_SECONDS otherwise.
     
     Args:
-        token: JWT token from Authorization header
         db: Database session
+        user_id: User ID from the token
         
     Returns:
-        User object if token is valid
+        Token version or None if the user does not exist
+    """
+    version = token_version_cache.get(user_id)
+    if version is not None:
+        return version
+    
+    epoch = token_version_cache.epoch
+    row = db.query(User.token_version).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    token_version_cache.set(user_id, row.token_version, epoch)
+    return row.token_version
+
+def get_user_principal(db: Session, username: str) -> Optional[UserPrincipal]:
+    """
+    Resolve the principal for a token subject, from the user cache when possible.
+    
+    Cached principals are dropped by `invalidate_user` when rights or status
+    change and expire after USER_CACHE_TTL_SECONDS otherwise.
+    
+    Args:
+        db: Database session
+        username: Token subject
         
-    Raises:
-        HTTPException: If token is invalid or user not found
+    Returns:
+        UserPrincipal or None if the user does not exist
     """
-    credentials_exception = HTTPException(
+    principal = user_cache.get(username)
+    if principal is not None:
+        return principal
+    
+    epoch = user_cache.epoch
+    user = db.query(User).filter(User.username == username).first()
+    if user is None:
+        return None
+    principal = UserPrincipal.model_validate(user)
+    user_cache.set(username, principal, epoch)
+    return principal
+
+def credentials_exception() -> HTTPException:
+    """401 response for invalid, expired or revoked tokens."""
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def inactive_user_exception() -> HTTPException:
+    """403 response for deactivated users."""
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
+
+def decode_token(token: str) -> Tuple[dict, str]:
+    """
+    Decode a JWT token and return its payload and subject.
+    
+    Raises:
+        HTTPException: If the token is invalid or has no subject
+    """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            raise credentials_exception()
         token_data = TokenData(username=username)
     except JWTError:
-        raise credentials_exception
+        raise credentials_exception()
+    return payload, token_data.username
+
+def claims_principal(payload: dict, username: str) -> UserPrincipal:
+    """
+    Build the principal carried by a claims token (see `create_user_token`).
+    
+    Raises:
+        HTTPException: If a claim is missing or malformed
+    """
+    try:
+        return UserPrincipal(
+            id=payload["uid"],
+            username=username,
+            is_admin=payload["adm"],
+            is_active=payload["act"]
+        )
+    except (KeyError, ValidationError):
+        raise credentials_exception()
+
+def resolve_token(db: Session, token: str) -> UserPrincipal:
+    """
+    Authenticate a JWT token.
+    
+    Claims tokens (see `create_user_token`) are checked against the user's
+    token version only; subject-only tokens are resolved with
+    `get_user_principal`.
     
-    user = db.query(User).filter(User.username == token_data.username).first()
+    Args:
+        db: Database session
+        token: Encoded JWT token
+        
+    Returns:
+        UserPrincipal if token is valid
+        
+    Raises:
+        HTTPException: If token is invalid, revoked or user not found (401)
+            or the user is deactivated (403)
+    """
+    payload, username = decode_token(token)
+    if "uid" in payload:
+        user = claims_principal(payload, username)
+        # Токен выдан до смены прав или статуса пользователя
+        if get_token_version(db, user.id) != payload.get("ver"):
+            raise credentials_exception()
+    else:
+        user = get_user_principal(db, username)
+        if user is None:
+            raise credentials_exception()
+    if not user.is_active:
+        raise inactive_user_exception()
+    return user
+
+async def get_token_version_async(db: AsyncSession, user_id: int) -> Optional[int]:
+    """Async counterpart of `get_token_version`."""
+    version = token_version_cache.get(user_id)
+    if version is not None:
+        return version
+    
+    epoch = token_version_cache.epoch
+    version = (await db.execute(select(User.token_version).where(User.id == user_id))).scalar()
+    if version is None:
+        return None
+    token_version_cache.set(user_id, version, epoch)
+    return version
+
+async def get_user_principal_async(db: AsyncSession, username: str) -> Optional[UserPrincipal]:
+    """Async counterpart of `get_user_principal`."""
+    principal = user_cache.get(username)
+    if principal is not None:
+        return principal
+    
+    epoch = user_cache.epoch
+    user = (await db.execute(select(User).where(User.username == username))).scalars().first()
     if user is None:
-        raise credentials_exception
+        return None
+    principal = UserPrincipal.model_validate(user)
+    user_cache.set(username, principal, epoch)
+    return principal
+
+async def resolve_token_async(db: AsyncSession, token: str) -> UserPrincipal:
+    """Async counterpart of `resolve_token` for AsyncSession endpoints."""
+    payload, username = decode_token(token)
+    if "uid" in payload:
+        user = claims_principal(payload, username)
+        if await get_token_version_async(db, user.id) != payload.get("ver"):
+            raise credentials_exception()
+    else:
+        user = await get_user_principal_async(db, username)
+        if user is None:
+            raise credentials_exception()
+    if not user.is_active:
+        raise inactive_user_exception()
     return user
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> UserPrincipal:
+    """
+    Get current user from JWT token.
+    
+    A plain function, so FastAPI runs it on the threadpool: principal and
+    token version lookups on cache misses do not block the event loop.
+    
+    Args:
+        token: JWT token from Authorization header
+        db: Database session
+        
+    Returns:
+        UserPrincipal if token is valid
+        
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
+    return resolve_token(db, token)
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserPrincipal:
+    """
+    Get current user from JWT token using the async database session.
+    
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
+    return await resolve_token_async(db, token)
+
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """Check if current user is active."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 async def get_current_admin_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """Check if current user is admin."""
     if not current_user.is_admin:
         raise HTTPException(
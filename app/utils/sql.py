@@ -0,0 +1,117 @@
+from typing import Any, Dict, Iterable, List, Sequence
+
+from sqlalchemy import and_, exists, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, table):
+    """
+    Build an INSERT for the session's dialect that supports ON CONFLICT
+    (`on_conflict_do_nothing` / `on_conflict_do_update`).
+
+    Returns:
+        The dialect INSERT, or None if the database has no ON CONFLICT
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_specific_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_specific_insert
+    else:
+        return None
+    return dialect_specific_insert(table)
+
+
+def insert_ignore(db: Session, table, rows: List[Dict[str, Any]], index_elements: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Insert `rows`, skipping those that conflict on the unique key `index_elements`.
+
+    Uses ON CONFLICT DO NOTHING where available. Other databases get a plain
+    INSERT of the rows whose key is not stored yet; that existence check is
+    not atomic, so concurrent inserts may still fail on the unique index.
+
+    Returns:
+        The inserted rows
+    """
+    if not rows:
+        return []
+    stmt = dialect_insert(db, table)
+    if stmt is not None:
+        keys = [table.c[name] for name in index_elements]
+        inserted = db.execute(
+            stmt.values(rows).on_conflict_do_nothing(index_elements=keys).returning(*table.c)
+        )
+        return [dict(row._mapping) for row in inserted]
+
+    stored = _stored_keys(db, table, index_elements, rows)
+    fresh: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        key = tuple(row[name] for name in index_elements)
+        if key not in stored:
+            fresh.setdefault(key, row)
+    if fresh:
+        db.execute(insert(table), list(fresh.values()))
+    return list(fresh.values())
+
+
+def insert_from_select_ignore(db: Session, table, columns: Sequence[str], query, index_elements: Sequence[str]) -> None:
+    """INSERT ... SELECT that skips rows conflicting on `index_elements`."""
+    stmt = dialect_insert(db, table)
+    if stmt is not None:
+        keys = [table.c[name] for name in index_elements]
+        db.execute(stmt.from_select(list(columns), query).on_conflict_do_nothing(index_elements=keys))
+        return
+
+    source = query.subquery()
+    stored = exists().where(and_(*(
+        table.c[name] == source.c[columns.index(name)] for name in index_elements
+    )))
+    db.execute(insert(table).from_select(list(columns), select(*source.c).where(~stored)))
+
+
+def upsert(
+    db: Session,
+    table,
+    values: Dict[str, Any],
+    index_elements: Sequence[str],
+    increment: Iterable[str] = ()
+) -> Dict[str, Any]:
+    """
+    Insert `values`, or update the row with the same `index_elements` key.
+
+    On conflict the `increment` columns are added to the stored values and the
+    other columns are overwritten. Databases without ON CONFLICT get an UPDATE
+    followed by an INSERT when no row was updated.
+
+    Returns:
+        The stored row after the upsert
+    """
+    increment = set(increment)
+    key = {name: values[name] for name in index_elements}
+    stmt = dialect_insert(db, table)
+    if stmt is not None:
+        stmt = stmt.values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[name] for name in index_elements],
+            set_={
+                name: table.c[name] + stmt.excluded[name] if name in increment else stmt.excluded[name]
+                for name in values if name not in key
+            }
+        ).returning(*table.c)
+        return dict(db.execute(stmt).one()._mapping)
+
+    where = and_(*(table.c[name] == value for name, value in key.items()))
+    changes = {
+        name: table.c[name] + value if name in increment else value
+        for name, value in values.items() if name not in key
+    }
+    if db.execute(update(table).where(where).values(**changes)).rowcount == 0:
+        db.execute(insert(table).values(**values))
+    return dict(db.execute(select(table).where(where)).one()._mapping)
+
+
+def _stored_keys(db: Session, table, index_elements: Sequence[str], rows: List[Dict[str, Any]]) -> set:
+    keys = [table.c[name] for name in index_elements]
+    wanted = {tuple(row[name] for name in index_elements) for row in rows}
+    query = select(*keys).where(tuple_(*keys).in_(list(wanted)))
+    return {tuple(row) for row in db.execute(query)}
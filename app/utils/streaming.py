@@ -0,0 +1,75 @@
+from typing import Iterator, Optional, Type
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Query, Session
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSON_MEDIA_TYPE = "application/json"
+
+# Rows fetched per server-side batch and written to the socket per chunk
+STREAM_BATCH_SIZE = 1000
+
+
+def streaming_media_type(request: Request, stream: bool) -> Optional[str]:
+    """
+    Pick the streaming format requested by the client.
+
+    Returns:
+        NDJSON media type if the client accepts `application/x-ndjson`,
+        JSON media type if `stream=true` was passed, otherwise None
+    """
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return NDJSON_MEDIA_TYPE
+    if stream:
+        return JSON_MEDIA_TYPE
+    return None
+
+
+def stream_query(query: Query, schema: Type[BaseModel], media_type: str) -> StreamingResponse:
+    """
+    Stream the rows of `query` serialized with `schema` as NDJSON or a JSON array.
+
+    Rows are fetched with `yield_per` in batches of STREAM_BATCH_SIZE and each
+    batch is written as soon as it is serialized, so memory use does not grow
+    with the size of the result. The query runs in its own session, bound to
+    the same engine as the request session (primary or read replica), because
+    the request session is closed before the response body is sent.
+
+    Args:
+        query: Query to stream, already filtered and ordered
+        schema: Pydantic model used to serialize each row
+        media_type: NDJSON_MEDIA_TYPE or JSON_MEDIA_TYPE
+
+    Returns:
+        StreamingResponse writing the rows as they are fetched
+    """
+    ndjson = media_type == NDJSON_MEDIA_TYPE
+    bind = query.session.get_bind()
+
+    def generate() -> Iterator[str]:
+        db = Session(bind=bind, autoflush=False)
+        try:
+            if not ndjson:
+                yield "["
+            chunk = []
+            first = True
+            for row in query.with_session(db).yield_per(STREAM_BATCH_SIZE):
+                body = schema.model_validate(row).model_dump_json()
+                if ndjson:
+                    chunk.append(body + "\n")
+                else:
+                    chunk.append(body if first else "," + body)
+                first = False
+                if len(chunk) >= STREAM_BATCH_SIZE:
+                    yield "".join(chunk)
+                    chunk = []
+            if chunk:
+                yield "".join(chunk)
+            if not ndjson:
+                yield "]"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type=media_type)
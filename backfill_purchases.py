@@ -0,0 +1,16 @@
+from app.models.database import SessionLocal
+from app.services.purchase_service import PurchaseService
+
+def backfill_purchases():
+    db = SessionLocal()
+    try:
+        report = PurchaseService.backfill(db)
+        print(
+            f"Ratings: {report['ratings']}, verified flag fixed: {report['ratings_updated']}, "
+            f"albums updated: {report['albums_updated']}"
+        )
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    backfill_purchases()
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import tempfile
+import time
+
+# Бенчмарк использует временную базу, чтобы не трогать рабочую
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_auth.db"
+
+from app.core.config import settings
+from app.models.database import Base, SessionLocal, engine
+from app.models.models import User
+from app.utils.cache import token_version_cache, user_cache
+from app.utils.security import create_user_token, get_current_admin_user, resolve_token
+
+ITERATIONS = 5000
+
+def measure(label, db, token, before=None):
+    """Среднее время аутентификации одного запроса: проверка токена и прав администратора."""
+    async def authenticate():
+        await get_current_admin_user(resolve_token(db, token))
+    loop = asyncio.new_event_loop()
+    try:
+        for _ in range(100):
+            if before:
+                before()
+            loop.run_until_complete(authenticate())
+        started = time.perf_counter()
+        for _ in range(ITERATIONS):
+            if before:
+                before()
+            loop.run_until_complete(authenticate())
+        elapsed = time.perf_counter() - started
+    finally:
+        loop.close()
+    per_request = elapsed / ITERATIONS * 1_000_000
+    print(f"{label:<40} {per_request:8.1f} us/request")
+    return per_request
+
+def bench_auth():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(username="bench", email="bench@example.com", hashed_password="x", is_active=True, is_admin=True)
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+
+        settings.AUTH_TOKEN_CLAIMS = False
+        subject_token = create_user_token(user)
+        settings.AUTH_TOKEN_CLAIMS = True
+        claims_token = create_user_token(user)
+
+        print(f"Per-request auth overhead, {ITERATIONS} iterations")
+        lookup = measure("subject token, users query", db, subject_token, before=user_cache.clear)
+        measure("subject token, principal cache", db, subject_token)
+        measure("claims token, version query", db, claims_token, before=token_version_cache.clear)
+        claims = measure("claims token, version table", db, claims_token)
+        print(f"Speedup of claims tokens over a users query: {lookup / claims:.1f}x")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    bench_auth()
@@ -0,0 +1,19 @@
+from app.models.database import SessionLocal
+from app.services.manipulation_service import ManipulationService
+
+def detect_manipulation():
+    db = SessionLocal()
+    try:
+        report = ManipulationService.analyze(db)
+        print(
+            f"Ratings: {report['ratings']}, helpful votes: {report['votes']}\n"
+            f"Bursts: {report['burst']}, vote rings: {report['ring']}, "
+            f"single-artist accounts: {report['single_artist']}\n"
+            f"Flagged: {report['flagged']}, factors updated: {report['factors_updated']}, "
+            f"albums updated: {report['albums_updated']}, elapsed: {report['elapsed_seconds']}s"
+        )
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    detect_manipulation()
@@ -0,0 +1,27 @@
+import argparse
+
+from app.models.database import SessionLocal
+from app.services.catalog_import import CatalogImportService
+from app.services.user_import import UserImportService
+
+def import_users(path: str, batch_size: int, workers: int = None):
+    db = SessionLocal()
+    try:
+        with open(path, "rb") as stream:
+            report = UserImportService.import_rows(db, CatalogImportService.read_csv(stream), batch_size, workers)
+        print(
+            f"Rows: {report.rows_total}, created: {report.users_created}, failed: {report.rows_failed}, "
+            f"elapsed: {report.elapsed_seconds}s ({report.rows_per_second} rows/s)"
+        )
+        for error in report.errors:
+            print(f"  line {error.line}: {error.error}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk create users from a CSV file (username,email,password[,is_active])")
+    parser.add_argument("path", help="CSV file with a header row")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Users per transaction")
+    parser.add_argument("--workers", type=int, default=None, help="Hashing processes (default: all cores)")
+    args = parser.parse_args()
+    import_users(args.path, args.batch_size, args.workers)
@@ -0,0 +1,16 @@
+from app.models.database import SessionLocal
+from app.services.rating_batch import RatingBatchService
+
+def recompute_ratings():
+    db = SessionLocal()
+    try:
+        report = RatingBatchService.recompute_all(db)
+        print(
+            f"Ratings: {report['ratings']}, updated: {report['ratings_updated']}, "
+            f"albums updated: {report['albums_updated']}, elapsed: {report['elapsed_seconds']}s"
+        )
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    recompute_ratings()
@@ -0,0 +1,41 @@
+import os
+import tempfile
+
+import pytest
+
+# Настройки читаются при импорте приложения, поэтому задаются до него
+_data_dir = tempfile.mkdtemp(prefix="records-store-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_data_dir}/test.db"
+os.environ["VOTE_FLUSH_INTERVAL_SECONDS"] = "0"
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.models.database import Base, SessionLocal, engine  # noqa: E402
+from app.utils.cache import album_cache, artist_cache, token_version_cache, user_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    """Каждый тест начинает с пустой базы и пустых кешей."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    for cache in (album_cache, artist_cache, user_cache, token_version_cache):
+        cache.clear()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,58 @@
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from app import dependencies
+from app.models.models import User
+from app.utils import security
+
+
+def _register(client, username):
+    response = client.post(
+        "/api/auth/register",
+        json={"username": username, "email": f"{username}@example.com", "password": "password123"}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def _login(client, username):
+    return client.post("/api/auth/token", data={"username": username, "password": "password123"})
+
+
+def _headers(client, username):
+    return {"Authorization": "Bearer " + _login(client, username).json()["access_token"]}
+
+
+def test_deactivated_user_is_rejected(client):
+    _register(client, "admin")
+    _register(client, "bob")
+    admin = _headers(client, "admin")
+    bob = _headers(client, "bob")
+    assert client.get("/api/orders/", headers=bob).status_code == 200
+
+    response = client.patch("/api/auth/users/bob/status", json={"is_active": False}, headers=admin)
+    assert response.status_code == 200
+
+    response = client.get("/api/orders/", headers=bob)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Inactive user"
+    response = _login(client, "bob")
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Inactive user"
+
+    client.patch("/api/auth/users/bob/status", json={"is_active": True}, headers=admin)
+    assert client.get("/api/orders/", headers=_headers(client, "bob")).status_code == 200
+
+
+def test_concurrent_first_registrations_create_one_admin(client, db):
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(lambda index: _register(client, f"user{index}"), range(6)))
+
+    assert db.query(User).count() == 6
+    assert db.query(User).filter(User.is_admin.is_(True)).count() == 1
+
+
+def test_token_resolution_runs_off_the_event_loop():
+    # Синхронные зависимости FastAPI выполняет в пуле потоков
+    assert not inspect.iscoroutinefunction(security.get_current_user)
+    assert not inspect.iscoroutinefunction(dependencies.get_current_user)
@@ -0,0 +1,45 @@
+import pytest
+
+from app.models.models import Album, Artist
+from app.routers.albums import ALBUM_SORT_KEYS
+from app.utils.pagination import paginate
+
+PRICES = [10.0, None, 5.0, None, 7.5, 5.0, None, 20.0, 1.0, 12.0]
+
+
+def _albums(db):
+    artist = Artist(name="Artist", description="")
+    db.add(artist)
+    db.flush()
+    for index, price in enumerate(PRICES):
+        db.add(Album(
+            title=None if price is None else f"Album {index % 4}", artist_id=artist.id,
+            release_year=None if price is None else 1970 + index % 3, genre="rock", price=price, stock=1
+        ))
+    db.commit()
+    return db.query(Album).all()
+
+
+def _expected(albums, columns, descending):
+    # NULL — наименьшее значение ключа, id различает равные ключи
+    def key(album):
+        return [(getattr(album, column.key) is not None, getattr(album, column.key) or 0) for column in columns]
+    return [album.id for album in sorted(albums, key=key, reverse=descending)]
+
+
+@pytest.mark.parametrize("sort_by", ["price_asc", "price_desc", "title", "year"])
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_cursor_pages_through_null_sort_keys(db, sort_by, limit):
+    albums = _albums(db)
+    columns, descending = ALBUM_SORT_KEYS[sort_by]
+
+    seen = []
+    cursor = None
+    for _ in range(len(PRICES) + 1):
+        page, cursor = paginate(db.query(Album), columns, descending, limit, cursor)
+        seen.extend(album.id for album in page)
+        if cursor is None:
+            break
+
+    assert cursor is None
+    assert seen == _expected(albums, columns, descending)
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.models import Album, Artist, Rating, User
+
+
+def _album_with_ratings(db, count):
+    artist = Artist(name="Artist", description="")
+    db.add(artist)
+    db.flush()
+    album = Album(title="Album", artist_id=artist.id, release_year=2000, genre="rock", price=10.0, stock=1)
+    db.add(album)
+    db.flush()
+    for index in range(count):
+        user = User(email=f"user{index}@example.com", username=f"user{index}", hashed_password="x")
+        db.add(user)
+        db.flush()
+        db.add(Rating(user_id=user.id, album_id=album.id, score=index % 5 + 1))
+    db.commit()
+    return album.id
+
+
+def _newest_pages(client, album_id, limit):
+    seen = []
+    cursor = None
+    for _ in range(20):
+        params = {"sort_by": "newest", "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(f"/api/ratings/albums/{album_id}", params=params)
+        assert response.status_code == 200
+        seen.extend(rating["id"] for rating in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return seen
+    pytest.fail("Cursor pagination did not terminate")
+
+
+def test_newest_cursor_pages_through_ratings_created_in_the_same_second(client, db):
+    album_id = _album_with_ratings(db, 7)
+
+    seen = _newest_pages(client, album_id, 3)
+
+    assert sorted(seen) == sorted(rating.id for rating in db.query(Rating))
+
+
+def test_newest_cursor_breaks_created_at_ties_by_id(client, db):
+    album_id = _album_with_ratings(db, 7)
+    db.query(Rating).update({Rating.created_at: datetime(2026, 1, 1, 12)})
+    db.commit()
+
+    seen = _newest_pages(client, album_id, 3)
+
+    assert seen == sorted(rating.id for rating in db.query(Rating))[::-1]
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import database
+from app.models.models import Album, Artist
+from app.utils.cache import album_cache, artist_cache
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """Route reads of clients without recent writes to a second engine on the same file."""
+    read_engine = create_engine(database.SQLALCHEMY_DATABASE_URL)
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=read_engine))
+    yield read_engine
+    read_engine.dispose()
+
+
+@pytest.fixture
+def headers(client):
+    client.post(
+        "/api/auth/register",
+        json={"username": "admin", "email": "admin@example.com", "password": "password123"}
+    )
+    response = client.post("/api/auth/token", data={"username": "admin", "password": "password123"})
+    client.cookies.clear()
+    return {"Authorization": "Bearer " + response.json()["access_token"]}
+
+
+def test_replica_reads_do_not_fill_catalog_caches(client, db, replica, headers):
+    artist = Artist(name="Artist", description="")
+    db.add(artist)
+    db.flush()
+    album = Album(title="Album", artist_id=artist.id, release_year=2000, genre="rock", price=10.0, stock=1)
+    db.add(album)
+    db.commit()
+
+    assert client.get(f"/api/albums/{album.id}", headers=headers).status_code == 200
+    assert client.get(f"/api/artists/{artist.id}", headers=headers).status_code == 200
+    assert album_cache.get(album.id) is None
+    assert artist_cache.get(artist.id) is None
+
+    # Клиент, только что писавший, читает с основной БД и заполняет кеш
+    written = {**headers, "X-Last-Write": f"{time.time():.3f}"}
+    assert client.get(f"/api/albums/{album.id}", headers=written).status_code == 200
+    assert album_cache.get(album.id) is not None
+
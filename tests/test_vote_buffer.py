@@ -0,0 +1,67 @@
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.models.models import Album, Artist, Rating, RatingVote, User
+from app.services.rating_service import RatingService
+from app.services.vote_buffer import VoteBuffer
+
+
+def _make_rating(db):
+    author = User(email="author@example.com", username="author", hashed_password="x")
+    voter = User(email="voter@example.com", username="voter", hashed_password="x")
+    artist = Artist(name="Artist", description="")
+    db.add_all([author, voter, artist])
+    db.flush()
+    album = Album(title="Album", artist_id=artist.id, release_year=2000, genre="rock", price=10.0, stock=1)
+    db.add(album)
+    db.flush()
+    rating = Rating(user_id=author.id, album_id=album.id, score=5)
+    db.add(rating)
+    db.commit()
+    return rating.id, voter.id
+
+
+def test_votes_survive_transient_flush_failure(db, monkeypatch):
+    rating_id, voter_id = _make_rating(db)
+    apply_votes = RatingService.apply_votes
+    calls = []
+
+    def flaky_apply_votes(session, votes):
+        calls.append(list(votes))
+        if len(calls) == 1:
+            raise OperationalError("UPDATE ratings", {}, Exception("database is locked"))
+        return apply_votes(session, votes)
+
+    monkeypatch.setattr(RatingService, "apply_votes", staticmethod(flaky_apply_votes))
+    buffer = VoteBuffer(flush_interval=60, max_batch=100)
+
+    assert buffer.add(rating_id, voter_id, True)
+    assert buffer.pending_count() == 1
+    # До конца паузы после ошибки обычная запись не выполняется
+    assert buffer.flush() == 0
+    assert len(calls) == 1
+
+    assert buffer.flush(force=True) == 1
+    assert buffer.pending_count() == 0
+    db.expire_all()
+    assert db.query(RatingVote).filter_by(rating_id=rating_id, user_id=voter_id, is_helpful=True).count() == 1
+    assert db.get(Rating, rating_id).helpful_votes == 1
+
+
+def test_permanently_failing_vote_is_dropped_alone(db, monkeypatch):
+    rating_id, voter_id = _make_rating(db)
+    poison = (rating_id + 1000, voter_id, True)
+    apply_votes = RatingService.apply_votes
+
+    def strict_apply_votes(session, votes):
+        if poison in votes:
+            raise IntegrityError("INSERT INTO rating_votes", {}, Exception("FOREIGN KEY constraint failed"))
+        return apply_votes(session, votes)
+
+    monkeypatch.setattr(RatingService, "apply_votes", staticmethod(strict_apply_votes))
+    buffer = VoteBuffer(flush_interval=60, max_batch=100)
+    # Без фонового потока add() пишет сразу, поэтому пачка собирается напрямую
+    buffer._requeue({(voter_id, rating_id): True, (poison[1], poison[0]): poison[2]})
+
+    assert buffer.flush(force=True) == 1
+    assert buffer.pending_count() == 0
+    assert db.query(RatingVote).filter_by(rating_id=rating_id, user_id=voter_id).count() == 1